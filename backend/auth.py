@@ -0,0 +1,161 @@
+"""Signed access/refresh tokens and bounded password hashing.
+
+Access tokens are short-lived and verified by signature alone, plus a check
+against an in-memory copy of the revoked access tokens that is reloaded every
+``AUTH_REVOCATION_SYNC`` seconds. Refresh tokens are checked against the
+database on every use and rotated, so their (long-lived) revocations never
+enter that copy. Password hashing runs in a small thread pool so a login
+storm cannot occupy every request thread.
+"""
+import logging
+import secrets
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta, timezone
+
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+
+class TokenError(Exception):
+    pass
+
+
+class BusyError(Exception):
+    """Raised when the password hashing pool is saturated."""
+
+
+class AuthService:
+    def __init__(self):
+        self.access_ttl = 900
+        self.refresh_ttl = 30 * 86400
+        self.revocation_sync = 30
+        self._revoked = frozenset()
+        self._synced_at = 0.0
+        self._sync_lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+
+    def init_app(self, app, db, revoked_model):
+        self.db = db
+        self.model = revoked_model
+        secret = app.config.get("SECRET_KEY")
+        if not secret:
+            logger.warning("SECRET_KEY is not set; tokens will not validate across workers or restarts")
+            secret = app.config["SECRET_KEY"] = secrets.token_hex(32)
+        self.access_ttl = app.config.get("AUTH_ACCESS_TTL", self.access_ttl)
+        self.refresh_ttl = app.config.get("AUTH_REFRESH_TTL", self.refresh_ttl)
+        self.revocation_sync = app.config.get("AUTH_REVOCATION_SYNC", self.revocation_sync)
+        workers = app.config.get("AUTH_HASH_WORKERS", 2)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+        # Allow a short queue behind the workers, then shed load instead of piling up.
+        self._slots = threading.BoundedSemaphore(workers * app.config.get("AUTH_HASH_QUEUE", 4))
+        self._access = URLSafeTimedSerializer(secret, salt="spendsmart-access")
+        self._refresh = URLSafeTimedSerializer(secret, salt="spendsmart-refresh")
+        app.extensions["auth"] = self
+
+    # --- password hashing ----------------------------------------------------
+
+    def _run_bounded(self, func, *args, timeout=10):
+        if not self._slots.acquire(blocking=False):
+            raise BusyError("Too many concurrent password operations")
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot stays taken until the hash finishes, even if this request stops waiting.
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise BusyError("Password operation timed out")
+
+    def check_password(self, pwhash, password):
+        return self._run_bounded(check_password_hash, pwhash, password)
+
+    def hash_password(self, password):
+        return self._run_bounded(generate_password_hash, password, "pbkdf2:sha256")
+
+    # --- tokens ------------------------------------------------------------
+
+    def issue(self, user_id):
+        return {
+            "access_token": self._access.dumps({"uid": user_id, "jti": uuid.uuid4().hex}),
+            "refresh_token": self._refresh.dumps({"uid": user_id, "jti": uuid.uuid4().hex}),
+            "token_type": "Bearer",
+            "expires_in": self.access_ttl,
+        }
+
+    def _load(self, serializer, token, max_age):
+        try:
+            return serializer.loads(token, max_age=max_age)
+        except SignatureExpired:
+            raise TokenError("Token expired")
+        except BadSignature:
+            raise TokenError("Invalid token")
+
+    def verify_access(self, token):
+        """Return the user id for a valid access token; no database access on the hot path."""
+        payload = self._load(self._access, token, self.access_ttl)
+        self._sync_revoked()
+        if payload["jti"] in self._revoked:
+            raise TokenError("Token revoked")
+        return payload["uid"]
+
+    def refresh(self, refresh_token):
+        """Rotate a refresh token: revoke it and issue a new token pair."""
+        payload = self._load(self._refresh, refresh_token, self.refresh_ttl)
+        if self.db.session.get(self.model, payload["jti"]) is not None:
+            raise TokenError("Token revoked")
+        self._revoke(payload["jti"], REFRESH, self.refresh_ttl)
+        try:
+            self.db.session.commit()
+        except IntegrityError:
+            # A concurrent request rotated the same token first: treat it as reuse.
+            self.db.session.rollback()
+            raise TokenError("Token revoked")
+        return self.issue(payload["uid"])
+
+    def revoke(self, access_token=None, refresh_token=None):
+        for token, kind, serializer, ttl in ((access_token, ACCESS, self._access, self.access_ttl),
+                                             (refresh_token, REFRESH, self._refresh, self.refresh_ttl)):
+            if not token:
+                continue
+            try:
+                payload = self._load(serializer, token, ttl)
+            except TokenError:
+                continue
+            if self.db.session.get(self.model, payload["jti"]) is None:
+                self._revoke(payload["jti"], kind, ttl)
+        try:
+            self.db.session.commit()
+        except IntegrityError:
+            # Revoked concurrently; either way the token is now revoked.
+            self.db.session.rollback()
+        self._synced_at = 0.0
+
+    def _revoke(self, jti, kind, ttl):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        self.db.session.add(self.model(jti=jti, kind=kind, expires_at=expires_at))
+
+    def _sync_revoked(self):
+        if time.monotonic() - self._synced_at < self.revocation_sync:
+            return
+        with self._sync_lock:
+            if time.monotonic() - self._synced_at < self.revocation_sync:
+                return
+            now = datetime.now(timezone.utc)
+            self.model.query.filter(self.model.expires_at < now).delete()
+            self.db.session.commit()
+            self._revoked = frozenset(jti for (jti,) in self.db.session.query(self.model.jti).filter(
+                self.model.kind == ACCESS))
+            self._synced_at = time.monotonic()
@@ -0,0 +1,121 @@
+"""Walk-forward backtest of the ``optimize_portfolio`` weights.
+
+On the first trading day of every month the portfolio is re-optimized on
+the trailing ``window`` daily returns, using the same penalised Sharpe
+objective as ``market.optimize_portfolio``, and held buy-and-hold until the
+next rebalance. An equal-weight portfolio rebalanced on the same days is the
+benchmark.
+
+The window's return sums and cross-product sums are updated incrementally:
+each step adds the rows that entered the window and subtracts the rows that
+left it, so a step costs O(days stepped x assets^2) rather than
+O(window x assets^2). Every optimization starts from the previous step's
+weights and uses the analytic gradient. An asset joins once it has prices
+for a whole window.
+"""
+import numpy as np
+from scipy.optimize import minimize
+
+TRADING_DAYS = 252
+
+
+def _objective(weights, annual_returns, cov, risk_free_rate):
+    risk = np.sqrt(weights @ cov @ weights)
+    excess = weights @ annual_returns - risk_free_rate
+    value = -excess / risk + weights @ weights
+    grad = -annual_returns / risk + excess * (cov @ weights) / risk ** 3 + 2 * weights
+    return value, grad
+
+
+def optimal_weights(annual_returns, cov, risk_free_rate, start):
+    """Penalised max-Sharpe weights (long-only, fully invested), starting from ``start``."""
+    result = minimize(
+        _objective, start, args=(annual_returns, cov, risk_free_rate), jac=True, method="SLSQP",
+        bounds=[(0, 1)] * len(start),
+        constraints=[{"type": "eq", "fun": lambda w: w.sum() - 1, "jac": lambda w: np.ones_like(w)}],
+    )
+    return result.x if result.success else start
+
+
+def _metrics(values, risk_free_rate):
+    daily = values[1:] / values[:-1] - 1
+    years = len(daily) / TRADING_DAYS
+    cagr = (values[-1] / values[0]) ** (1 / years) - 1 if years else 0.0
+    volatility = float(daily.std(ddof=1) * np.sqrt(TRADING_DAYS)) if len(daily) > 1 else 0.0
+    drawdown = values / np.maximum.accumulate(values) - 1
+    return {
+        "total_return": float(values[-1] / values[0] - 1),
+        "cagr": float(cagr),
+        "volatility": volatility,
+        "max_drawdown": float(drawdown.min()),
+        "sharpe": float((cagr - risk_free_rate) / volatility) if volatility else None,
+    }
+
+
+def walk_forward(dates, prices, tickers, risk_free_rate, window=3 * TRADING_DAYS):
+    """Backtest monthly re-optimization; ``prices`` is days x assets with NaN before listing."""
+    dates = list(dates)
+    prices = np.asarray(prices, dtype=float)
+    if not 2 <= window < len(prices) - 1:
+        raise ValueError(f"window must be between 2 and {len(prices) - 2} days for this price history")
+    # Carry prices over holidays on one exchange but not another; NaNs before listing stay.
+    for j in range(1, len(prices)):
+        gaps = np.isnan(prices[j])
+        prices[j, gaps] = prices[j - 1, gaps]
+
+    # returns[t] is the return from day t to day t + 1.
+    returns = prices[1:] / prices[:-1] - 1
+    listed = ~np.isnan(returns)
+    returns = np.where(listed, returns, 0.0)
+    listed_days = np.vstack([np.zeros(len(tickers), dtype=int), np.cumsum(listed, axis=0)])
+
+    months = [d[:7] for d in dates]
+    rebalances = [t for t in range(window, len(prices) - 1) if months[t] != months[t - 1]]
+    if not rebalances:
+        raise ValueError("Not enough price history for one backtest window")
+    rebalances.append(len(prices) - 1)
+
+    n_assets = len(tickers)
+    sums = np.zeros(n_assets)
+    cross = np.zeros((n_assets, n_assets))
+    low = high = 0
+    previous = np.full(n_assets, 1.0 / n_assets)
+    values = {"optimized": [1.0], "equal_weight": [1.0]}
+    history = []
+
+    for t, until in zip(rebalances, rebalances[1:]):
+        # Slide the window to returns[t - window:t].
+        entering, leaving = returns[high:t], returns[low:t - window]
+        sums += entering.sum(axis=0) - leaving.sum(axis=0)
+        cross += entering.T @ entering - leaving.T @ leaving
+        low, high = t - window, t
+
+        eligible = (listed_days[t] - listed_days[t - window]) == window
+        if not eligible.any():
+            # Nothing has a full window yet: hold cash until the next rebalance.
+            for name in values:
+                values[name].extend([values[name][-1]] * (until - t))
+            continue
+        mean = sums[eligible] / window
+        cov = (cross[np.ix_(eligible, eligible)] - window * np.outer(mean, mean)) / (window - 1)
+        start = previous[eligible]
+        start = start / start.sum() if start.sum() > 0 else np.full(eligible.sum(), 1.0 / eligible.sum())
+        weights = np.zeros(n_assets)
+        weights[eligible] = optimal_weights((1 + mean) ** TRADING_DAYS - 1, cov * TRADING_DAYS,
+                                            risk_free_rate, start)
+        equal = eligible / eligible.sum()
+        previous = weights
+        history.append({"date": dates[t], "weights": dict(zip(tickers, weights.round(4).tolist()))})
+
+        growth = prices[t + 1:until + 1, eligible] / prices[t, eligible]
+        for name, w in (("optimized", weights), ("equal_weight", equal)):
+            values[name].extend((values[name][-1] * (growth @ w[eligible])).tolist())
+
+    return {
+        "start": dates[rebalances[0]],
+        "end": dates[rebalances[-1]],
+        "window_days": window,
+        "rebalances": len(history),
+        "strategies": {name: _metrics(np.array(v), risk_free_rate) for name, v in values.items()},
+        "weights": history,
+    }
@@ -0,0 +1,72 @@
+"""Walk-forward backtest: wall time and incremental-statistics accuracy.
+
+Runs ``backtest.walk_forward`` on seeded fake price histories (one asset
+listing partway through) and checks every step's rolling mean and
+covariance against a direct recompute over the same window. Exits 1 if
+the run takes longer than ``--budget`` seconds or the statistics drift.
+
+    python bench/backtest_speed.py --years 15 --budget 1.0
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backtest  # noqa: E402
+from fakes import price_history  # noqa: E402
+from market import TICKERS  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=15)
+    parser.add_argument("--budget", type=float, default=1.0)
+    args = parser.parse_args()
+
+    end = date.today()
+    start = date(end.year - args.years, end.month, 1)
+    histories = [price_history(ticker, start, end) for ticker in TICKERS]
+    dates = histories[0]["dates"]
+    prices = np.array([h["close"] for h in histories]).T
+    prices[:len(prices) // 4, -1] = np.nan
+
+    steps = []
+    optimal_weights = backtest.optimal_weights
+
+    def record(annual_returns, cov, risk_free_rate, start):
+        steps.append((annual_returns, cov))
+        return optimal_weights(annual_returns, cov, risk_free_rate, start)
+
+    began = time.perf_counter()
+    report = backtest.walk_forward(dates, prices, TICKERS, 0.06)
+    seconds = time.perf_counter() - began
+
+    backtest.optimal_weights = record
+    backtest.walk_forward(dates, prices, TICKERS, 0.06)
+    backtest.optimal_weights = optimal_weights
+    window = 3 * backtest.TRADING_DAYS
+    returns = prices[1:] / prices[:-1] - 1
+    months = [d[:7] for d in dates]
+    rebalances = [t for t in range(window, len(prices) - 1) if months[t] != months[t - 1]]
+    error = 0.0
+    for (annual_returns, cov), t in zip(steps, rebalances):
+        block = returns[t - window:t]
+        block = block[:, ~np.isnan(block).any(axis=0)]
+        error = max(error,
+                    np.abs(np.cov(block.T) * backtest.TRADING_DAYS - cov).max(),
+                    np.abs((1 + block.mean(axis=0)) ** backtest.TRADING_DAYS - 1 - annual_returns).max())
+
+    result = {"days": len(dates), "rebalances": report["rebalances"], "seconds": round(seconds, 3),
+              "max_stat_error": error, "strategies": report["strategies"]}
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if seconds <= args.budget and error < 1e-9 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Burst check: concurrent identical requests make one upstream call per key.
+
+Fires ``--clients`` simultaneous ``/calculate`` requests with the same
+``riskFreeRate`` and the same number of ``/generate-quiz/1`` requests
+against the fake services, then prints how many upstream calls each service
+received. With single-flight coalescing a burst costs one download (one
+yahoo call per ticker), one fred call and one gemini call for the one-chunk
+chapter; the script exits 1 if any service received more than that.
+
+    python bench/burst.py --clients 20 --latency yahoo=1
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import FakeServices, install_clients, parse_latency  # noqa: E402
+
+# Distinct sentences, so the fake LLM's questions survive deduplication.
+LESSON = " ".join(f"Split {need} from {want} before saving for {goal}." for need, want, goal in zip(
+    ("rent", "groceries", "insurance", "transport", "utilities", "tuition"),
+    ("concerts", "gadgets", "takeaways", "holidays", "fashion", "gaming"),
+    ("retirement", "emergencies", "housing", "education", "travel", "weddings")))
+
+
+def burst(app, requests, clients):
+    barrier = threading.Barrier(clients)
+    statuses = []
+
+    def client(i):
+        method, path, body = requests[i % len(requests)]
+        test_client = app.test_client()
+        barrier.wait()
+        response = test_client.open(path, method=method, json=body)
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--latency", action="append", metavar="SERVICE=SECONDS")
+    args = parser.parse_args()
+
+    services = FakeServices(latency=parse_latency(args.latency)).start()
+    install_clients(services.url)
+    workdir = tempfile.mkdtemp()
+    os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(workdir, "burst.db"))
+    os.environ["RAPID_API_URL"] = services.url + "/prices"
+    os.environ.setdefault("RAPID_API_KEY", "bench")
+    os.environ.setdefault("GEMINI_API_KEY", "bench")
+    os.environ.setdefault("SECRET_KEY", "bench")
+
+    from app import create_app
+    from market import TICKERS
+    from extensions import db
+    from models import Chapter, Lesson
+
+    app = create_app(["analytics", "ai"], {"SINGLEFLIGHT_DIR": os.path.join(workdir, "singleflight")})
+    with app.app_context():
+        db.create_all()
+        chapter = Chapter(title="Budgeting")
+        db.session.add(chapter)
+        db.session.flush()
+        db.session.add(Lesson(chapter_id=chapter.chapter_id, title="Needs and wants",
+                              content=LESSON))
+        db.session.commit()
+
+    calculate = {"monthly_investment": 5000, "growth_rate": 5, "riskFreeRate": 0.06,
+                 "goals": [{"target": 1000000, "years": 10}]}
+    report = {}
+    for name, request, limit in (
+        ("calculate", ("POST", "/calculate", calculate), {"yahoo": len(TICKERS), "fred": 1}),
+        ("generate_quiz", ("POST", "/generate-quiz/1", None), {"gemini": 1}),
+    ):
+        before = dict(services.counts)
+        statuses = burst(app, [request], args.clients)
+        calls = {service: services.counts[service] - before[service] for service in limit}
+        report[name] = {"requests": len(statuses), "errors": sum(s != 200 for s in statuses),
+                        "upstream_calls": calls, "limit": limit}
+    services.stop()
+
+    print(json.dumps(report, indent=2))
+    failed = any(item["errors"] or any(item["upstream_calls"][s] > n for s, n in item["limit"].items())
+                 for item in report.values())
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
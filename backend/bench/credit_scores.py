@@ -0,0 +1,148 @@
+"""Credit scores: bulk recompute throughput and incremental/bulk agreement.
+
+Generates ``--users`` users (bench/dataset.py) and times a full
+``credit.recompute``. It then writes through the app for ``--writes``
+random users (/add_goal, /update-user-job, rent changes, ORM salary
+transactions, goal and ledger edits, moves and deletes, new users from
+/register and one /update_balances over everyone), drains the pending
+background rescores and checks that the scores and the running
+``credit_stats`` totals match a fresh recompute. Finally it compacts every ledger row but each user's
+newest into ``account_log_monthly`` and checks that a recompute still
+agrees. A second app is built first, as a test or CLI would, to check that
+the session hooks are registered once. Exits 1 on any mismatch.
+
+    python bench/credit_scores.py --users 100000 --chunk-size 10000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+workdir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(workdir, "bench.db"))
+os.environ.setdefault("SECRET_KEY", "bench")
+
+import dataset  # noqa: E402
+import ledgerarchive  # noqa: E402
+from app import app, create_app  # noqa: E402
+from credit import STAT_FIELDS  # noqa: E402
+from extensions import credit_engine, db  # noqa: E402
+from models import (  # noqa: E402
+    AccountLog, AccountLogMonthly, CreditStats, Goal, SalaryTransaction, TransactionType, User,
+)
+
+
+def edit(user_id, rng):
+    """Change, move or delete the user's bench goal and edit a ledger row through the ORM."""
+    goal = db.session.execute(db.select(Goal).filter_by(user_id=user_id, goal_name="Bench")).scalars().first()
+    action = rng.choice(("amount", "unseen", "move", "delete"))
+    if action == "amount":
+        goal.amount = rng.randrange(10000, 900000)
+    elif action == "unseen":
+        # Overwrite a value the session never loaded, so the delta cannot know what it replaced.
+        db.session.expire(goal, ["amount"])
+        goal.amount = rng.randrange(10000, 900000)
+    elif action == "move":
+        goal.user_id = rng.randrange(1, user_id + 1)
+    else:
+        db.session.delete(goal)
+    log = db.session.execute(db.select(AccountLog).filter_by(user_id=user_id)).scalars().first()
+    if log is not None:
+        log.balance = -(log.balance or 0) - 1
+    db.session.commit()
+
+
+def state():
+    scores = dict(db.session.execute(db.select(User.user_id, User.credit_score)).all())
+    stats = {row.user_id: tuple(getattr(row, f) for f in STAT_FIELDS)
+             for row in db.session.execute(db.select(CreditStats)).scalars()}
+    db.session.remove()
+    return scores, stats
+
+
+def compare(before, after):
+    scores = sum(before[0][k] != after[0].get(k) for k in before[0])
+    drift = max((abs(a - b) / max(abs(b), 1.0)
+                 for k, row in before[1].items() for a, b in zip(row, after[1].get(k, (0,) * len(row)))),
+                default=0.0)
+    return scores, drift
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    create_app()
+    with app.app_context():
+        dataset.generate(users=args.users, logs_per_user=12, transactions_per_user=6)
+        bulk = credit_engine.recompute(args.chunk_size)
+        db.session.remove()
+
+    client = app.test_client()
+    for user_id in rng.sample(range(1, args.users + 1), args.writes):
+        client.post("/add_goal", json={"user_id": user_id, "goal_name": "Bench", "year_of_completion": 2035,
+                                       "amount": rng.randrange(10000, 900000)})
+        client.post("/update-user-job", json={"user_id": user_id, "salary": rng.randrange(20000, 200000),
+                                              "rent": rng.randrange(5000, 60000)})
+        client.put(f"/user/{user_id}/update_rent", json={"rent": rng.randrange(5000, 90000)})
+        with app.app_context():
+            db.session.add(SalaryTransaction(user_id=user_id, amount=rng.randrange(1000, 90000),
+                                             type=rng.choice(list(TransactionType)),
+                                             timestamp=datetime.now(timezone.utc)))
+            db.session.commit()
+            edit(user_id, rng)
+    for i in range(args.writes // 10):
+        client.post("/register", json={"username": f"bench-new-{i}", "password": "bench", "email": f"new{i}@bench",
+                                       "location": "Delhi"})
+        with app.app_context():
+            user_id = db.session.execute(db.select(User.user_id).filter_by(username=f"bench-new-{i}")).scalar_one()
+        client.post("/add_goal", json={"user_id": user_id, "goal_name": "Bench", "year_of_completion": 2035,
+                                       "amount": rng.randrange(10000, 900000)})
+    client.post("/update_balances")
+
+    with app.app_context():
+        pending = credit_engine.pending()
+        began = time.perf_counter()
+        credit_engine.flush()
+        rescore_seconds = time.perf_counter() - began
+        incremental = state()
+        credit_engine.recompute(args.chunk_size)
+        recomputed = state()
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None)
+        compacted = ledgerarchive.compact(db, AccountLog, AccountLogMonthly, cutoff,
+                                          os.path.join(workdir, "archive"), batch_size=5000, pause=0)
+        credit_engine.recompute(args.chunk_size)
+        after_compaction = state()
+
+    score_mismatches, stat_drift = compare(incremental, recomputed)
+    compact_mismatches, compact_drift = compare(recomputed, after_compaction)
+    scores = sorted(recomputed[0].values())
+    result = {
+        "users": args.users,
+        "recompute_seconds": bulk["seconds"],
+        "users_per_second": bulk["users_per_second"],
+        "pending_rescores": pending,
+        "rescore_seconds": round(rescore_seconds, 3),
+        "incremental_vs_bulk_score_mismatches": score_mismatches,
+        "incremental_vs_bulk_max_stat_drift": stat_drift,
+        "archived_rows": compacted["archived"],
+        "after_compaction_score_mismatches": compact_mismatches,
+        "after_compaction_max_stat_drift": compact_drift,
+        "score_p10_p50_p90": [scores[len(scores) // 10], scores[len(scores) // 2], scores[9 * len(scores) // 10]],
+    }
+    print(json.dumps(result, indent=2))
+    ok = not score_mismatches and not compact_mismatches and max(stat_drift, compact_drift) < 1e-9
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Seeded synthetic dataset for benchmarks and plan checks.
+
+``generate()`` drops and recreates every table, then bulk-inserts users,
+goals, chapters, lessons, quizzes, account logs, salary transactions,
+progress rows and city costs. The same arguments always produce the same
+rows, so numbers from different runs are comparable. Every user's password
+is ``PASSWORD``.
+
+    python bench/dataset.py --users 20000       # fill DATABASE_URL and print counts
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, text  # noqa: E402
+
+from app import app  # noqa: E402
+from extensions import auth, db  # noqa: E402
+from models import (  # noqa: E402
+    User, Goal, Chapter, Lesson, Quiz, AccountLog, SalaryTransaction,
+    UserCurrentProgress, TransactionType, CityCost,
+)
+
+PASSWORD = "bench-password"
+
+CITIES = ["Delhi", "Mumbai", "Bengaluru", "Chennai", "Kolkata", "Hyderabad", "Pune", "Kochi",
+          "Jaipur", "Ahmedabad", "Lucknow", "Chandigarh", "Indore", "Bhopal", "Nagpur", "Surat"]
+
+_WORDS = ("budget savings interest inflation portfolio credit income expense emergency "
+          "compound diversify insurance mortgage equity bonds liquidity pension salary "
+          "retirement dividend").split()
+
+
+def lesson_text(rnd, sentences=12):
+    """A few sentences of finance-flavoured filler, long enough for quiz generation."""
+    out = []
+    for _ in range(sentences):
+        words = rnd.sample(_WORDS, 6)
+        out.append(f"A good {words[0]} plan keeps {words[1]} and {words[2]} ahead of "
+                   f"{words[3]}, while {words[4]} protects {words[5]}.")
+    return " ".join(out)
+
+
+def quiz_questions(rnd, count=5):
+    return [{
+        "question": f"Which term best describes {rnd.choice(_WORDS)}?",
+        "options": rnd.sample(_WORDS, 4),
+        "answer": rnd.choice("ABCD"),
+    } for _ in range(count)]
+
+
+def generate(users=1000, goals_per_user=3, chapters=20, lessons_per_chapter=10,
+             logs_per_user=4, transactions_per_user=6, seed=7, batch_size=10000):
+    """Replace the database contents with a deterministic dataset; returns row counts."""
+    db.drop_all()
+    db.create_all()
+    rnd = random.Random(seed)
+    now = datetime(2026, 1, 1)
+    password = auth.hash_password(PASSWORD)
+
+    db.session.execute(insert(Chapter), [{"title": f"Chapter {c}"} for c in range(chapters)])
+    db.session.execute(insert(Lesson), [
+        {"chapter_id": c + 1, "title": f"Lesson {c}.{i}", "content": lesson_text(rnd)}
+        for c in range(chapters) for i in range(lessons_per_chapter)])
+    db.session.execute(insert(Quiz), [
+        {"chapter_id": c + 1, "questions": quiz_questions(rnd)} for c in range(chapters)])
+    db.session.execute(insert(CityCost), [{
+        "city_name": name,
+        "rent_min": 5000 + i * 700, "rent_max": 12000 + i * 1500,
+        "salary_min": 20000 + i * 2500, "salary_max": 60000 + i * 6000,
+        "last_updated": now,
+    } for i, name in enumerate(CITIES)])
+
+    for start in range(0, users, batch_size):
+        batch = range(start, min(users, start + batch_size))
+        db.session.execute(insert(User), [{
+            "username": f"user{i}", "password": password, "email": f"user{i}@example.com",
+            "location": rnd.choice(CITIES), "experience_points": rnd.randint(0, 100000),
+            "salary": rnd.randrange(20000, 200000, 500), "rent": rnd.randrange(5000, 60000, 500),
+            "account_balance": rnd.randrange(0, 500000, 100), "created_at": now,
+        } for i in batch])
+        db.session.execute(insert(Goal), [{
+            "user_id": i + 1, "goal_name": f"Goal {j}", "year_of_completion": 2027 + rnd.randint(0, 20),
+            "amount": rnd.randrange(50000, 5000000, 1000),
+        } for i in batch for j in range(goals_per_user)])
+        db.session.execute(insert(AccountLog), [{
+            "user_id": i + 1, "balance": float(rnd.randrange(0, 500000, 100)),
+            "last_updated": now - timedelta(days=30 * j),
+        } for i in batch for j in range(logs_per_user)])
+        db.session.execute(insert(SalaryTransaction), [{
+            "user_id": i + 1, "amount": rnd.randrange(20000, 200000, 500),
+            "type": TransactionType.EARNING if j % 3 else TransactionType.DEDUCTION,
+            "timestamp": now - timedelta(days=30 * j),
+        } for i in batch for j in range(transactions_per_user)])
+        db.session.execute(insert(UserCurrentProgress), [{
+            "user_id": i + 1, "current_chapter_id": 1 + i % chapters,
+            "current_lesson_id": 1 + (i % chapters) * lessons_per_chapter,
+        } for i in batch if i % 2 == 0])
+    db.session.commit()
+    db.session.execute(text("ANALYZE"))
+    db.session.commit()
+    return {
+        "users": users, "goals": users * goals_per_user, "chapters": chapters,
+        "lessons": chapters * lessons_per_chapter, "quizzes": chapters,
+        "account_logs": users * logs_per_user, "transactions": users * transactions_per_user,
+        "cities": len(CITIES),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--goals", type=int, default=3)
+    parser.add_argument("--chapters", type=int, default=20)
+    parser.add_argument("--lessons", type=int, default=10)
+    parser.add_argument("--logs", type=int, default=4)
+    parser.add_argument("--transactions", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    with app.app_context():
+        print(generate(args.users, args.goals, args.chapters, args.lessons,
+                       args.logs, args.transactions, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Local stand-in for the RapidAPI /prices endpoint.
+
+    python bench/fake_prices.py --port 8765 --latency 0.05 --error-rate 0.02
+
+Point the app or populate.py at it with RAPID_API_URL=http://127.0.0.1:8765/prices
+(and any non-empty RAPID_API_KEY).
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def city_prices(city_name):
+    """Deterministic, plausible price data for any city name."""
+    seed = int(hashlib.md5(city_name.lower().encode()).hexdigest()[:8], 16)
+    rent = 5000 + seed % 20000
+    salary = 20000 + seed % 80000
+    return {"prices": [
+        {"item_name": "One bedroom apartment outside of city centre", "min": rent, "max": rent * 2},
+        {"item_name": "Three bedroom apartment outside of city centre", "min": rent * 2, "max": rent * 4},
+        {"item_name": "Average Monthly Net Salary, After Tax", "min": salary, "max": salary * 3},
+    ]}
+
+
+def make_handler(latency=0.0, error_rate=0.0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            if error_rate and random.random() < error_rate:
+                self._send(503, {"message": "Service unavailable"})
+                return
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+            city = query.get("city_name", [""])[0]
+            if not city:
+                self._send(400, {"message": "city_name is required"})
+                return
+            self._send(200, city_prices(city))
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def serve(port=0, latency=0.0, error_rate=0.0):
+    """Start the server on a daemon thread and return it; ``server.server_port`` has the port."""
+    server = FakeServer(("127.0.0.1", port), make_handler(latency, error_rate))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake RapidAPI cost-of-living server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = FakeServer(("127.0.0.1", args.port), make_handler(args.latency, args.error_rate))
+    print(f"Serving fake prices on http://127.0.0.1:{args.port}/prices")
+    server.serve_forever()
@@ -0,0 +1,263 @@
+"""Local fakes for every external service the app calls.
+
+One threaded HTTP server answers for Yahoo Finance, FRED, RapidAPI, OpenAI
+and Gemini, each with its own artificial latency. Responses are derived
+from the request (a hash of the ticker, city or prompt), so repeated runs
+see identical data.
+
+The RapidAPI client in citydata.py takes its URL from ``RAPID_API_URL``. The
+other SDKs hardcode their hosts, so ``install_clients()`` registers small
+stand-in ``yfinance``, ``pandas_datareader``, ``openai`` and
+``google.generativeai`` modules that make the same calls over HTTP to this
+server. Call it before the app first imports them.
+
+    python bench/fakes.py --port 8770 --latency gemini=1.5
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import types
+import urllib.parse
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_prices import FakeServer, city_prices  # noqa: E402
+
+# Seconds added to every response, per service.
+DEFAULT_LATENCY = {"yahoo": 0.2, "fred": 0.15, "rapidapi": 0.1, "openai": 0.5, "gemini": 0.8}
+
+
+def _seed(text):
+    return int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+
+
+def price_history(ticker, start, end):
+    """Business-day closing prices as a seeded random walk."""
+    rnd = random.Random(_seed(ticker))
+    price = 50 + rnd.random() * 950
+    drift, vol = 0.0004 + rnd.random() * 0.0004, 0.008 + rnd.random() * 0.01
+    dates, closes = [], []
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            price *= math.exp(drift + vol * rnd.gauss(0, 1))
+            dates.append(day.isoformat())
+            closes.append(round(price, 4))
+        day += timedelta(days=1)
+    return {"dates": dates, "close": closes}
+
+
+def inflation_series(series_id, start, end):
+    rnd = random.Random(_seed(series_id))
+    years = range(start.year, end.year + 1)
+    return {"dates": [f"{y}-01-01" for y in years], "values": [round(3 + rnd.random() * 5, 2) for _ in years]}
+
+
+def chat_completion(messages):
+    question = messages[-1]["content"] if messages else ""
+    answer = (f"Here is a general view on '{question[:60]}': keep an emergency fund, "
+              "pay off high-interest debt first and invest regularly.")
+    return {
+        "id": f"chatcmpl-{_seed(question):08x}",
+        "object": "chat.completion",
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": answer}}],
+    }
+
+
+def gemini_content(prompt):
+    from quizgen import FakeLLM
+    return {"candidates": [{"content": {"parts": [{"text": FakeLLM()(prompt)}], "role": "model"}}]}
+
+
+def _date(value):
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+class FakeServices:
+    """The fake server plus per-service latency and request counts."""
+
+    def __init__(self, port=0, latency=None):
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.counts = {name: 0 for name in self.latency}
+        self._lock = threading.Lock()
+        self.server = FakeServer(("127.0.0.1", port), self._handler())
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="fake-services", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _hit(self, service):
+        with self._lock:
+            self.counts[service] += 1
+        if self.latency.get(service):
+            time.sleep(self.latency[service])
+
+    def _handler(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parsed = urllib.parse.urlparse(self.path)
+                query = {k: v[0] for k, v in urllib.parse.parse_qs(parsed.query).items()}
+                if parsed.path == "/prices":
+                    services._hit("rapidapi")
+                    if not query.get("city_name"):
+                        return self._send(400, {"message": "city_name is required"})
+                    return self._send(200, city_prices(query["city_name"]))
+                if parsed.path == "/yahoo/chart":
+                    services._hit("yahoo")
+                    return self._send(200, price_history(query["ticker"], _date(query["start"]), _date(query["end"])))
+                if parsed.path == "/fred/series":
+                    services._hit("fred")
+                    return self._send(200, inflation_series(query["id"], _date(query["start"]), _date(query["end"])))
+                self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path == "/openai/v1/chat/completions":
+                    services._hit("openai")
+                    return self._send(200, chat_completion(body.get("messages", [])))
+                if re.match(r"^/gemini/v1beta/models/[^/:]+:generateContent$", self.path):
+                    services._hit("gemini")
+                    prompt = "".join(part.get("text", "") for content in body.get("contents", [])
+                                     for part in content.get("parts", []))
+                    return self._send(200, gemini_content(prompt))
+                self._send(404, {"error": "not found"})
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def install_clients(base_url):
+    """Register SDK stand-ins that call the fake server at ``base_url``."""
+    import pandas as pd
+
+    http = requests.Session()
+
+    def get(path, **params):
+        response = http.get(base_url + path, params=params, timeout=60)
+        response.raise_for_status()
+        return response.json()
+
+    def post(path, payload):
+        response = http.post(base_url + path, json=payload, timeout=60)
+        response.raise_for_status()
+        return response.json()
+
+    def _day(value):
+        return value if isinstance(value, str) else value.strftime("%Y-%m-%d")
+
+    # yfinance.download(tickers, start, end)["Close"]
+    def download(tickers, start=None, end=None, **kwargs):
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        end = end or date.today().isoformat()
+        frames = {}
+        for ticker in tickers:
+            data = get("/yahoo/chart", ticker=ticker, start=_day(start), end=_day(end))
+            frames[("Close", ticker)] = pd.Series(data["close"], index=pd.to_datetime(data["dates"]))
+        return pd.DataFrame(frames)
+
+    yfinance = types.ModuleType("yfinance")
+    yfinance.download = download
+
+    # pandas_datareader.data.DataReader(name, "fred", start, end)
+    def data_reader(name, data_source=None, start=None, end=None, **kwargs):
+        data = get("/fred/series", id=name, start=_day(start), end=_day(end or date.today()))
+        return pd.DataFrame({name: data["values"]}, index=pd.to_datetime(data["dates"]))
+
+    datareader = types.ModuleType("pandas_datareader")
+    datareader.data = types.ModuleType("pandas_datareader.data")
+    datareader.data.DataReader = data_reader
+
+    # openai.OpenAI(api_key=...).chat.completions.create(model=..., messages=[...])
+    class OpenAI:
+        def __init__(self, api_key=None, **kwargs):
+            self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+
+        def _create(self, model, messages, **kwargs):
+            data = post("/openai/v1/chat/completions", {"model": model, "messages": messages})
+            return types.SimpleNamespace(choices=[
+                types.SimpleNamespace(message=types.SimpleNamespace(**choice["message"]))
+                for choice in data["choices"]])
+
+    openai = types.ModuleType("openai")
+    openai.OpenAI = OpenAI
+
+    # google.generativeai.GenerativeModel(name).generate_content(prompt).text
+    class GenerativeModel:
+        def __init__(self, model_name, **kwargs):
+            self.model_name = model_name
+
+        def generate_content(self, prompt, **kwargs):
+            data = post(f"/gemini/v1beta/models/{self.model_name}:generateContent",
+                        {"contents": [{"parts": [{"text": prompt}]}]})
+            return types.SimpleNamespace(text=data["candidates"][0]["content"]["parts"][0]["text"])
+
+    genai = types.ModuleType("google.generativeai")
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = GenerativeModel
+    google = sys.modules.get("google") or types.ModuleType("google")
+    google.generativeai = genai
+
+    sys.modules.update({
+        "yfinance": yfinance,
+        "pandas_datareader": datareader,
+        "pandas_datareader.data": datareader.data,
+        "openai": openai,
+        "google": google,
+        "google.generativeai": genai,
+    })
+
+
+def parse_latency(values):
+    """``["gemini=1.5", "openai=0"]`` -> ``{"gemini": 1.5, "openai": 0.0}``."""
+    latency = {}
+    for value in values or []:
+        name, _, seconds = value.partition("=")
+        if name not in DEFAULT_LATENCY:
+            raise argparse.ArgumentTypeError(f"unknown service {name!r}; expected one of {sorted(DEFAULT_LATENCY)}")
+        latency[name] = float(seconds)
+    return latency
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Yahoo/FRED/RapidAPI/OpenAI/Gemini server")
+    parser.add_argument("--port", type=int, default=8770)
+    parser.add_argument("--latency", action="append", metavar="SERVICE=SECONDS")
+    args = parser.parse_args()
+    services = FakeServices(args.port, parse_latency(args.latency))
+    print(f"Serving fake services on {services.url} (RAPID_API_URL={services.url}/prices)")
+    services.server.serve_forever()
@@ -0,0 +1,47 @@
+"""Nightly goal-projection batch: throughput on a seeded dataset.
+
+Generates ``--users`` users with ``--goals-per-user`` goals each
+(bench/dataset.py), then times ``feasibility.refresh_projections`` against a
+fixed market snapshot, so no market data is fetched.
+
+    python bench/goal_batch.py --users 100000 --goals-per-user 10 --processes 4
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+os.environ.setdefault("SECRET_KEY", "bench")
+
+import dataset  # noqa: E402
+import feasibility  # noqa: E402
+from app import app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Goal, GoalProjection, User  # noqa: E402
+
+SNAPSHOT = {"as_of": date(2026, 1, 1), "expected_return": 0.11, "inflation_rate": 0.05, "salary_growth": 0.05}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--goals-per-user", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--processes", type=int, default=2)
+    args = parser.parse_args()
+
+    with app.app_context():
+        dataset.generate(users=args.users, goals_per_user=args.goals_per_user, chapters=1,
+                         lessons_per_chapter=1, logs_per_user=1, transactions_per_user=1)
+        report = feasibility.refresh_projections(db, User, Goal, GoalProjection, SNAPSHOT,
+                                                 chunk_size=args.chunk_size, processes=args.processes)
+        report["feasible"] = GoalProjection.query.filter_by(feasible=True).count()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Compare Flask's default JSON provider with FastJSONProvider on large payloads.
+
+    python bench/json_payloads.py --users 10000 --lessons 200
+"""
+import argparse
+import decimal
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from jsonprovider import FastJSONProvider, orjson  # noqa: E402
+
+
+def payloads(users, lessons):
+    return {
+        "/leaderboard": {"leaderboard": [
+            {"rank": i + 1, "username": f"user{i}", "experience_points": users - i}
+            for i in range(users)]},
+        "/lessons/<chapter_id>": [
+            {"lesson_id": i, "title": f"Lesson {i}", "content": "Compound interest grows savings. " * 150}
+            for i in range(lessons)],
+        "/fetch_goals (Decimal)": {"goals": [
+            {"goal_id": i, "goal_name": "House", "year_of_completion": 2035,
+             "amount": decimal.Decimal("2500000.00"), "created": datetime(2025, 1, 1)}
+            for i in range(users)]},
+    }
+
+
+def timeit(provider, obj, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        provider.response(obj).get_data()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--lessons", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    default, fast = DefaultJSONProvider(app), FastJSONProvider(app)
+    print(f"encoder: {'orjson' if orjson else 'stdlib json (orjson not installed)'}")
+    with app.app_context():
+        for name, obj in payloads(args.users, args.lessons).items():
+            before = timeit(default, obj, args.repeat)
+            after = timeit(fast, obj, args.repeat)
+            print(f"{name:28} default {before:8.2f} ms   fast {after:8.2f} ms   x{before / after:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
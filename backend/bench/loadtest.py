@@ -0,0 +1,260 @@
+"""Load test: p50/p95/p99 latency and throughput per endpoint.
+
+Generates a seeded dataset (bench/dataset.py), starts the fake external
+services (bench/fakes.py), serves the app on a local threaded WSGI server and
+drives each profile in ``PROFILES`` with a fixed number of concurrent
+clients. Request parameters come from a seeded RNG, so two runs with the
+same arguments send the same requests.
+
+    python bench/loadtest.py                                 # all profiles, print a table
+    python bench/loadtest.py --save bench/baseline.json      # record a baseline
+    python bench/loadtest.py --compare bench/baseline.json   # exit 1 if p95 regressed
+    python bench/loadtest.py --profiles dashboard,login --users 20000 --latency openai=1
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import FakeServices, install_clients, parse_latency  # noqa: E402
+
+# (name, build(rnd, scale) -> (method, path, json body), concurrent clients, requests)
+Profile = namedtuple("Profile", "name build concurrency requests")
+
+
+def _user(rnd, scale):
+    return rnd.randint(1, scale["users"])
+
+
+def _chapter(rnd, scale):
+    return rnd.randint(1, scale["chapters"])
+
+
+def _lesson(rnd, scale):
+    chapter = _chapter(rnd, scale)
+    lesson = (chapter - 1) * scale["lessons"] + rnd.randint(1, scale["lessons"])
+    return chapter, lesson
+
+
+PROFILES = [
+    Profile("chapters", lambda rnd, s: ("GET", "/chapters", None), 8, 400),
+    Profile("lessons", lambda rnd, s: ("GET", f"/lessons/{_chapter(rnd, s)}", None), 8, 400),
+    Profile("lesson", lambda rnd, s: ("GET", "/lesson/%d/%d" % _lesson(rnd, s), None), 8, 400),
+    Profile("leaderboard", lambda rnd, s: ("GET", "/leaderboard", None), 8, 200),
+    Profile("profile", lambda rnd, s: ("GET", f"/profile?user_id={_user(rnd, s)}", None), 8, 400),
+    Profile("dashboard", lambda rnd, s: ("GET", f"/dashboard/{_user(rnd, s)}", None), 8, 400),
+    Profile("fetch_goals", lambda rnd, s: ("GET", f"/fetch_goals?user_id={_user(rnd, s)}", None), 8, 400),
+    Profile("cities", lambda rnd, s: ("GET", "/cities", None), 8, 400),
+    Profile("city_cost", lambda rnd, s: ("GET", f"/city-cost?city={rnd.choice(s['cities'])}", None), 8, 400),
+    Profile("autocomplete", lambda rnd, s: (
+        "GET", f"/cities/autocomplete?q={rnd.choice(s['cities'])[:rnd.randint(1, 4)]}", None), 8, 400),
+    Profile("login", lambda rnd, s: ("POST", "/login", {
+        "username": f"user{_user(rnd, s) - 1}", "password": s["password"]}), 4, 100),
+    Profile("update_experience", lambda rnd, s: ("POST", "/update_experience", {
+        "user_id": _user(rnd, s), "points": rnd.randint(1, 50)}), 4, 200),
+    Profile("add_goal", lambda rnd, s: ("POST", "/add_goal", {
+        "user_id": _user(rnd, s), "goal_name": "Bench goal",
+        "year_of_completion": 2030 + rnd.randint(0, 10), "amount": rnd.randrange(10000, 1000000, 1000)}), 4, 200),
+    Profile("chat", lambda rnd, s: ("POST", "/chat", {
+        "message": rnd.choice(["How do I start a SIP?", "Is gold a good hedge?", "How much should I save?"])}), 4, 40),
+    Profile("generate_quiz", lambda rnd, s: ("POST", f"/generate-quiz/{_chapter(rnd, s)}", None), 2, 20),
+    Profile("calculate", lambda rnd, s: ("POST", "/calculate", {
+        "monthly_investment": rnd.randrange(2000, 50000, 500), "growth_rate": rnd.choice([0, 5, 10]),
+        "riskFreeRate": 0.065, "goals": [{"target": rnd.randrange(100000, 5000000, 10000),
+                                          "years": rnd.randint(3, 25)}]}), 2, 10),
+]
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run_profile(base_url, profile, scale, seed, requests_override=None):
+    import requests
+
+    rnd = random.Random(seed ^ zlib.crc32(profile.name.encode()))
+    total = requests_override or profile.requests
+    plan = [profile.build(rnd, scale) for _ in range(total + profile.concurrency)]
+    warmup, plan = plan[:profile.concurrency], plan[profile.concurrency:]
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+    position = iter(range(len(plan)))
+
+    def client():
+        session = requests.Session()
+        while True:
+            with lock:
+                i = next(position, None)
+            if i is None:
+                return
+            method, path, body = plan[i]
+            start = time.perf_counter()
+            try:
+                status = session.request(method, base_url + path, json=body, timeout=120).status_code
+            except requests.RequestException:
+                status = "error"
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    warm = requests.Session()
+    for method, path, body in warmup:
+        warm.request(method, base_url + path, json=body, timeout=120)
+
+    threads = [threading.Thread(target=client) for _ in range(profile.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(n for status, n in statuses.items() if status == "error" or status >= 400)
+    return {
+        "requests": len(latencies),
+        "concurrency": profile.concurrency,
+        "errors": errors,
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+        "rps": round(len(latencies) / duration, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Print p95 deltas against a baseline; return the names that regressed."""
+    regressed = []
+    print(f"\n{'profile':<18}{'base p95':>10}{'p95':>10}{'change':>9}")
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"{name:<18}{'-':>10}{result['p95_ms']:>10.1f}{'new':>9}")
+            continue
+        change = (result["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        worse = change > tolerance and result["p95_ms"] - base["p95_ms"] > min_delta_ms
+        if worse or result["errors"] > base["errors"]:
+            regressed.append(name)
+        print(f"{name:<18}{base['p95_ms']:>10.1f}{result['p95_ms']:>10.1f}{change:>+9.0%}"
+              f"{'  REGRESSED' if name in regressed else ''}")
+    return regressed
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", help="comma-separated subset of: " + ",".join(p.name for p in PROFILES))
+    parser.add_argument("--requests", type=int, help="override the request count of every profile")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--chapters", type=int, default=20)
+    parser.add_argument("--lessons", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--latency", action="append", metavar="SERVICE=SECONDS",
+                        help="fake service latency, e.g. openai=0.5 (repeatable)")
+    parser.add_argument("--save", metavar="PATH", help="write results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative p95 increase")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore p95 changes smaller than this")
+    args = parser.parse_args()
+
+    selected = PROFILES
+    if args.profiles:
+        names = set(args.profiles.split(","))
+        unknown = names - {p.name for p in PROFILES}
+        if unknown:
+            parser.error(f"unknown profiles: {', '.join(sorted(unknown))}")
+        selected = [p for p in PROFILES if p.name in names]
+
+    services = FakeServices(latency=parse_latency(args.latency)).start()
+    install_clients(services.url)
+    os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "load.db"))
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("API_KEY", "bench")
+    os.environ.setdefault("GEMINI_API_KEY", "bench")
+    os.environ["RAPID_API_URL"] = services.url + "/prices"
+    os.environ.setdefault("RAPID_API_KEY", "bench")
+    # Keep the city cache from refreshing the seeded rows in the middle of a run.
+    os.environ["CITY_MAX_AGE_DAYS"] = "36500"
+
+    from werkzeug.serving import make_server
+
+    from app import app
+    from dataset import CITIES, PASSWORD, generate
+
+    with app.app_context():
+        counts = generate(users=args.users, chapters=args.chapters,
+                          lessons_per_chapter=args.lessons, seed=args.seed)
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    server.request_queue_size = 256
+    threading.Thread(target=server.serve_forever, name="loadtest-app", daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    scale = {"users": args.users, "chapters": args.chapters, "lessons": args.lessons,
+             "cities": CITIES, "password": PASSWORD}
+    results = {}
+    print(f"{'profile':<18}{'reqs':>6}{'conc':>6}{'err':>5}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for profile in selected:
+        result = run_profile(base_url, profile, scale, args.seed, args.requests)
+        results[profile.name] = result
+        print(f"{profile.name:<18}{result['requests']:>6}{result['concurrency']:>6}{result['errors']:>5}"
+              f"{result['rps']:>9.1f}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}")
+    server.shutdown()
+
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+            "dataset": counts,
+            "seed": args.seed,
+            "fake_latency_seconds": services.latency,
+            "external_calls": services.counts,
+        },
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nSaved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressed = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressed:
+            print(f"\n{len(regressed)} profile(s) regressed: {', '.join(regressed)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
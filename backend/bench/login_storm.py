@@ -0,0 +1,69 @@
+"""Login-storm benchmark: CPU per authenticated request with and without tokens.
+
+"before" authenticates every call by re-posting credentials to /login (one
+PBKDF2 verification each); "after" logs in once and sends the bearer token
+to /profile. CPU is process time, so it counts hashing in the executor too.
+
+    python bench/login_storm.py --users 20 --requests 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from app import app  # noqa: E402
+from extensions import db  # noqa: E402
+
+
+def measure(func, n):
+    cpu, wall = time.process_time(), time.perf_counter()
+    for i in range(n):
+        func(i)
+    return {
+        "requests": n,
+        "cpu_ms_per_request": (time.process_time() - cpu) * 1000 / n,
+        "wall_ms_per_request": (time.perf_counter() - wall) * 1000 / n,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    creds = []
+    for i in range(args.users):
+        user = {"username": f"storm{i}", "password": f"pw-{i}", "email": f"storm{i}@example.com", "location": "Delhi"}
+        client.post("/register", json=user)
+        creds.append(user)
+
+    def relogin(i):
+        user = creds[i % len(creds)]
+        assert client.post("/login", json=user).status_code == 200
+
+    tokens = [client.post("/login", json=user).json["access_token"] for user in creds]
+    ids = [client.post("/login", json=user).json["user_id"] for user in creds]
+
+    def with_token(i):
+        k = i % len(creds)
+        response = client.get(f"/profile?user_id={ids[k]}", headers={"Authorization": f"Bearer {tokens[k]}"})
+        assert response.status_code == 200
+
+    print(json.dumps({
+        "before_relogin_each_call": measure(relogin, args.requests),
+        "after_bearer_token": measure(with_token, args.requests),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Progress write-behind: request latency, coalescing and flush correctness.
+
+Seeds a throwaway SQLite database and sends ``--users`` learners through
+``--steps`` /update-progress calls each. Every response must be visible
+to the next request at once. It then flushes and checks that
+``user_current_progress`` holds each learner's last position and that
+``progress_event`` holds every event exactly once, including after a
+repeated flush of the same events. Last, it buffers an event for a lesson
+that does not exist between two valid ones (foreign keys enforced) and
+checks that only that event is dead-lettered. Exits 1 on any mismatch.
+
+    python bench/progress_flush.py --users 50 --steps 20
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+workdir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(workdir, "progress.db"))
+os.environ.setdefault("PROGRESS_BUFFER_PATH", os.path.join(workdir, "buffer.db"))
+os.environ.setdefault("PROGRESS_FLUSH_INTERVAL", "3600")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from sqlalchemy import event, func, select  # noqa: E402
+
+from app import app  # noqa: E402
+from extensions import db, progress_buffer  # noqa: E402
+from models import Chapter, Lesson, ProgressEvent, User, UserCurrentProgress  # noqa: E402
+
+
+def seed(users, lessons):
+    db.create_all()
+    for c in range(lessons // 10 + 1):
+        chapter = Chapter(title=f"Chapter {c}")
+        db.session.add(chapter)
+        db.session.flush()
+        db.session.add_all(Lesson(chapter_id=chapter.chapter_id, title=f"Lesson {i}", content="...")
+                           for i in range(10))
+    db.session.add_all(User(username=f"user{i}", password="x", email=f"user{i}@example.com",
+                            location="Delhi") for i in range(users))
+    db.session.commit()
+    return [u for (u,) in db.session.execute(select(User.user_id))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--steps", type=int, default=20)
+    args = parser.parse_args()
+
+    statements = {"n": 0}
+    with app.app_context():
+        @event.listens_for(db.engine, "connect")
+        def foreign_keys(conn, _):
+            conn.execute("PRAGMA foreign_keys=ON")
+
+        user_ids = seed(args.users, args.steps)
+
+        @event.listens_for(db.engine, "before_cursor_execute")
+        def count(*_):
+            statements["n"] += 1
+
+    client = app.test_client()
+    expected, stale, latencies = {}, 0, []
+    for user_id in user_ids:
+        client.get(f"/user/progress/{user_id}")
+    for _ in range(args.steps):
+        for user_id in user_ids:
+            began = time.perf_counter()
+            moved = client.post(f"/update-progress/{user_id}").json
+            latencies.append(time.perf_counter() - began)
+            seen = client.get(f"/user/progress/{user_id}").json
+            stale += seen["current_lesson_id"] != moved["current_lesson_id"]
+            expected[user_id] = (moved["current_chapter_id"], moved["current_lesson_id"])
+    request_statements = statements["n"]
+
+    with app.app_context():
+        pending = progress_buffer.pending()
+        statements["n"] = 0
+        began = time.perf_counter()
+        flushed = progress_buffer.flush()
+        flush_seconds = time.perf_counter() - began
+        flush_statements = statements["n"]
+
+        # Replay a flushed event, as after a crash between commit and buffer delete.
+        last = db.session.execute(select(ProgressEvent).order_by(ProgressEvent.id.desc())).scalar()
+        conn = progress_buffer._connect()
+        conn.execute("INSERT INTO progress_event (event_id, user_id, kind, chapter_id, lesson_id, created_at) "
+                     "VALUES (?, ?, ?, ?, ?, ?)",
+                     (last.event_id, last.user_id, last.kind, last.chapter_id, last.lesson_id, time.time()))
+        conn.close()
+        progress_buffer.flush()
+
+        stored = {p.user_id: (p.current_chapter_id, p.current_lesson_id)
+                  for p in UserCurrentProgress.query.all()}
+        events = db.session.execute(select(func.count()).select_from(ProgressEvent)).scalar()
+
+        # A bad event must not hold back the good ones around it.
+        user_id, (chapter_id, lesson_id) = next(iter(expected.items()))
+        progress_buffer.record(user_id, "advance", chapter_id, lesson_id)
+        progress_buffer.record(user_id, "advance", chapter_id, 10 ** 9)
+        progress_buffer.record(user_id, "advance", chapter_id, lesson_id)
+        progress_buffer.flush()
+        dead_letters = progress_buffer.dead_letters()
+        after_bad = db.session.execute(select(func.count()).select_from(ProgressEvent)).scalar() - events
+        left = progress_buffer.pending()
+
+    latencies.sort()
+    result = {
+        "events": pending,
+        "flushed": flushed,
+        "history_rows": events,
+        "stale_reads": stale,
+        "positions_match": stored == expected,
+        "request_p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "request_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+        "db_statements_during_requests": request_statements,
+        "flush_seconds": round(flush_seconds, 3),
+        "flush_statements": flush_statements,
+        "dead_letters": dead_letters,
+        "flushed_around_bad_event": after_bad,
+        "left_buffered": left,
+    }
+    print(json.dumps(result, indent=2))
+    ok = (stale == 0 and stored == expected and flushed == pending == events
+          and dead_letters == 1 and after_bad == 2 and left == 0)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
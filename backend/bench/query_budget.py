@@ -0,0 +1,71 @@
+"""Fail if an endpoint issues more SQL statements than its budget.
+
+Seeds a throwaway SQLite database, calls each endpoint in ``BUDGETS``
+and counts statements with a SQLAlchemy cursor event. Exits non-zero on
+any regression so it can gate CI:
+
+    python bench/query_budget.py
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "budget.db"))
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from sqlalchemy import event  # noqa: E402
+
+from app import app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Goal, Chapter, Lesson, UserCurrentProgress  # noqa: E402
+
+# (method, path, max statements)
+BUDGETS = [
+    ("GET", "/dashboard/1", 2),
+]
+
+
+def seed():
+    db.create_all()
+    chapter = Chapter(title="Budgeting")
+    db.session.add(chapter)
+    db.session.flush()
+    lesson = Lesson(chapter_id=chapter.chapter_id, title="Intro", content="Spend less than you earn.")
+    db.session.add(lesson)
+    for i in range(50):
+        user = User(username=f"user{i}", password="x", email=f"user{i}@example.com",
+                    location="Delhi", experience_points=i * 10, salary=50000, rent=15000,
+                    account_balance=1000)
+        db.session.add(user)
+        db.session.flush()
+        for j in range(5):
+            db.session.add(Goal(user_id=user.user_id, goal_name=f"Goal {j}",
+                                year_of_completion=2030 + j, amount=100000))
+        db.session.add(UserCurrentProgress(user_id=user.user_id, current_chapter_id=chapter.chapter_id,
+                                           current_lesson_id=lesson.lesson_id))
+    db.session.commit()
+
+
+def main():
+    counter = {"n": 0}
+    with app.app_context():
+        seed()
+
+        @event.listens_for(db.engine, "before_cursor_execute")
+        def count(*args):
+            counter["n"] += 1
+
+    client = app.test_client()
+    failures = 0
+    for method, path, budget in BUDGETS:
+        counter["n"] = 0
+        response = client.open(path, method=method)
+        status = "ok" if counter["n"] <= budget and response.status_code < 400 else "FAIL"
+        failures += status == "FAIL"
+        print(f"{status:4} {method} {path}: {counter['n']} statements (budget {budget}), HTTP {response.status_code}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
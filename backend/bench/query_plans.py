@@ -0,0 +1,126 @@
+"""Query-plan regression check for hot endpoints.
+
+Seeds a large synthetic dataset, calls each endpoint in ``ENDPOINTS`` while
+recording the SQL it issues on the request's own thread (reads and writes),
+and EXPLAINs every statement. Exits non-zero if any endpoint answers with a
+non-2xx status (its plans would not cover the real path), if a statement
+scans a table sequentially that is not listed as allowed, or (on Postgres,
+where estimates exist) if the planner expects more rows than the endpoint's
+budget.
+
+    python bench/query_plans.py                        # throwaway SQLite file
+    DATABASE_URL=postgresql://... python bench/query_plans.py --users 200000
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "plans.db"))
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from sqlalchemy import event  # noqa: E402
+
+from app import app  # noqa: E402
+from extensions import db  # noqa: E402
+from dataset import generate  # noqa: E402
+
+# Tables small enough that a full scan is the right plan.
+SMALL_TABLES = {"chapter", "city_cost"}
+
+# (method, path, json body, tables allowed to be scanned, Postgres row budget)
+ENDPOINTS = [
+    ("GET", "/lessons/7", None, set(), 500),
+    ("GET", "/lesson/7/130", None, set(), 50),
+    ("GET", "/user/progress/42", None, set(), 50),
+    ("POST", "/update-progress/42", None, set(), 50),
+    ("POST", "/skip-to-next-chapter/43", None, set(), 50),
+    ("GET", "/profile?user_id=42", None, set(), 10),
+    ("GET", "/fetch_goals?user_id=42", None, set(), 100),
+    ("GET", "/dashboard/42", None, set(), 100),
+    ("POST", "/update_experience", {"user_id": 42, "points": 5}, set(), 10),
+    ("POST", "/add_goal", {"user_id": 42, "goal_name": "Car", "year_of_completion": 2030, "amount": 500000}, set(), 10),
+    ("GET", "/leaderboard", None, {"user"}, None),
+]
+
+
+def explain(conn, statement, params):
+    """Return (sequentially scanned tables, estimated rows or None, plan text)."""
+    if conn.dialect.name == "postgresql":
+        plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, params).scalar()
+        plan = plan[0]["Plan"] if isinstance(plan, list) else json.loads(plan)[0]["Plan"]
+        scans, stack = set(), [plan]
+        while stack:
+            node = stack.pop()
+            if node["Node Type"] == "Seq Scan":
+                scans.add(node["Relation Name"])
+            stack.extend(node.get("Plans", []))
+        return scans, plan.get("Plan Rows"), json.dumps(plan)
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, params).fetchall()
+    details = [row[-1] for row in rows]
+    tables = set(db.metadata.tables)
+    scans = set()
+    for detail in details:
+        # "SCAN user" is a full table scan; "SCAN user USING INDEX ..." walks an index.
+        match = re.match(r"SCAN (\w+)(?: AS \w+)?$", detail)
+        if match and match.group(1) in tables:
+            scans.add(match.group(1))
+    return scans, None, "; ".join(details)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--goals", type=int, default=3)
+    parser.add_argument("--chapters", type=int, default=40)
+    parser.add_argument("--lessons", type=int, default=20)
+    parser.add_argument("--logs", type=int, default=4)
+    args = parser.parse_args()
+
+    with app.app_context():
+        generate(users=args.users, goals_per_user=args.goals, chapters=args.chapters,
+                 lessons_per_chapter=args.lessons, logs_per_user=args.logs, transactions_per_user=1)
+        engine = db.engine
+
+    captured = []
+    # The test client runs each request on this thread; background threads (credit rescores,
+    # progress flushes) share the engine and must not be charged to the endpoint.
+    request_thread = threading.get_ident()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() != request_thread:
+            return
+        if re.match(r"\s*(SELECT|INSERT|UPDATE|DELETE)", statement, re.I):
+            # One plan covers an executemany; explain it with the first row's parameters.
+            captured.append((statement, parameters[0] if executemany else parameters))
+
+    client = app.test_client()
+    failures = errors = 0
+    for method, path, body, allowed, budget in ENDPOINTS:
+        captured.clear()
+        response = client.open(path, method=method, json=body)
+        statements = list(captured)
+        with engine.connect() as conn:
+            for statement, params in statements:
+                scans, rows, plan = explain(conn, statement, params)
+                bad = scans - allowed - SMALL_TABLES
+                over = budget is not None and rows is not None and rows > budget
+                if bad or over:
+                    failures += 1
+                    reason = f"seq scan on {', '.join(sorted(bad))}" if bad else f"~{rows} rows > {budget}"
+                    print(f"FAIL {method} {path}: {reason}\n     {' '.join(statement.split())}\n     {plan}")
+        ok = 200 <= response.status_code < 300
+        errors += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {method} {path}: "
+              f"{len(statements)} statements, HTTP {response.status_code}")
+    print(f"{failures} plan regressions, {errors} failed requests")
+    sys.exit(1 if failures or errors else 0)
+
+
+if __name__ == "__main__":
+    main()
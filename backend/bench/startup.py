@@ -0,0 +1,70 @@
+"""Measure cold import time and RSS of the app module.
+
+Each run imports the module in a fresh interpreter, so results reflect what a
+newly forked gunicorn worker pays. Run it on two revisions to compare:
+
+    python bench/startup.py --runs 10 > after.json
+    git stash && python bench/startup.py --runs 10 > before.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = [
+    "numpy", "pandas", "scipy.optimize", "yfinance", "pandas_datareader",
+    "openai", "google.generativeai", "psycopg2", "apscheduler",
+]
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    "import_seconds": elapsed,
+    "max_rss_mb": rss_kb / 1024,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+    "threads": __import__("threading").active_count(),
+}}))
+"""
+
+
+def run_once(module, cwd):
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///:memory:")
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=cwd, env=env, capture_output=True, text=True,
+    )
+    if out.returncode != 0:
+        raise SystemExit(out.stderr)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = [run_once(args.module, cwd) for _ in range(args.runs)]
+    times = sorted(s["import_seconds"] for s in samples)
+    print(json.dumps({
+        "module": args.module,
+        "runs": args.runs,
+        "import_seconds_median": statistics.median(times),
+        "import_seconds_min": times[0],
+        "import_seconds_max": times[-1],
+        "max_rss_mb_median": statistics.median(s["max_rss_mb"] for s in samples),
+        "heavy_modules_loaded": samples[0]["loaded"],
+        "threads_after_import": samples[0]["threads"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
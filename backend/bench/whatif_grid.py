@@ -0,0 +1,121 @@
+"""/cities/what-if: grid latency and agreement with a per-cell loop.
+
+Seeds a throwaway SQLite database with ``--cities`` cities and one user
+with three goals. It fetches every page of the 100 x 100 x 30 all-city
+grid, cold and then cached, and recomputes sampled cells with a plain
+year-by-year loop. Exits 1 if a cold page exceeds ``--budget``
+milliseconds, any sampled cell disagrees, or a malformed parameter is not
+answered with 400.
+
+    python bench/whatif_grid.py --cities 20 --budget 100
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "whatif.db"))
+os.environ.setdefault("SECRET_KEY", "bench")
+
+
+def loop_savings(salary, rent, balance, years, r, g):
+    value = balance
+    contribution = 12 * max(salary - rent, 0.0)
+    for _ in range(years):
+        contribution *= 1 + g
+        value = (value + contribution) * (1 + r)
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cities", type=int, default=20)
+    parser.add_argument("--budget", type=float, default=100.0)
+    args = parser.parse_args()
+
+    names = [f"City {i}" for i in range(args.cities)]
+    os.environ["CITY_NAMES"] = ",".join(names)
+    from app import app
+    from extensions import db
+    from models import CityCost, Goal, User
+
+    rng = random.Random(7)
+    with app.app_context():
+        db.create_all()
+        now = datetime.now(timezone.utc)
+        for name in names:
+            rent = rng.uniform(5000, 20000)
+            salary = rng.uniform(20000, 60000)
+            db.session.add(CityCost(city_name=name, rent_min=round(rent, 2), rent_max=round(rent * 3, 2),
+                                    salary_min=round(salary, 2), salary_max=round(salary * 4, 2),
+                                    last_updated=now))
+        user = User(username="u", password="x", email="u@example.com", location=names[0],
+                    account_balance=200000)
+        db.session.add(user)
+        db.session.flush()
+        for years, amount in ((3, 500000), (10, 3000000), (40, 20000000)):
+            db.session.add(Goal(user_id=user.user_id, goal_name=f"{years}y", amount=amount,
+                                year_of_completion=date.today().year + years))
+        db.session.commit()
+        user_id = user.user_id
+
+    client = app.test_client()
+    client.get("/cities")
+    url = f"/cities/what-if?user_id={user_id}&salary_steps=100&rent_steps=100&years=30"
+    timings = {"cold": [], "cached": []}
+    bodies, sizes = [], []
+    page, pages = 1, 1
+    while page <= pages:
+        for label in ("cold", "cached"):
+            began = time.perf_counter()
+            response = client.get(f"{url}&page={page}")
+            timings[label].append((time.perf_counter() - began) * 1000)
+        bodies.append(response.json)
+        sizes.append(len(response.data))
+        pages = response.json["pages"]
+        page += 1
+    rejected = [client.get(f"{url}&{bad}").status_code
+                for bad in ("goal=abc", "goal_years=x&goal=1000", "balance=abc", "goal=-5", "page=999")]
+    r, g = bodies[0]["expected_return"], bodies[0]["salary_growth"]
+
+    error = 0.0
+    mismatches = 0
+    for _ in range(200):
+        body = rng.choice(bodies)
+        c, s, k, h = rng.randrange(len(body["cities"])), rng.randrange(100), rng.randrange(100), rng.randrange(30)
+        salary, rent = body["salaries"][c][s], body["rents"][c][k]
+        expected = loop_savings(salary, rent, 200000, h + 1, r, g)
+        # Savings are whole rupees.
+        error = max(error, abs(body["savings"][c][s][k][h] - expected))
+        for goal in body["goals"]:
+            reached = loop_savings(salary, rent, 200000, goal["years"], r, g) / len(body["goals"])
+            target = goal["amount"] * (1 + body["inflation_rate"]) ** goal["years"]
+            # Skip cells within rounding of the threshold.
+            if abs(reached - target) > 1e-6 * target:
+                mismatches += goal["feasible"][c][s][k] != (reached >= target)
+
+    result = {
+        "cells": args.cities * 100 * 100 * 30,
+        "pages": pages,
+        "cities_per_page": len(bodies[0]["cities"]),
+        "max_cold_page_ms": round(max(timings["cold"]), 2),
+        "max_cached_page_ms": round(max(timings["cached"]), 2),
+        "max_page_mb": round(max(sizes) / 1e6, 2),
+        "max_abs_error_rupees": round(error, 4),
+        "feasibility_mismatches": mismatches,
+        "bad_parameter_statuses": rejected,
+        "feasible_share": {g["years"]: [round(x, 3) for x in g["feasible_share"][:3]] for g in bodies[0]["goals"]},
+    }
+    print(json.dumps(result, indent=2))
+    ok = (max(timings["cold"]) <= args.budget and error <= 0.5 + 1e-6 and not mismatches
+          and all(status == 400 for status in rejected))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Route groups that a deployment can register selectively.
+
+``create_app(blueprints=...)`` (or ``APP_BLUEPRINTS``) picks which groups a
+worker pool serves, so cheap curriculum reads and heavy analytics run in
+separately sized pools. ``ops`` (job status, metrics, profiles) is always
+registered. ``live`` (SSE streams) holds a thread per client, so it is
+opt-in: name it explicitly for a pool sized for long-lived connections.
+"""
+import importlib
+
+from flask import current_app, g, jsonify, request
+
+from extensions import job_queue
+
+BLUEPRINTS = ("curriculum", "users", "ledger", "cities", "analytics", "ai")
+OPT_IN = ("live",)
+ALWAYS = ("ops",)
+
+
+def load(name):
+    """Import ``blueprints.<name>`` and return its ``bp``."""
+    if name not in BLUEPRINTS + OPT_IN + ALWAYS:
+        raise ValueError(f"Unknown blueprint {name!r}; expected one of {', '.join(BLUEPRINTS + OPT_IN)}")
+    return importlib.import_module(f"blueprints.{name}").bp
+
+
+def is_admin():
+    """True if the request carries a valid token for one of ``ADMIN_USER_IDS``."""
+    return g.get("user_id") is not None and g.user_id in current_app.config['ADMIN_USER_IDS']
+
+
+def wants_async():
+    return request.args.get("async", "").lower() in ("1", "true", "yes")
+
+
+def submit_job(task_name, **payload):
+    job_id = job_queue.submit(task_name, owner=g.get("user_id"), **payload)
+    return jsonify({"job_id": job_id, "status_url": f"/jobs/{job_id}"}), 202
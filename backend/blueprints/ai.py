@@ -0,0 +1,127 @@
+"""LLM-backed routes: quiz generation (Gemini) and the finance chat (OpenAI)."""
+from flask import Blueprint, current_app, jsonify, request
+
+import quizgen
+from blueprints import submit_job, wants_async
+from extensions import flights, job_queue
+from metrics import timed_call
+from models import Lesson
+
+bp = Blueprint("ai", __name__)
+
+QUIZ_QUESTIONS = 5
+
+_quiz_llm = None
+
+
+def get_quiz_llm():
+    global _quiz_llm
+    if _quiz_llm is None:
+        # Set QUIZ_LLM=fake to generate quizzes offline without calling Gemini.
+        if current_app.config['QUIZ_LLM'] == "fake":
+            _quiz_llm = quizgen.FakeLLM()
+        else:
+            _quiz_llm = quizgen.GeminiLLM("gemini-1.5-pro", api_key=current_app.config['GEMINI_API_KEY'],
+                                          timeout=current_app.config['LLM_TIMEOUT'])
+    return _quiz_llm
+
+
+@bp.route('/generate-quiz/<int:chapter_id>', methods=['POST'])
+def generate_quiz(chapter_id):
+    if wants_async():
+        return submit_job("generate_quiz", chapter_id=chapter_id)
+
+    try:
+        quiz = build_quiz(chapter_id)
+    except quizgen.QuizError as e:
+        return jsonify({"error": str(e)}), 502
+    if quiz is None:
+        return jsonify({"error": "No lessons found for this chapter"}), 404
+    return jsonify(quiz)
+
+
+@job_queue.task("llm", name="generate_quiz")
+def generate_quiz_job(ctx, chapter_id):
+    quiz = build_quiz(chapter_id)
+    if quiz is None:
+        raise ValueError("No lessons found for this chapter")
+    return quiz
+
+
+def build_quiz(chapter_id):
+    # Concurrent requests for one chapter, on any worker of this host, share one LLM run.
+    return flights.do(f"quiz:{chapter_id}", lambda: _build_quiz(chapter_id), shared=True,
+                      lock_timeout=lambda: _quiz_lock_timeout(chapter_id))
+
+
+def _lesson_texts(chapter_id):
+    # Fetch lesson content from the database
+    lessons = Lesson.query.filter_by(chapter_id=chapter_id).all()  # Removed the ordering by Lesson.order
+    return [lesson.content for lesson in lessons]
+
+
+def _quiz_lock_timeout(chapter_id):
+    # Workers queued behind another's run must outwait it: one LLM timeout per round of calls.
+    config = current_app.config
+    rounds = quizgen.llm_rounds(_lesson_texts(chapter_id), config['QUIZ_CHUNK_CHARS'], config['QUIZ_CONCURRENCY'],
+                                QUIZ_QUESTIONS, config['QUIZ_RETRIES'])
+    return max(rounds, 1) * config['LLM_TIMEOUT'] + 30
+
+
+def _build_quiz(chapter_id):
+    texts = _lesson_texts(chapter_id)
+    if not texts:
+        return None
+
+    questions = quizgen.generate_quiz(
+        texts,
+        get_quiz_llm(),
+        count=QUIZ_QUESTIONS,
+        max_chunk_chars=current_app.config['QUIZ_CHUNK_CHARS'],
+        concurrency=current_app.config['QUIZ_CONCURRENCY'],
+        retries=current_app.config['QUIZ_RETRIES'],
+    )
+    return {"quiz": questions}
+
+
+_openai_client = None
+
+
+def get_openai_client():
+    global _openai_client
+    if _openai_client is None:
+        api_key = current_app.config['OPENAI_API_KEY']
+        if not api_key:
+            raise ValueError("API_KEY environment variable is not set")
+        import openai
+        _openai_client = openai.OpenAI(api_key=api_key, timeout=current_app.config['LLM_TIMEOUT'])
+    return _openai_client
+
+system_prompt = "You are a financial assistant. Only answer financial questions."
+
+@bp.route('/chat', methods=['POST'])
+def chat():
+    data = request.json
+    user_input = data.get('message', '')
+
+    if wants_async():
+        return submit_job("chat", message=user_input)
+    return jsonify({"response": chat_reply(user_input)})
+
+
+@job_queue.task("llm", name="chat")
+def chat_job(ctx, message):
+    return {"response": chat_reply(message)}
+
+
+def chat_reply(user_input):
+    with timed_call("openai"):
+        response = get_openai_client().chat.completions.create(
+            model='ft:gpt-3.5-turbo-0125:personal::AsBvPrxO',  
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_input}
+            ]
+        )
+
+    return response.choices[0].message.content.strip()
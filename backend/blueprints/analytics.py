@@ -0,0 +1,126 @@
+"""Goal projections for /calculate and the /backtest of the optimized weights."""
+import math
+
+from flask import Blueprint, current_app, jsonify, request
+
+from blueprints import submit_job, wants_async
+from extensions import job_queue
+from market import TICKERS, market_inputs, price_history
+
+bp = Blueprint("analytics", __name__)
+
+
+def calculate_future_value(monthly_investment, growth_rate, years, weights, returns):
+    import numpy as np
+    portfolio_values = np.zeros(len(weights))  
+    annual_investment = 12 * monthly_investment
+    accumulated_value = np.zeros(len(weights))  
+
+    for year in range(1, years + 1):
+        
+        annual_investment = annual_investment * (1 + growth_rate / 100)
+        portfolio_values = np.zeros(len(weights))  
+
+       
+        portfolio_values += weights * annual_investment
+
+      
+        portfolio_values += accumulated_value
+
+       
+        yearly_return = np.dot(weights, returns)
+        portfolio_values *= (1 + yearly_return)  
+
+       
+        accumulated_value = portfolio_values.copy()
+
+    total_value = portfolio_values.sum()  
+    return portfolio_values, total_value
+
+
+@bp.route('/calculate', methods=['POST'])
+def calculate():
+    data = request.json
+    if wants_async():
+        return submit_job("calculate", data=data)
+    return jsonify(run_calculation(data))
+
+
+@job_queue.task("analytics", name="calculate")
+def calculate_job(ctx, data):
+    return run_calculation(data, ctx)
+
+
+@bp.route('/backtest', methods=['POST'])
+def run_backtest():
+    data = request.get_json(silent=True) or {}
+    try:
+        backtest_params(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if wants_async():
+        return submit_job("backtest", data=data)
+    try:
+        return jsonify(backtest_report(data))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@job_queue.task("analytics", name="backtest")
+def backtest_job(ctx, data):
+    return backtest_report(data)
+
+
+def backtest_params(data):
+    """``(risk_free_rate, window_days)`` from a /backtest body; raises ``ValueError`` if invalid."""
+    from backtest import TRADING_DAYS
+    rate = data.get('riskFreeRate') if isinstance(data, dict) else None
+    if isinstance(rate, bool) or not isinstance(rate, (int, float)) or not math.isfinite(rate):
+        raise ValueError("riskFreeRate is required and must be a number")
+    window = data.get('window_days', 3 * TRADING_DAYS)
+    if isinstance(window, bool) or not isinstance(window, int) or window < 2:
+        raise ValueError("window_days must be an integer of at least 2")
+    return float(rate), window
+
+
+def backtest_report(data):
+    import backtest
+    rate, window = backtest_params(data)
+    history = price_history(data.get('start', "2010-01-01"))
+    return backtest.walk_forward(history["dates"], history["close"], history["tickers"], rate, window=window)
+
+
+def run_calculation(data, ctx=None):
+    import numpy as np
+    monthly_investment = data['monthly_investment']
+    growth_rate = data['growth_rate']
+    goals = data['goals']
+    riskFreeRate=data['riskFreeRate']
+    current_app.logger.debug("Risk free rate: %s", riskFreeRate)
+
+    market = market_inputs(riskFreeRate, ctx)
+    weights = np.asarray(market["weights"])
+    returns = np.asarray(market["returns"])
+    inflation_rate = market["inflation_rate"]
+    if ctx:
+        ctx.set_progress(0.8, "Evaluating goals")
+
+    results = {"goals_status": [], "optimal_weights": dict(zip(TICKERS, market["weights"]))}
+
+    current_app.logger.debug("Tickers %s, weights %s, returns %s", TICKERS, weights, returns)
+
+    for goal in goals:
+        target = goal['target']
+        years = goal['years']
+        inflation_adjusted_target = target * ((1 + inflation_rate / 100) ** years)
+        portfolio_values, total_value = calculate_future_value(monthly_investment, growth_rate, years, weights, returns)
+        current_app.logger.debug("Portfolio values: %s", portfolio_values)
+
+        results["goals_status"].append({
+            "goal": goal,
+            "achieved": total_value >= inflation_adjusted_target,
+            "future_value": total_value,
+            "inflation_adjusted_target": inflation_adjusted_target
+        })
+    
+    return results
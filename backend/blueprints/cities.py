@@ -0,0 +1,157 @@
+"""City cost-of-living lookups served from the in-process city cache."""
+import math
+from datetime import date
+
+from flask import Blueprint, current_app, jsonify, request
+
+from extensions import city_cache, db
+from models import Goal, GoalProjection, User
+
+bp = Blueprint("cities", __name__)
+
+
+@bp.route("/cities", methods=["GET"])
+def get_cities():
+    return jsonify(city_cache.all()), 200
+
+@bp.route('/city-cost', methods=['GET'])
+def get_city_cost():
+    city = city_cache.find(request.args.get("city", ""))
+
+    if not city:
+        return jsonify({"message": "City not found"}), 404
+
+    return jsonify({
+        "city": city["city_name"],
+        "rent_min": city["rent_min"],
+        "rent_max": city["rent_max"],
+        "salary_min": city["salary_min"],
+        "salary_max": city["salary_max"]
+    })
+
+
+@bp.route('/cities/autocomplete', methods=['GET'])
+def autocomplete_cities():
+    query = request.args.get("q", "")
+    limit = min(request.args.get("limit", 10, type=int), 50)
+    return jsonify({"cities": city_cache.suggest(query, limit)}), 200
+
+@bp.route('/cities/what-if', methods=['GET'])
+def what_if():
+    """Savings and goal feasibility across a salary x rent x year grid of each city's ranges."""
+    # numpy is loaded only by pools that serve this route.
+    import whatif
+
+    names = [n for n in request.args.get("city", "").split(",") if n.strip()]
+    if names:
+        cities = [city_cache.find(name) for name in names]
+        if None in cities:
+            return jsonify({"error": f"Unknown city {names[cities.index(None)]!r}"}), 404
+    else:
+        cities = city_cache.all()
+    if not cities:
+        return jsonify({"error": "No city data available"}), 404
+
+    try:
+        salary_steps = _arg("salary_steps", int, 100)
+        rent_steps = _arg("rent_steps", int, 100)
+        years = _arg("years", int, 30)
+        page = _arg("page", int, 1)
+        balance = _arg("balance", float, None)
+        goal = _arg("goal", float, None)
+        goal_years = _arg("goal_years", int, years)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not (2 <= salary_steps <= 200 and 2 <= rent_steps <= 200 and 1 <= years <= 50):
+        return jsonify({"error": "salary_steps and rent_steps must be 2-200, years 1-50"}), 400
+    if goal is not None and not (math.isfinite(goal) and goal > 0 and 0 <= goal_years <= 100):
+        return jsonify({"error": "goal must be positive and goal_years 0-100"}), 400
+    if balance is not None and not math.isfinite(balance):
+        return jsonify({"error": "balance must be a finite number"}), 400
+
+    # Page through cities so one response stays under WHATIF_MAX_CELLS savings cells.
+    per_page = whatif.page_size(salary_steps, rent_steps, years, current_app.config['WHATIF_MAX_CELLS'])
+    if per_page == 0:
+        return jsonify({"error": "Grid too large for one city; lower salary_steps, rent_steps or years"}), 400
+    page_count = whatif.pages(cities, per_page)
+    if not 1 <= page <= page_count:
+        return jsonify({"error": f"page must be 1-{page_count}"}), 400
+    total_cities = len(cities)
+    cities = cities[(page - 1) * per_page:page * per_page]
+
+    user_balance, goals, goal_ids = 0.0, [], []
+    user_id = request.args.get("user_id", type=int)
+    if user_id is not None:
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+        user_balance = float(user.account_balance or 0)
+        this_year = date.today().year
+        for row in Goal.query.filter_by(user_id=user_id).all():
+            goals.append((float(row.amount), row.year_of_completion - this_year))
+            goal_ids.append(row.goal_id)
+    if balance is None:
+        balance = user_balance
+    if goal is not None:
+        goals = [(goal, goal_years)]
+        goal_ids = [None]
+
+    # Rates from the latest nightly projection run, so the grid agrees with /fetch_goals.
+    latest = db.session.execute(
+        db.select(GoalProjection.expected_return, GoalProjection.inflation_rate)
+        .order_by(GoalProjection.as_of.desc()).limit(1)
+    ).first()
+    expected_return = latest.expected_return if latest else current_app.config['GOAL_RISK_FREE_RATE']
+    inflation_rate = latest.inflation_rate if latest else current_app.config['GOAL_INFLATION_RATE']
+    salary_growth = current_app.config['GOAL_SALARY_GROWTH']
+
+    result = whatif.report(cities, salary_steps, rent_steps, years, balance, goals, goal_ids,
+                           expected_return, inflation_rate, salary_growth,
+                           cache_bytes=current_app.config['WHATIF_CACHE_BYTES'])
+    result.update(page=page, pages=page_count, total_cities=total_cities)
+    return jsonify(result), 200
+
+
+def _arg(name, cast, default):
+    """``request.args[name]`` as ``cast``; ValueError (a 400) if it does not parse."""
+    value = request.args.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        raise ValueError(f"{name} must be {'an integer' if cast is int else 'a number'}")
+
+
+@bp.route("/update-city", methods=["POST"])
+def update_city():
+    data = request.json
+    user_id = data.get("user_id")
+    city_name = data.get("city_name")
+
+    if not user_id or not city_name:
+        return jsonify({"error": "Missing user_id or city_name"}), 400
+
+    city, similarity = city_cache.match(city_name)
+    if not city:
+        return jsonify({
+            "error": "Unknown city",
+            "suggestions": city_cache.suggest(city_name, 5)
+        }), 400
+    if similarity < current_app.config['CITY_MATCH_CONFIDENCE']:
+        # Too loose a match to store without the caller confirming it.
+        return jsonify({
+            "error": "City name is ambiguous",
+            "match": city["city_name"],
+            "suggestions": city_cache.suggest(city_name, 5)
+        }), 409
+    requested, city_name = city_name, city["city_name"]
+
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    user.location = city_name
+    db.session.commit()
+
+    return jsonify({"message": "City updated successfully", "city": city_name, "requested": requested}), 200
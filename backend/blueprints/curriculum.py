@@ -0,0 +1,218 @@
+"""Chapters, lessons, learner progress and quiz submission."""
+from flask import Blueprint, jsonify, request
+
+from dbrouting import read_only
+from extensions import db, progress_buffer
+from models import Chapter, Lesson, Quiz, User
+
+bp = Blueprint("curriculum", __name__)
+
+
+@bp.route('/add_lesson', methods=['POST'])
+def add_lesson():
+    data = request.get_json()
+    chapter_id = data.get("chapter_id")
+    title = data.get("title")
+    content = data.get("content")
+    quiz_id = data.get("quiz_id", None)  # Optional quiz_id
+
+    if not chapter_id or not title or not content:
+        return jsonify({"error": "Chapter ID, title, and content are required"}), 400
+
+    new_lesson = Lesson(chapter_id=chapter_id, title=title, content=content, quiz_id=quiz_id)
+    db.session.add(new_lesson)
+    db.session.commit()
+
+    return jsonify({"message": "Lesson added successfully", "lesson_id": new_lesson.lesson_id}), 201
+
+
+@bp.route('/add_chapter', methods=['POST'])
+def add_chapter():
+    data = request.get_json()
+    title = data.get("title")
+
+    if not title:
+        return jsonify({"error": "Title is required"}), 400
+
+    new_chapter = Chapter(title=title)
+    db.session.add(new_chapter)
+    db.session.commit()
+
+    return jsonify({"message": "Chapter added successfully", "chapter_id": new_chapter.chapter_id}), 201
+@bp.route("/lesson/<int:chapter_id>/<int:lesson_id>", methods=["GET"])
+@read_only
+def get_lesson_details(chapter_id, lesson_id):
+    lesson = Lesson.query.filter_by(lesson_id=lesson_id, chapter_id=chapter_id).first()
+
+    if not lesson:
+        return jsonify({"error": "Lesson not found"}), 404
+
+    next_lesson = (
+        Lesson.query.filter(
+            Lesson.chapter_id == chapter_id,
+            Lesson.lesson_id > lesson_id
+        )
+        .order_by(Lesson.lesson_id.asc())
+        .first()
+    )
+
+    return jsonify({
+        "lesson": {
+            "lesson_id": lesson.lesson_id,
+            "title": lesson.title,
+            "content": lesson.content
+        },
+        "has_next": next_lesson is not None
+    })
+
+@bp.route('/chapters', methods=['GET'])
+@read_only
+def get_chapters():
+    chapters = Chapter.query.all()
+    return jsonify([{"chapter_id": c.chapter_id, "title": c.title} for c in chapters])
+
+@bp.route('/lessons/<int:chapter_id>', methods=['GET'])
+@read_only
+def get_lessons(chapter_id):
+    lessons = Lesson.query.filter_by(chapter_id=chapter_id).all()
+    return jsonify([{"lesson_id": l.lesson_id, "title": l.title, "content": l.content} for l in lessons])
+
+@bp.route('/user/progress/<int:user_id>', methods=['GET'])
+def get_user_progress(user_id):
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    # Progress writes go through the host's buffer (progress.py), so read it first.
+    position = progress_buffer.current(user_id)
+    if not position:
+        first_chapter = Chapter.query.first()
+        if not first_chapter:
+            return jsonify({"error": "No chapters available"}), 404
+        first_lesson = Lesson.query.filter_by(chapter_id=first_chapter.chapter_id).first()
+        if not first_lesson:
+            return jsonify({"error": "No lessons available in the first chapter"}), 404
+
+        position = (first_chapter.chapter_id, first_lesson.lesson_id)
+        progress_buffer.record(user_id, "start", *position)
+
+    return jsonify({
+        "user_id": user_id,
+        "current_chapter_id": position[0],
+        "current_lesson_id": position[1]
+    })
+@bp.route('/update-progress/<int:user_id>', methods=['POST'])
+def update_progress(user_id):
+    position = progress_buffer.current(user_id)
+    if not position:
+        return jsonify({"error": "User progress not found"}), 404
+
+    current_lesson = Lesson.query.get(position[1])
+    if not current_lesson:
+        return jsonify({"error": "Current lesson not found"}), 404
+    
+    next_lesson = Lesson.query.filter(
+        Lesson.chapter_id == current_lesson.chapter_id,
+        Lesson.lesson_id > current_lesson.lesson_id
+    ).order_by(Lesson.lesson_id.asc()).first()
+    
+    if next_lesson:
+        position = (position[0], next_lesson.lesson_id)
+    else:
+        next_chapter = Chapter.query.filter(
+            Chapter.chapter_id > current_lesson.chapter_id
+        ).order_by(Chapter.chapter_id.asc()).first()
+        if next_chapter:
+            first_lesson = Lesson.query.filter_by(chapter_id=next_chapter.chapter_id).order_by(Lesson.lesson_id.asc()).first()
+            if first_lesson:
+                position = (next_chapter.chapter_id, first_lesson.lesson_id)
+            else:
+                return jsonify({"error": "Next chapter exists but has no lessons"}), 400
+        else:
+            return jsonify({"message": "No more lessons or chapters available"})
+    
+    progress_buffer.record(user_id, "advance", *position)
+    return jsonify({
+        "user_id": user_id,
+        "current_chapter_id": position[0],
+        "current_lesson_id": position[1]
+    })
+
+@bp.route('/skip-to-next-chapter/<int:user_id>', methods=['POST'])
+def skip_to_next_chapter(user_id):
+    position = progress_buffer.current(user_id)
+    if not position:
+        return jsonify({"error": "User progress not found"}), 404
+    
+    next_chapter = Chapter.query.filter(
+        Chapter.chapter_id > position[0]
+    ).order_by(Chapter.chapter_id.asc()).first()
+    
+    if not next_chapter:
+        return jsonify({"error": "No more chapters available"}), 400
+    
+    first_lesson = Lesson.query.filter_by(chapter_id=next_chapter.chapter_id).order_by(Lesson.lesson_id.asc()).first()
+    if not first_lesson:
+        return jsonify({"error": "Next chapter has no lessons"}), 400
+    
+    progress_buffer.record(user_id, "skip_chapter", next_chapter.chapter_id, first_lesson.lesson_id)
+    
+    return jsonify({
+        "user_id": user_id,
+        "current_chapter_id": next_chapter.chapter_id,
+        "current_lesson_id": first_lesson.lesson_id
+    })
+
+@bp.route('/progress/complete_quiz', methods=['POST'])
+def complete_quiz():
+    data = request.json
+    user_id = data.get("user_id")
+    quiz_id = data.get("quiz_id")
+    passed = data.get("passed")
+    if not passed:
+        return jsonify({"message": "Quiz not passed, progress remains the same"}), 200
+    quiz = Quiz.query.get(quiz_id)
+    if not quiz:
+        return jsonify({"error": "Quiz not found"}), 404
+    position = progress_buffer.current(user_id)
+    if not position:
+        return jsonify({"error": "User progress not found"}), 404
+    next_chapter = Chapter.query.filter(Chapter.chapter_id > position[0]).order_by(Chapter.chapter_id).first()
+    next_lesson = Lesson.query.filter_by(chapter_id=next_chapter.chapter_id).order_by(Lesson.lesson_id).first() if next_chapter else None
+    if not (next_chapter and next_lesson):
+        return jsonify({"message": "No further chapters available"}), 200
+    progress_buffer.record(user_id, "complete_quiz", next_chapter.chapter_id, next_lesson.lesson_id, quiz_id=quiz_id)
+    return jsonify({"message": "Chapter completed, moved to next chapter", "new_chapter_id": next_chapter.chapter_id})
+
+
+
+
+@bp.route('/submit-quiz', methods=['POST'])
+def submit_quiz():
+    data = request.json
+    user_id = data.get('user_id')
+    quiz_id = data.get('quiz_id')
+    user_answers = data.get('answers')
+
+    quiz = Quiz.query.get(quiz_id)
+    if not quiz:
+        return jsonify({"error": "Quiz not found"}), 404
+
+    questions = quiz.questions  # JSON stored questions
+    correct_answers = {q["id"]: q["answer"] for q in questions}
+
+    score = sum(1 for qid, ans in user_answers.items() if correct_answers.get(qid) == ans)
+    passed = score >= 3  # Pass if at least 3/5 correct
+
+    # Every submission is recorded for learning analytics; a pass also moves the learner on.
+    position = progress_buffer.current(user_id)
+    if position:
+        if passed:
+            next_chapter = Chapter.query.filter(Chapter.chapter_id > position[0]).order_by(Chapter.chapter_id).first()
+            next_lesson = Lesson.query.filter_by(chapter_id=next_chapter.chapter_id).order_by(Lesson.lesson_id).first() if next_chapter else None
+
+            if next_chapter and next_lesson:
+                position = (next_chapter.chapter_id, next_lesson.lesson_id)
+        progress_buffer.record(user_id, "submit_quiz", *position, quiz_id=quiz_id, score=score, passed=passed)
+
+    return jsonify({"message": "Quiz submitted", "score": score, "passed": passed})
@@ -0,0 +1,150 @@
+"""Salary, rent and account balance bookkeeping, plus the monthly balance job."""
+from datetime import datetime, timezone
+
+from flask import Blueprint, current_app, jsonify, request
+
+from extensions import db
+from models import AccountLog, User
+
+bp = Blueprint("ledger", __name__)
+
+
+# === API Endpoint to Set Job (Salary + Rent) ===
+@bp.route('/update-user-job', methods=['POST'])
+def update_user_job():
+    data = request.get_json()
+    user_id = data.get("user_id")
+    salary = data.get("salary")
+    rent = data.get("rent")
+
+    if not user_id or salary is None or rent is None:
+        return jsonify({"message": "Missing required data"}), 400
+
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({"message": "User not found"}), 404
+
+    user.salary = salary
+    user.rent = rent
+
+    # Initialize AccountLog if not exists
+    existing_log = AccountLog.query.filter_by(user_id=user_id).first()
+    if not existing_log:
+        initial_balance = float(salary) - float(rent)
+        new_log = AccountLog(
+            user_id=user_id,
+            balance=initial_balance,
+            last_updated=datetime.now(timezone.utc)
+        )
+        db.session.add(new_log)
+
+    db.session.commit()
+    return jsonify({"message": "User salary and rent updated successfully"}), 200
+
+# === Scheduled Job to Add Salary - Rent Monthly ===
+def update_account_balances():
+    current_app.logger.info("Running scheduled balance update")
+    now = datetime.now(timezone.utc)
+    users = User.query.all()
+    for user in users:
+        balance = (user.account_balance or 0) + (user.salary or 0) - (user.rent or 0)
+        db.session.add(AccountLog(user_id=user.user_id, balance=float(balance), last_updated=now))
+        user.account_balance = balance
+    db.session.commit()
+    current_app.logger.info("Balances updated for %d users", len(users))
+
+# Scheduler Setup
+scheduler = None
+
+
+def start_scheduler(app):
+    """Start the monthly balance and nightly goal/compaction/credit jobs; called by gunicorn.conf.py or __main__, never on import."""
+    global scheduler
+    if scheduler is None:
+        from apscheduler.schedulers.background import BackgroundScheduler
+
+        def run_update():
+            with app.app_context():
+                update_account_balances()
+
+        def run_projections():
+            import feasibility
+            with app.app_context():
+                report = feasibility.run(app)
+            app.logger.info("Goal projections refreshed: %s", report)
+
+        def run_compaction():
+            import ledgerarchive
+            with app.app_context():
+                report = ledgerarchive.run(app)
+            app.logger.info("Account log compacted: %s", report)
+
+        def run_credit():
+            import credit
+            with app.app_context():
+                report = credit.run(app)
+            app.logger.info("Credit scores recomputed: %s", report)
+
+        scheduler = BackgroundScheduler()
+        scheduler.add_job(run_update, 'cron', day=1, hour=0, minute=0)
+        scheduler.add_job(run_projections, 'cron', hour=2, minute=0)
+        scheduler.add_job(run_compaction, 'cron', hour=3, minute=30)
+        scheduler.add_job(run_credit, 'cron', hour=4, minute=0)
+        scheduler.start()
+    return scheduler
+
+
+@bp.route('/update-user-salary', methods=['POST'])
+def update_user_salary():
+    data = request.json
+    user = User.query.get(data["user_id"])
+
+    if not user:
+        return jsonify({"message": "User not found"}), 404
+
+    user.salary = data["salary"]
+    db.session.commit()
+
+    return jsonify({"message": "Salary updated successfully", "new_salary": user.salary})
+
+
+@bp.route("/user/<int:user_id>/update_rent", methods=["PUT"])
+def update_user_rent(user_id):
+    data = request.get_json()
+    new_rent = data.get("rent")
+
+    if new_rent is None:
+        return jsonify({"error": "Missing 'rent' field"}), 400
+
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    user.rent = (new_rent)
+    db.session.commit()
+
+    return jsonify({"message": f"Rent updated to ₹{user.rent} for user {user.username}"}), 200
+
+@bp.route("/update_balances", methods=["POST"])
+def update_balances():
+    users = User.query.all()
+
+    now = datetime.now(timezone.utc)
+    for user in users:
+        salary = (user.salary or 0)
+        rent = (user.rent or 0)
+        balance =(user.account_balance or 0)
+
+        # Add salary
+        balance += salary
+        db.session.add(AccountLog(user_id=user.user_id, balance=float(balance), last_updated=now))
+
+        # Deduct rent
+        balance -= rent
+        db.session.add(AccountLog(user_id=user.user_id, balance=float(balance), last_updated=now))
+
+        # Save updated balance
+        user.account_balance = balance
+
+    db.session.commit()
+    return jsonify({"message": "User balances updated successfully"}), 200
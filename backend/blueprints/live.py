@@ -0,0 +1,38 @@
+"""Server-sent event streams; serve from a pool with many threads (see gunicorn.conf.py)."""
+import queue
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+
+from extensions import leaderboard_hub
+
+bp = Blueprint("live", __name__)
+
+
+@bp.route('/leaderboard/stream', methods=['GET'])
+def leaderboard_stream():
+    top = request.args.get('top', 10, type=int)
+    window = request.args.get('window', 5, type=int)
+    user_id = request.args.get('user_id', type=int)
+    if not 1 <= top <= current_app.config['LEADERBOARD_MAX_TOP'] or not 0 <= window <= 50:
+        return jsonify({'error': f"top must be 1-{current_app.config['LEADERBOARD_MAX_TOP']} and window 0-50"}), 400
+
+    subscription = leaderboard_hub.subscribe(top, user_id, window)
+    keepalive = current_app.config['LEADERBOARD_KEEPALIVE']
+    dumps = current_app.json.dumps
+
+    def events():
+        try:
+            while True:
+                try:
+                    event, data = subscription.queue.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if event == "close":
+                    return
+                yield f"event: {event}\ndata: {dumps(data)}\n\n"
+        finally:
+            leaderboard_hub.unsubscribe(subscription)
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
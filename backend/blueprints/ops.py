@@ -0,0 +1,62 @@
+from flask import Blueprint, g, jsonify, request, send_file
+
+from extensions import job_queue, metrics, profiler
+
+bp = Blueprint("ops", __name__)
+
+
+@bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    # Someone else's job is reported as missing rather than forbidden.
+    if not job or (job["owner"] is not None and job["owner"] != g.get("user_id")):
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+
+@bp.route('/jobs/metrics', methods=['GET'])
+def get_job_metrics():
+    return jsonify(job_queue.metrics()), 200
+
+
+@bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    gauges = []
+    for queue, stats in job_queue.metrics().items():
+        for status in ("queued", "running"):
+            gauges.append(("job_queue_jobs", "Jobs per queue and status",
+                           {"queue": queue, "status": status}, stats.get(status, 0)))
+        gauges.append(("job_queue_oldest_queued_seconds", "Age of the oldest queued job",
+                       {"queue": queue}, stats["oldest_queued_seconds"]))
+    return metrics.render(gauges), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+
+@bp.route('/profiles', methods=['GET'])
+def list_profiles():
+    if not profiler.authorized(request):
+        return jsonify({"error": "Profile token required"}), 403
+    limit = min(request.args.get("limit", 50, type=int), 500)
+    return jsonify({"profiles": profiler.list(limit)}), 200
+
+
+@bp.route('/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    if not profiler.authorized(request):
+        return jsonify({"error": "Profile token required"}), 403
+    profile = profiler.get(profile_id)
+    if not profile:
+        return jsonify({"error": "Profile not found"}), 404
+    return jsonify(profile), 200
+
+
+@bp.route('/profiles/<profile_id>/<fmt>', methods=['GET'])
+def download_profile(profile_id, fmt):
+    if not profiler.authorized(request):
+        return jsonify({"error": "Profile token required"}), 403
+    if fmt not in ("folded", "prof"):
+        return jsonify({"error": "Format must be 'folded' or 'prof'"}), 400
+    path = profiler.file(profile_id, "." + fmt)
+    if not path:
+        return jsonify({"error": "Profile not found"}), 404
+    mimetype = "text/plain" if fmt == "folded" else "application/octet-stream"
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=f"{profile_id}.{fmt}")
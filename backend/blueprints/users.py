@@ -0,0 +1,259 @@
+"""Accounts and authentication, profiles, goals, XP and the leaderboard."""
+from flask import Blueprint, current_app, jsonify, request
+
+import onboard
+from auth import TokenError
+from blueprints import is_admin, submit_job, wants_async
+from dbrouting import read_only
+from extensions import auth, db, job_queue, leaderboard_hub, progress_buffer
+from leaderboard import rank_order, ranked_ahead
+from models import Goal, User
+
+bp = Blueprint("users", __name__)
+
+
+@bp.route('/token/refresh', methods=['POST'])
+def refresh_token():
+    data = request.get_json(silent=True) or {}
+    try:
+        tokens = auth.refresh(data.get('refresh_token', ''))
+    except TokenError as e:
+        return jsonify({'error': str(e)}), 401
+    return jsonify(tokens), 200
+
+
+@bp.route('/logout', methods=['POST'])
+def logout():
+    data = request.get_json(silent=True) or {}
+    header = request.headers.get('Authorization', '')
+    auth.revoke(
+        access_token=header[7:].strip() if header.startswith('Bearer ') else None,
+        refresh_token=data.get('refresh_token'),
+    )
+    return jsonify({'message': 'Logged out'}), 200
+
+
+@bp.route('/register', methods=['POST'])
+def register():
+    data = request.json
+    if not data or "username" not in data or "password" not in data:
+        return jsonify({"message": "Invalid request"}), 400
+
+    hashed_password = auth.hash_password(data['password'])
+    new_user = User(username=data['username'], password=hashed_password, email=data['email'], location=data['location'])
+    db.session.add(new_user)
+    db.session.commit()
+    leaderboard_hub.mark_changed()
+    
+    # Ensure user_id exists in DB
+    user = User.query.filter_by(username=data['username']).first()
+    if not user or not user.user_id:
+        return jsonify({"message": "User ID generation failed"}), 500
+    
+    print(f"New user created: {user.username}, ID: {user.user_id}")  # Debugging
+    return jsonify({"message": "User registered successfully", "user_id": user.user_id}), 201
+
+
+@bp.route('/register/bulk', methods=['POST'])
+def register_bulk():
+    if not is_admin():
+        return jsonify({"error": "Admin token required"}), 403
+    if request.is_json:
+        records = request.get_json()
+    else:
+        upload = request.files.get('file')
+        text = upload.read().decode('utf-8') if upload else request.get_data(as_text=True)
+        fmt = 'jsonl' if 'ndjson' in (request.content_type or '') or 'jsonl' in (request.content_type or '') else None
+        try:
+            records = onboard.parse_records(text, fmt)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid upload: {e}"}), 400
+    if not isinstance(records, list) or not records:
+        return jsonify({"message": "Invalid request"}), 400
+    not_objects = [i for i, record in enumerate(records) if not isinstance(record, dict)]
+    if not_objects:
+        return jsonify({"error": "Every record must be an object", "indexes": not_objects}), 400
+
+    # Hashing a large upload would outlast the worker timeout, so it always runs as a job.
+    if wants_async() or len(records) > current_app.config['BULK_SYNC_LIMIT']:
+        return submit_job("register_bulk", records=records)
+    return jsonify(register_bulk_job(None, records)), 200
+
+
+@job_queue.task("bulk", name="register_bulk")
+def register_bulk_job(ctx, records):
+    report = onboard.bulk_register(
+        db, User, records,
+        chunk_size=current_app.config['BULK_CHUNK_SIZE'],
+        processes=current_app.config['BULK_HASH_PROCESSES'],
+    )
+    if report["created"]:
+        leaderboard_hub.mark_changed()
+    return report
+
+
+@bp.route('/login', methods=['POST'])
+def login():
+    data = request.json
+    user = User.query.filter_by(username=data['username']).first()
+
+    if user and auth.check_password(user.password, data['password']):
+       
+        user_goals = Goal.query.options(db.joinedload(Goal.projection)).filter_by(user_id=user.user_id).all()
+        goals_list = [{
+            'goal_name': goal.goal_name,
+            'year_of_completion': goal.year_of_completion,
+            'amount': goal.amount,
+            'projection': goal.projection.to_dict() if goal.projection else None,
+        } for goal in user_goals]
+
+        return jsonify({
+            'message': 'Login successful',
+            'user_id': user.user_id,
+            'username': user.username,
+            'email': user.email,
+            'location': user.location,
+            'experience_points': user.experience_points,
+            'balance':user.account_balance,
+            'credit_score': user.credit_score,
+            'salary': user.salary,
+            'goals_list': goals_list,
+            **auth.issue(user.user_id)
+        }), 200
+    
+    return jsonify({'message': 'Invalid credentials'}), 401
+
+@bp.route('/leaderboard', methods=['GET'])
+@read_only
+def leaderboard():
+    users = User.query.order_by(*rank_order(User)).all()
+    
+    leaderboard_data = [{
+        'rank': index + 1,
+        'username': user.username,
+        'experience_points': user.experience_points
+    } for index, user in enumerate(users)]
+    
+    return jsonify({'leaderboard': leaderboard_data}), 200
+
+@bp.route('/profile', methods=['GET'])
+@read_only
+def profile():
+    user_id = request.args.get('user_id', type=int)
+    if not user_id:
+        return jsonify({'error': 'User ID is required'}), 400
+
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    return jsonify({
+        'username': user.username,
+        'email': user.email,
+        'experience_points': user.experience_points,
+        'credit_score': user.credit_score,
+        'location': user.location,
+        'salary': user.salary
+    }), 200
+
+
+@bp.route('/dashboard/<int:user_id>', methods=['GET'])
+@read_only
+def dashboard(user_id):
+    # Two statements: the user with goals and progress joined in, then the rank count.
+    user = db.session.get(
+        User, user_id,
+        options=[db.joinedload(User.goals), db.joinedload(User.current_progress)],
+    )
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    rank = db.session.query(db.func.count(User.user_id)).filter(
+        ranked_ahead(User, user.user_id, user.experience_points)
+    ).scalar() + 1
+
+    # Progress writes go through the host's buffer (progress.py); an unflushed position wins.
+    position = progress_buffer.buffered(user.user_id)
+    if position is None and user.current_progress:
+        position = (user.current_progress.current_chapter_id, user.current_progress.current_lesson_id)
+    return jsonify({
+        'profile': {
+            'user_id': user.user_id,
+            'username': user.username,
+            'email': user.email,
+            'experience_points': user.experience_points,
+            'credit_score': user.credit_score,
+            'location': user.location,
+            'salary': user.salary,
+            'rent': user.rent
+        },
+        'goals': [{
+            'goal_id': goal.goal_id,
+            'goal_name': goal.goal_name,
+            'year_of_completion': goal.year_of_completion,
+            'amount': goal.amount
+        } for goal in user.goals],
+        'progress': {
+            'current_chapter_id': position[0],
+            'current_lesson_id': position[1]
+        } if position else None,
+        'balance': user.account_balance,
+        'rank': rank
+    }), 200
+
+
+@bp.route('/fetch_goals', methods=['GET'])
+@read_only
+def fetch_goals():
+    user_id = request.args.get('user_id', type=int)
+    if not user_id:
+        return jsonify({'error': 'User ID is required'}), 400
+
+    # Projections come from the nightly feasibility.py run; None until a goal's first run.
+    user_goals = Goal.query.options(db.joinedload(Goal.projection)).filter_by(user_id=user_id).all()
+    if not user_goals:
+        return jsonify({'message': 'No goals found'}), 404
+
+    goals_list = [{
+        'goal_id': goal.goal_id,
+        'goal_name': goal.goal_name,
+        'year_of_completion': goal.year_of_completion,
+        'amount': goal.amount,
+        'projection': goal.projection.to_dict() if goal.projection else None,
+    } for goal in user_goals]
+
+    return jsonify({'goals': goals_list}), 200
+@bp.route('/update_experience', methods=['POST'])
+def update_experience():
+    data = request.json
+    user = User.query.filter_by(user_id=data['user_id']).first()
+    
+    if user:
+        user.experience_points += data['points']
+        db.session.commit()
+        leaderboard_hub.mark_changed()
+        return jsonify({'message': 'Experience points updated successfully'}), 200
+    
+    return jsonify({'message': 'User not found'}), 404
+@bp.route('/add_goal', methods=['POST'])
+def add_goal():
+    data = request.json
+
+    
+    required_fields = ['user_id', 'goal_name', 'year_of_completion', 'amount']
+    if not all(field in data for field in required_fields):
+        return jsonify({'error': 'Missing required fields'}), 400
+
+    
+    new_goal = Goal(
+        user_id=data['user_id'],
+        goal_name=data['goal_name'],
+        year_of_completion=data['year_of_completion'],
+        amount=data['amount'],
+        
+    )
+    
+    db.session.add(new_goal)
+    db.session.commit()
+
+    return jsonify({'message': 'Goal added successfully'}), 201
@@ -0,0 +1,250 @@
+"""City cost-of-living data: RapidAPI client and in-process cache.
+
+``/cities`` reads from ``CityCostCache`` only. A background thread reloads
+the ``city_cost`` table into memory on an interval and refreshes rows from
+RapidAPI shortly before they expire, fetching stale cities concurrently over
+one pooled HTTP session. The staleness check and fetch run as one
+host-wide single flight, so gunicorn workers starting together call
+RapidAPI once rather than once each.
+
+Rows written by other processes (``populate.py``) are picked up without
+waiting for the interval: reads compare the table's row count and newest
+``last_updated`` with the snapshot's at most every ``CITY_CHECK_INTERVAL``
+seconds, and a lookup that misses checks at once, so a newly ingested city
+is found on its first request.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy import func, select
+
+from cityindex import CityIndex
+from metrics import timed_call
+
+logger = logging.getLogger(__name__)
+
+# No default: the key is a secret and must come from the environment.
+RAPID_API_KEY = os.getenv("RAPID_API_KEY")
+RAPID_API_HOST = os.getenv("RAPID_API_HOST", "cost-of-living-and-prices.p.rapidapi.com")
+RAPID_API_URL = os.getenv("RAPID_API_URL", f"https://{RAPID_API_HOST}/prices")
+
+RENT_MIN_ITEM = "One bedroom apartment outside of city centre"
+RENT_MAX_ITEM = "Three bedroom apartment outside of city centre"
+SALARY_ITEM = "Average Monthly Net Salary, After Tax"
+
+
+def make_session(pool_size=10, api_key=None):
+    api_key = api_key or RAPID_API_KEY
+    if not api_key:
+        raise RuntimeError("RAPID_API_KEY is not set; export it to fetch city data from RapidAPI")
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "x-rapidapi-key": api_key,
+        "x-rapidapi-host": RAPID_API_HOST,
+    })
+    return session
+
+
+def parse_prices(resdata):
+    """Pull rent and salary ranges out of a /prices response, or None if incomplete."""
+    prices = resdata.get("prices") or []
+    values = {
+        "rent_min": next((item["min"] for item in prices if item["item_name"] == RENT_MIN_ITEM), None),
+        "rent_max": next((item["max"] for item in prices if item["item_name"] == RENT_MAX_ITEM), None),
+        "salary_min": next((item["min"] for item in prices if item["item_name"] == SALARY_ITEM), None),
+        "salary_max": next((item["max"] for item in prices if item["item_name"] == SALARY_ITEM), None),
+    }
+    if None in values.values():
+        return None
+    return values
+
+
+def fetch_city_prices(session, city_name, timeout=10, url=None):
+    with timed_call("rapidapi"):
+        response = session.get(
+            url or RAPID_API_URL,
+            params={"city_name": city_name, "country_name": "India"},
+            timeout=timeout,
+        )
+    response.raise_for_status()
+    return parse_prices(response.json())
+
+
+class CityCostCache:
+    """In-memory snapshot of ``CityCost.to_dict()`` rows, refreshed in the background."""
+
+    def __init__(self):
+        self.cities = []
+        self.max_age = timedelta(days=30)
+        self.refresh_ahead = timedelta(days=3)
+        self.interval = 3600
+        self.concurrency = 4
+        self._snapshot = []
+        self._by_name = {}
+        self.index = CityIndex()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._session = None
+        self.flights = None
+        self.check_interval = 5.0
+        self._marker = None
+        self._checked_at = 0.0
+
+    def init_app(self, app, db, model, flights=None):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.flights = flights
+        self.cities = app.config.get("CITY_NAMES", self.cities)
+        self.max_age = timedelta(days=app.config.get("CITY_MAX_AGE_DAYS", 30))
+        self.refresh_ahead = timedelta(days=app.config.get("CITY_REFRESH_AHEAD_DAYS", 3))
+        self.interval = app.config.get("CITY_REFRESH_INTERVAL", self.interval)
+        self.concurrency = app.config.get("CITY_FETCH_CONCURRENCY", self.concurrency)
+        self.check_interval = float(app.config.get("CITY_CHECK_INTERVAL", self.check_interval))
+        app.extensions["city_cache"] = self
+
+    # --- reads -----------------------------------------------------------
+
+    def all(self):
+        self._ensure_started()
+        self._check()
+        return self._snapshot
+
+    def get(self, city_name):
+        self._ensure_started()
+        self._check()
+        return self._by_name.get(city_name)
+
+    def find(self, city_name):
+        """Case-, alias- and typo-tolerant lookup; returns the cached row or None."""
+        return self.match(city_name)[0]
+
+    def match(self, city_name):
+        """``(cached row, similarity)`` for ``city_name``; see ``CityIndex.match``."""
+        self._ensure_started()
+        self._check()
+        name, similarity = self.index.match(city_name)
+        if name is None and self._check(force=True):
+            name, similarity = self.index.match(city_name)
+        return (self._by_name.get(name), similarity) if name else (None, 0.0)
+
+    def suggest(self, prefix, limit=10):
+        self._ensure_started()
+        self._check()
+        return self.index.suggest(prefix, limit)
+
+    # --- refresh ---------------------------------------------------------
+
+    def _read_marker(self):
+        model = self.model
+        return tuple(self.db.session.execute(
+            select(func.count(), func.max(model.last_updated)).select_from(model)).one())
+
+    def _check(self, force=False):
+        """Reload if the table changed since the snapshot; returns whether it did.
+
+        Queries at most every ``check_interval`` seconds unless ``force``.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        if self._read_marker() == self._marker:
+            return False
+        self.reload()
+        return True
+
+    def reload(self):
+        """Rebuild the snapshot from the database; call inside an app context."""
+        # Read the marker first: a write landing during the reload changes it again.
+        marker = self._read_marker()
+        rows = [city.to_dict() for city in self.model.query.order_by(self.model.city_name).all()]
+        self._snapshot = rows
+        self._by_name = {row["city_name"]: row for row in rows}
+        self.index.rebuild(self._by_name)
+        self._marker = marker
+        return rows
+
+    def refresh(self):
+        """Fetch configured cities that are missing or close to expiry, then reload."""
+        with self.app.app_context():
+            if self.flights is None:
+                self._refresh_stale()
+            else:
+                self.flights.do("cities:refresh", self._refresh_stale, shared=True)
+            self.reload()
+            self.db.session.remove()
+
+    def _refresh_stale(self):
+        cutoff = datetime.now(timezone.utc) - self.max_age + self.refresh_ahead
+        existing = {c.city_name: c for c in self.model.query.filter(
+            self.model.city_name.in_(self.cities)).all()}
+        stale = [name for name in self.cities
+                 if name not in existing
+                 or existing[name].last_updated is None
+                 or existing[name].last_updated.replace(tzinfo=timezone.utc) < cutoff]
+        if stale:
+            self._update(stale, existing)
+        return stale
+
+    def _update(self, stale, existing):
+        if self._session is None:
+            self._session = make_session(self.concurrency)
+
+        def fetch(name):
+            try:
+                return name, fetch_city_prices(self._session, name)
+            except Exception as e:
+                logger.warning("Error fetching city data for %s: %s", name, e)
+                return name, None
+
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(stale))) as pool:
+            results = list(pool.map(fetch, stale))
+
+        now = datetime.now(timezone.utc)
+        for name, values in results:
+            if values is None:
+                continue
+            city = existing.get(name)
+            if city is None:
+                city = self.model(city_name=name)
+                self.db.session.add(city)
+            for key, value in values.items():
+                setattr(city, key, value)
+            city.last_updated = now
+        self.db.session.commit()
+
+    # --- background thread -------------------------------------------------
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            # Serve whatever the table holds right away; upstream refresh happens off-request.
+            with self.app.app_context():
+                self.reload()
+            self._thread = threading.Thread(target=self._run, name="city-cache", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("City cost refresh failed")
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
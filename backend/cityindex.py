@@ -0,0 +1,127 @@
+"""In-memory city name index for lookup, validation and autocomplete.
+
+Names are normalized (case, accents, punctuation, spacing), common historic
+names are mapped through ``ALIASES``, and anything still unmatched falls back
+to trigram similarity. Rebuilding swaps in fresh structures in one assignment,
+so readers never see a half-built index.
+"""
+import bisect
+import re
+import unicodedata
+from collections import defaultdict
+
+ALIASES = {
+    "bangalore": "Bengaluru",
+    "bengalooru": "Bengaluru",
+    "bombay": "Mumbai",
+    "calcutta": "Kolkata",
+    "cochin": "Kochi",
+    "ernakulam": "Kochi",
+    "gurgaon": "Gurugram",
+    "madras": "Chennai",
+    "mysore": "Mysuru",
+    "new delhi": "Delhi",
+    "poona": "Pune",
+    "trivandrum": "Thiruvananthapuram",
+    "vizag": "Visakhapatnam",
+}
+
+
+def normalize(name):
+    name = unicodedata.normalize("NFKD", name or "")
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    name = re.sub(r"[^a-z0-9]+", " ", name.lower())
+    return name.strip()
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(a, b):
+    """Jaccard similarity of two trigram sets."""
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+class _Snapshot:
+    def __init__(self, names):
+        self.canonical = {}
+        for name in names:
+            self.canonical[normalize(name)] = name
+        for alias, target in ALIASES.items():
+            if normalize(target) in self.canonical:
+                self.canonical.setdefault(alias, self.canonical[normalize(target)])
+        self.keys = sorted(self.canonical)
+        self.grams = {key: trigrams(key) for key in self.keys}
+        self.postings = defaultdict(set)
+        for key, grams in self.grams.items():
+            for gram in grams:
+                self.postings[gram].add(key)
+
+
+class CityIndex:
+    def __init__(self, names=(), min_similarity=0.45):
+        self.min_similarity = min_similarity
+        self._snapshot = _Snapshot(names)
+
+    def rebuild(self, names):
+        self._snapshot = _Snapshot(names)
+
+    def __len__(self):
+        return len(set(self._snapshot.canonical.values()))
+
+    def _fuzzy(self, snapshot, key, limit):
+        query = trigrams(key)
+        counts = defaultdict(int)
+        for gram in query:
+            for candidate in snapshot.postings.get(gram, ()):
+                counts[candidate] += 1
+        scored = []
+        for candidate, shared in counts.items():
+            score = shared / (len(query) + len(snapshot.grams[candidate]) - shared)
+            if score >= self.min_similarity:
+                scored.append((score, candidate))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [candidate for _, candidate in scored[:limit]]
+
+    def match(self, name):
+        """``(canonical name, similarity)`` for ``name``; 1.0 for exact or alias hits, ``(None, 0.0)`` if none."""
+        snapshot = self._snapshot
+        key = normalize(name)
+        if not key:
+            return None, 0.0
+        if key in snapshot.canonical:
+            return snapshot.canonical[key], 1.0
+        best = self._fuzzy(snapshot, key, 1)
+        if not best:
+            return None, 0.0
+        return snapshot.canonical[best[0]], _similarity(trigrams(key), snapshot.grams[best[0]])
+
+    def lookup(self, name):
+        """Return the canonical city name for ``name``, or None if nothing is close enough."""
+        return self.match(name)[0]
+
+    def suggest(self, prefix, limit=10):
+        """Canonical names starting with ``prefix``, topped up with fuzzy matches."""
+        snapshot = self._snapshot
+        key = normalize(prefix)
+        if not key:
+            return []
+        results = []
+        start = bisect.bisect_left(snapshot.keys, key)
+        for candidate in snapshot.keys[start:]:
+            if not candidate.startswith(key) or len(results) >= limit:
+                break
+            name = snapshot.canonical[candidate]
+            if name not in results:
+                results.append(name)
+        if len(results) < limit:
+            for candidate in self._fuzzy(snapshot, key, limit):
+                name = snapshot.canonical[candidate]
+                if name not in results:
+                    results.append(name)
+                if len(results) >= limit:
+                    break
+        return results
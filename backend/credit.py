@@ -0,0 +1,520 @@
+"""Simulated credit score, kept current from running per-user aggregates.
+
+    python credit.py --chunk-size 10000
+
+``credit_stats`` holds, per user, running totals of their ledger balances
+(count, sum, sum of squares, negative entries), salary transactions
+(earnings, deductions) and goals (count, total). ``User.credit_score`` is a
+function of those totals plus salary, rent and account balance, so
+``/login`` and ``/profile`` read a stored integer.
+
+Incremental path: a ``before_flush`` hook turns every ``AccountLog``,
+``SalaryTransaction`` and ``Goal`` added, changed or deleted through the
+ORM into per-user deltas and applies them in the same transaction with one
+``UPDATE credit_stats SET total = total + delta`` per flush, so the totals
+commit or roll back with the write. Users created through the ORM get a
+zero row in ``after_flush``. Once the write commits, the touched users (and
+any whose salary, rent or balance changed) join a per-worker set that a
+background thread scores every ``CREDIT_RESCORE_INTERVAL`` seconds from
+their ``credit_stats`` rows: one read and one batched score update, however
+many writes touched them. Scores therefore trail a write by up to one
+interval.
+
+Bulk path: ``recompute`` rebuilds ``credit_stats`` and every score from the
+source tables in ``user_id`` ranges and is the reconciler for the running
+totals. Per chunk it runs one GROUP BY per source table and scores in one
+numpy pass. Rows that bypass the ORM (``insert()`` bulk loads) are picked
+up here. Compacted months count through ``account_log_monthly``. Months
+folded before it carried running sums are approximated from their
+opening/closing balances. A user with no ``credit_stats`` row yet, or
+whose previous values a delta could not see, is rebuilt the same way by
+the background thread instead of being scored from the totals.
+
+A rebuild locks the ``credit_stats`` rows it replaces (``FOR UPDATE`` on
+PostgreSQL) and updates them in place. A write that already holds a row
+is counted by the rebuild's GROUP BYs. A write that waits for the rebuild
+adds its delta to the rebuilt totals. Ids still pending when a worker
+dies are picked up by the nightly recompute.
+
+Score: 300 + 600 x the weighted sum of five components in [0, 1]:
+
+- ledger health: share of ledger entries that are not negative;
+- stability: 1 / (1 + std / (|mean| + 1)) of the ledger balances;
+- cash flow: 1 - deductions / earnings;
+- rent burden: 1 at no rent, 0 at 60% of salary or more;
+- goal progress: account balance / total goal amount.
+
+A component with no data behind it scores 0.5, except rent burden, which
+scores 0 without a salary.
+"""
+import argparse
+import atexit
+import logging
+import math
+import threading
+import time
+
+from sqlalchemy import bindparam, case, event, func, inspect, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from dbrouting import RoutingSession
+
+MIN_SCORE = 300
+MAX_SCORE = 900
+RENT_LIMIT = 0.6
+WEIGHTS = {
+    "ledger_health": 0.30,
+    "stability": 0.15,
+    "cash_flow": 0.20,
+    "rent_burden": 0.20,
+    "goal_progress": 0.15,
+}
+STAT_FIELDS = ("entries", "balance_sum", "balance_sumsq", "negative_entries",
+               "earnings", "deductions", "goal_count", "goal_total")
+SCORED_USER_FIELDS = ("salary", "rent", "account_balance")
+
+logger = logging.getLogger(__name__)
+
+
+class _Scalar:
+    """Scalar operations for scoring one user."""
+
+    sqrt = staticmethod(math.sqrt)
+
+    @staticmethod
+    def clip(x):
+        return min(max(x, 0.0), 1.0)
+
+    @staticmethod
+    def positive(x):
+        return max(x, 0.0)
+
+    @staticmethod
+    def ratio(a, b, default):
+        return a / b if b else default
+
+    @staticmethod
+    def round(x):
+        return int(round(x))
+
+
+class _Vector:
+    """The same operations over numpy arrays, for a whole chunk at once."""
+
+    def __init__(self):
+        import numpy as np
+        self.np = np
+        self.sqrt = np.sqrt
+
+    def clip(self, x):
+        return self.np.clip(x, 0.0, 1.0)
+
+    def positive(self, x):
+        return self.np.maximum(x, 0.0)
+
+    def ratio(self, a, b, default):
+        a, b = self.np.broadcast_arrays(self.np.asarray(a, dtype=float), self.np.asarray(b, dtype=float))
+        return self.np.divide(a, b, out=self.np.full(b.shape, default), where=b != 0)
+
+    def round(self, x):
+        return self.np.rint(x).astype(self.np.int64)
+
+
+def components(s, ops=_Scalar):
+    """Score components for ``s``: anything with the stat fields plus salary, rent and account_balance."""
+    mean = ops.ratio(s.balance_sum, s.entries, 0.0)
+    variance = ops.positive(ops.ratio(s.balance_sumsq - s.balance_sum * mean, s.entries - 1, 0.0))
+    known = ops.ratio(s.entries, s.entries, 0.0)
+    stability = 1 / (1 + ops.sqrt(variance) / (abs(mean) + 1))
+    return {
+        "ledger_health": 1 - ops.ratio(s.negative_entries, s.entries, 0.5),
+        "stability": known * stability + (1 - known) * 0.5,
+        "cash_flow": ops.clip(1 - ops.ratio(s.deductions, s.earnings, 0.5)),
+        "rent_burden": ops.clip(1 - ops.ratio(s.rent, s.salary, RENT_LIMIT) / RENT_LIMIT),
+        "goal_progress": ops.clip(ops.ratio(s.account_balance, s.goal_total, 0.5)),
+    }
+
+
+def score(s, ops=_Scalar):
+    parts = components(s, ops)
+    total = sum(WEIGHTS[name] * value for name, value in parts.items())
+    return ops.round(MIN_SCORE + (MAX_SCORE - MIN_SCORE) * total)
+
+
+class _Columns:
+    """The same inputs as aligned arrays, one element per user in a chunk."""
+
+    def __init__(self, columns, **extra):
+        self.__dict__.update(columns)
+        self.__dict__.update(extra)
+
+
+def _field_value(field, value):
+    return int(value) if field in ("entries", "negative_entries", "goal_count") else float(value)
+
+
+def _models():
+    import models
+    return models
+
+
+def _chunks(items, size=1000):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _sources(m):
+    """Source models, with the attributes their ``credit_stats`` contribution depends on."""
+    return {m.AccountLog: ("user_id", "balance"), m.SalaryTransaction: ("user_id", "amount", "type"),
+            m.Goal: ("user_id", "amount")}
+
+
+def _contribution(m, obj, values):
+    """``(user_id, {field: amount})`` that a source row with these ``values`` adds to ``credit_stats``."""
+    user_id = values["user_id"]
+    if isinstance(obj, m.AccountLog):
+        if values["balance"] is None:
+            return user_id, {}
+        balance = float(values["balance"])
+        return user_id, {"entries": 1, "balance_sum": balance, "balance_sumsq": balance * balance,
+                         "negative_entries": int(balance < 0)}
+    if isinstance(obj, m.SalaryTransaction):
+        kind = getattr(values["type"], "name", values["type"])
+        return user_id, {"earnings" if kind == "EARNING" else "deductions": float(values["amount"] or 0)}
+    return user_id, {"goal_count": 1, "goal_total": float(values["amount"] or 0)}
+
+
+def _previous(obj, attrs):
+    """Pre-flush values of ``attrs`` on a persistent ``obj``, or None if one was replaced unseen."""
+    values = {}
+    state = inspect(obj).attrs
+    for attr in attrs:
+        history = state[attr].history
+        if history.deleted:
+            values[attr] = history.deleted[0]
+        elif history.unchanged:
+            values[attr] = history.unchanged[0]
+        elif history.added:
+            # Set without ever being loaded, so the value it replaced is unknown.
+            return None
+        else:
+            values[attr] = getattr(obj, attr)
+    return values
+
+
+class CreditEngine:
+    def __init__(self):
+        self.app = None
+        self.db = None
+        self.chunk_size = 10000
+        self.interval = 1.0
+        self._pending = set()
+        self._stale = set()
+        self._update = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def init_app(self, app, db):
+        self.app = app
+        self.db = db
+        self.chunk_size = app.config.get("CREDIT_BATCH_CHUNK_SIZE", self.chunk_size)
+        self.interval = float(app.config.get("CREDIT_RESCORE_INTERVAL", self.interval))
+        app.extensions["credit"] = self
+        # The session class is shared by every app built in this process; listen once.
+        for name, listener in (("before_flush", self._before_flush), ("after_flush", self._after_flush),
+                               ("after_commit", self._after_commit), ("after_rollback", self._after_rollback)):
+            if not event.contains(RoutingSession, name, listener):
+                event.listen(RoutingSession, name, listener)
+
+    # --- incremental -----------------------------------------------------
+
+    def _before_flush(self, session, flush_context, instances):
+        m = _models()
+        sources = _sources(m)
+        touched = session.info.setdefault("credit_users", set())
+        stale = session.info.setdefault("credit_stale", set())
+        deltas = {}
+
+        def add(contribution, sign):
+            user_id, amounts = contribution
+            if user_id is None:
+                return
+            touched.add(user_id)
+            delta = deltas.setdefault(user_id, {})
+            for field, value in amounts.items():
+                delta[field] = delta.get(field, 0) + sign * value
+
+        with session.no_autoflush:
+            for obj in session.new:
+                attrs = sources.get(type(obj))
+                if attrs:
+                    add(_contribution(m, obj, {attr: getattr(obj, attr) for attr in attrs}), 1)
+            for obj in session.deleted:
+                attrs = sources.get(type(obj))
+                if attrs:
+                    before = _previous(obj, attrs)
+                    if before is None:
+                        stale.add(obj.user_id)
+                    else:
+                        add(_contribution(m, obj, before), -1)
+            for obj in session.dirty:
+                attrs = sources.get(type(obj))
+                if attrs:
+                    state = inspect(obj).attrs
+                    if not any(state[attr].history.has_changes() for attr in attrs):
+                        continue
+                    before = _previous(obj, attrs)
+                    if before is None:
+                        stale.update(state.user_id.history.sum())
+                        continue
+                    add(_contribution(m, obj, before), -1)
+                    add(_contribution(m, obj, {attr: getattr(obj, attr) for attr in attrs}), 1)
+                elif isinstance(obj, m.User) and any(
+                        inspect(obj).attrs[field].history.has_changes() for field in SCORED_USER_FIELDS):
+                    touched.add(obj.user_id)
+            touched.discard(None)
+            stale.discard(None)
+            deltas = {user_id: delta for user_id, delta in deltas.items() if any(delta.values())}
+            if deltas:
+                session.execute(self._delta_update(m), [
+                    {"target": user_id, **{f"d_{field}": delta.get(field, 0) for field in STAT_FIELDS}}
+                    for user_id, delta in sorted(deltas.items())])
+
+    def _delta_update(self, m):
+        # Built once: constructing it costs more than running it.
+        if self._update is None:
+            stats = m.CreditStats.__table__
+            self._update = (update(stats).where(stats.c.user_id == bindparam("target"))
+                            .values({field: stats.c[field] + bindparam(f"d_{field}") for field in STAT_FIELDS}))
+        return self._update
+
+    def _after_flush(self, session, flush_context):
+        m = _models()
+        created = [obj.user_id for obj in session.new if isinstance(obj, m.User)]
+        if created:
+            # Give new users a row for later deltas; anything flushed with them is counted by a rebuild.
+            session.execute(insert(m.CreditStats.__table__), [
+                {"user_id": user_id, **{field: 0 for field in STAT_FIELDS}} for user_id in created])
+            session.info.setdefault("credit_stale", set()).update(created)
+
+    def _after_commit(self, session):
+        touched = session.info.pop("credit_users", None)
+        stale = session.info.pop("credit_stale", None)
+        if not touched and not stale:
+            return
+        with self._lock:
+            self._pending |= touched or set()
+            self._stale |= stale or set()
+        self._ensure_started()
+
+    def _after_rollback(self, session):
+        session.info.pop("credit_users", None)
+        session.info.pop("credit_stale", None)
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending | self._stale)
+
+    def flush(self):
+        """Rescore every user touched since the last flush; call inside an app context."""
+        with self._lock:
+            user_ids, self._pending = self._pending, set()
+            stale, self._stale = self._stale, set()
+        everyone = user_ids | stale
+        if not everyone:
+            return 0
+        try:
+            for ids in _chunks(sorted(everyone)):
+                self.rescore(ids, stale)
+        except Exception:
+            self.db.session.rollback()
+            with self._lock:
+                self._pending |= user_ids
+                self._stale |= stale
+            raise
+        return len(everyone)
+
+    def rescore(self, user_ids, rebuild=()):
+        """Score ``user_ids`` from ``credit_stats``; returns how many scores changed.
+
+        Users in ``rebuild``, or without a ``credit_stats`` row, are rebuilt from the source tables.
+        """
+        m = _models()
+        stats = m.CreditStats
+        rows = self.db.session.execute(
+            select(m.User.user_id, m.User.salary, m.User.rent, m.User.account_balance, m.User.credit_score,
+                   *(getattr(stats, field) for field in STAT_FIELDS))
+            .outerjoin(stats, stats.user_id == m.User.user_id)
+            .where(m.User.user_id.in_(user_ids)).order_by(m.User.user_id)
+        ).all()
+        missing = [row for row in rows if row.entries is None or row.user_id in rebuild]
+        current = [row for row in rows if not (row.entries is None or row.user_id in rebuild)]
+        changed = 0
+        if current:
+            import numpy as np
+            changed += self._store_scores(m, current, {
+                field: np.array([float(getattr(row, field)) for row in current]) for field in STAT_FIELDS})
+            self.db.session.commit()
+        if missing:
+            ids = [row.user_id for row in missing]
+            for attempt in range(3):
+                try:
+                    changed += self._rebuild(m, missing, lambda column: column.in_(ids))
+                    break
+                except IntegrityError:
+                    # Another worker inserted the same new credit_stats row first; rebuilding is idempotent.
+                    self.db.session.rollback()
+                    if attempt == 2:
+                        raise
+        return changed
+
+    # --- background thread ---------------------------------------------
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="credit-rescore", daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.flush()
+            except Exception:
+                logger.exception("Credit rescore failed")
+
+    def shutdown(self):
+        """Stop the rescoring thread and rescore whatever is still pending."""
+        self._stop.set()
+        with self.app.app_context():
+            self.flush()
+
+    # --- bulk --------------------------------------------------------------
+
+    def _aggregates(self, m, within):
+        """Per-user source totals where ``within(user_id column)`` holds, as {field: {user_id: value}}."""
+        session = self.db.session
+        log, monthly, txn, goal = m.AccountLog, m.AccountLogMonthly, m.SalaryTransaction, m.Goal
+        totals = {field: {} for field in STAT_FIELDS}
+
+        def collect(query, fields):
+            for row in session.execute(query):
+                for field, value in zip(fields, row[1:]):
+                    if value is not None:
+                        totals[field][row[0]] = totals[field].get(row[0], 0) + float(value)
+
+        ledger = ("entries", "balance_sum", "balance_sumsq", "negative_entries")
+        collect(select(log.user_id, func.count(log.balance), func.sum(log.balance),
+                       func.sum(log.balance * log.balance), func.sum(case((log.balance < 0, 1), else_=0)))
+                .where(within(log.user_id)).group_by(log.user_id), ledger)
+        midpoint = (monthly.opening_balance + monthly.closing_balance) / 2
+        collect(select(monthly.user_id, func.sum(monthly.entries),
+                       func.sum(func.coalesce(monthly.balance_sum, monthly.entries * midpoint)),
+                       func.sum(func.coalesce(monthly.balance_sumsq, monthly.entries * midpoint * midpoint)),
+                       func.sum(func.coalesce(monthly.negative_entries,
+                                              case((monthly.max_balance < 0, monthly.entries), else_=0))))
+                .where(within(monthly.user_id)).group_by(monthly.user_id), ledger)
+        earning = m.TransactionType.EARNING
+        collect(select(txn.user_id,
+                       func.sum(case((txn.type == earning, txn.amount), else_=0)),
+                       func.sum(case((txn.type != earning, txn.amount), else_=0)))
+                .where(within(txn.user_id)).group_by(txn.user_id), ("earnings", "deductions"))
+        collect(select(goal.user_id, func.count(), func.sum(goal.amount))
+                .where(within(goal.user_id)).group_by(goal.user_id), ("goal_count", "goal_total"))
+        return totals
+
+    def _store_scores(self, m, rows, stats):
+        """Score ``rows`` (user fields) with ``stats`` ({field: array}); returns how many changed."""
+        ops = _Vector()
+        np = ops.np
+        # Numeric columns arrive as Decimal; convert explicitly before numpy sees them.
+        inputs = _Columns(
+            stats,
+            salary=np.array([float(row.salary or 0) for row in rows]),
+            rent=np.array([float(row.rent or 0) for row in rows]),
+            account_balance=np.array([float(row.account_balance or 0) for row in rows]),
+        )
+        updates = [{"user_id": row.user_id, "credit_score": int(new)}
+                   for row, new in zip(rows, score(inputs, ops)) if row.credit_score != new]
+        if updates:
+            self.db.session.execute(update(m.User), updates)
+        return len(updates)
+
+    def _rebuild(self, m, rows, within):
+        """Replace ``credit_stats`` and rescore the users in ``rows``; returns how many scores changed.
+
+        ``within(column)`` must select exactly those users' rows.
+        """
+        import numpy as np
+        session = self.db.session
+        existing = set(session.execute(
+            select(m.CreditStats.user_id).where(within(m.CreditStats.user_id)).with_for_update()).scalars())
+        totals = self._aggregates(m, within)
+
+        ids = [row.user_id for row in rows]
+        values = [{"user_id": user_id, **{field: _field_value(field, totals[field].get(user_id, 0))
+                                          for field in STAT_FIELDS}}
+                  for user_id in ids]
+        # Update in place: a write waiting on these rows then adds its delta to the rebuilt totals.
+        replaced = [v for v in values if v["user_id"] in existing]
+        added = [v for v in values if v["user_id"] not in existing]
+        if replaced:
+            session.execute(update(m.CreditStats), replaced)
+        if added:
+            session.execute(insert(m.CreditStats), added)
+        changed = self._store_scores(m, rows, {
+            field: np.array([by_user.get(i, 0.0) for i in ids]) for field, by_user in totals.items()})
+        session.commit()
+        return changed
+
+    def recompute(self, chunk_size=None):
+        """Rebuild ``credit_stats`` and ``User.credit_score`` for every user; call inside an app context."""
+        m, session = _models(), self.db.session
+        chunk_size = chunk_size or self.chunk_size
+        start = time.perf_counter()
+        users = changed = 0
+        after = 0
+        while True:
+            rows = session.execute(
+                select(m.User.user_id, m.User.salary, m.User.rent, m.User.account_balance, m.User.credit_score)
+                .where(m.User.user_id > after).order_by(m.User.user_id).limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            low, high = rows[0].user_id, rows[-1].user_id
+            changed += self._rebuild(m, rows, lambda column: column.between(low, high))
+            users += len(rows)
+            after = high
+
+        elapsed = time.perf_counter() - start
+        return {
+            "users": users,
+            "scores_changed": changed,
+            "seconds": round(elapsed, 3),
+            "users_per_second": round(users / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+def run(app, chunk_size=None):
+    """Recompute every user's credit score; call inside an app context."""
+    from extensions import credit_engine
+    return credit_engine.recompute(chunk_size or app.config['CREDIT_BATCH_CHUNK_SIZE'])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute every user's credit score")
+    parser.add_argument("--chunk-size", type=int)
+    args = parser.parse_args()
+
+    from app import app
+
+    with app.app_context():
+        report = run(app, args.chunk_size)
+    for key, value in report.items():
+        print(f"{key}: {value}")
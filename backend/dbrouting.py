@@ -0,0 +1,162 @@
+"""Read/write routing between the primary database and a read replica.
+
+Routes decorated with ``@read_only`` send SELECTs to the ``replica`` bind.
+Everything else, and any flush or DML statement, goes to the primary. Reads
+fall back to the primary when:
+
+* the replica is unreachable or lags more than ``REPLICA_MAX_LAG`` seconds
+  (checked at most every ``REPLICA_CHECK_INTERVAL`` seconds),
+* the client sends ``X-Consistency: strong``, or
+* the same user wrote within the last ``READ_YOUR_WRITES_WINDOW`` seconds
+  (tracked per process).
+"""
+import functools
+import logging
+import threading
+import time
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger(__name__)
+
+REPLICA = "replica"
+
+
+def engine_options(prefix, url, environ):
+    """Pool settings for one engine, read from ``<PREFIX>_POOL_*`` environment variables."""
+    options = {
+        "pool_pre_ping": True,
+        "pool_recycle": int(environ.get(f"{prefix}_POOL_RECYCLE", "1800")),
+    }
+    if not url.startswith("sqlite"):
+        options["pool_size"] = int(environ.get(f"{prefix}_POOL_SIZE", "5"))
+        options["max_overflow"] = int(environ.get(f"{prefix}_MAX_OVERFLOW", "10"))
+        options["pool_timeout"] = int(environ.get(f"{prefix}_POOL_TIMEOUT", "10"))
+    return options
+
+
+def read_only(view):
+    """Mark a view as safe to serve from the read replica."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g._db_read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.max_lag = 5.0
+        self.check_interval = 5.0
+        self.ryw_window = 10.0
+        self._healthy = True
+        self._checked_at = 0.0
+        self._check_lock = threading.Lock()
+        self._last_write = {}
+
+    def init_app(self, app, db):
+        self.db = db
+        self.max_lag = app.config.get("REPLICA_MAX_LAG", self.max_lag)
+        self.check_interval = app.config.get("REPLICA_CHECK_INTERVAL", self.check_interval)
+        self.ryw_window = app.config.get("READ_YOUR_WRITES_WINDOW", self.ryw_window)
+        app.extensions["replica_router"] = self
+
+        event.listen(RoutingSession, "after_flush", self._mark_write)
+        event.listen(RoutingSession, "after_commit", self._remember_write)
+        with app.app_context():
+            if self.replica is not None:
+                event.listen(self.replica, "handle_error", self._on_replica_error)
+
+    def _on_replica_error(self, context):
+        if context.is_disconnect:
+            self.mark_unhealthy()
+
+    def _mark_write(self, session, flush_context):
+        session._db_wrote = True
+
+    def _remember_write(self, session):
+        if has_request_context() and session._db_wrote:
+            user_id = g.get("user_id") or _request_user_id()
+            if user_id is not None:
+                now = time.monotonic()
+                if len(self._last_write) > 10000:
+                    self._last_write = {k: v for k, v in self._last_write.items()
+                                        if now - v < self.ryw_window}
+                self._last_write[user_id] = now
+        session._db_wrote = False
+
+    @property
+    def replica(self):
+        return self.db.engines.get(REPLICA)
+
+    def healthy(self):
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return self._healthy
+        with self._check_lock:
+            if time.monotonic() - self._checked_at >= self.check_interval:
+                self._healthy = self._check()
+                self._checked_at = time.monotonic()
+        return self._healthy
+
+    def _check(self):
+        try:
+            with self.replica.connect() as conn:
+                if self.replica.dialect.name == "postgresql":
+                    lag = conn.execute(text(
+                        "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+                    )).scalar()
+                    if lag is not None and float(lag) > self.max_lag:
+                        logger.warning("Read replica lagging %.1fs; routing reads to primary", float(lag))
+                        return False
+                else:
+                    conn.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.warning("Read replica unavailable, routing reads to primary: %s", e)
+            return False
+
+    def mark_unhealthy(self):
+        self._healthy = False
+        self._checked_at = time.monotonic()
+
+    def use_replica(self, session, clause):
+        if self.replica is None or not has_request_context() or not g.get("_db_read_only"):
+            return False
+        if session._flushing or isinstance(clause, UpdateBase):
+            return False
+        if request.headers.get("X-Consistency", "").lower() == "strong":
+            return False
+        user_id = g.get("user_id") or _request_user_id()
+        wrote_at = self._last_write.get(user_id)
+        if wrote_at is not None and time.monotonic() - wrote_at < self.ryw_window:
+            return False
+        return self.healthy()
+
+
+def _request_user_id():
+    if request.view_args and "user_id" in request.view_args:
+        return request.view_args["user_id"]
+    if "user_id" in request.args:
+        return request.args.get("user_id", type=int)
+    body = request.get_json(silent=True)
+    if isinstance(body, dict):
+        try:
+            return int(body.get("user_id"))
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    _db_wrote = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and router.use_replica(self, clause):
+            return router.replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
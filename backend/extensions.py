@@ -0,0 +1,26 @@
+"""Extension singletons, created unbound and attached to an app in ``create_app``."""
+from flask_migrate import Migrate
+from flask_sqlalchemy import SQLAlchemy
+
+from auth import AuthService
+from citydata import CityCostCache
+from credit import CreditEngine
+from dbrouting import RoutingSession
+from jobs import JobQueue
+from leaderboard import LeaderboardHub
+from metrics import Metrics
+from profiling import Profiler
+from progress import ProgressBuffer
+from singleflight import SingleFlight
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+migrate = Migrate()
+job_queue = JobQueue()
+metrics = Metrics()
+profiler = Profiler()
+auth = AuthService()
+city_cache = CityCostCache()
+flights = SingleFlight()
+leaderboard_hub = LeaderboardHub()
+progress_buffer = ProgressBuffer()
+credit_engine = CreditEngine()
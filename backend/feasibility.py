@@ -0,0 +1,193 @@
+"""Nightly goal-feasibility projections for every user.
+
+    python feasibility.py --processes 4 --chunk-size 5000
+
+Users are read in ``user_id`` ranges of ``chunk_size`` together with all of
+their goals. Each chunk is projected in one vectorized numpy pass on a
+process pool while the next chunk is read, and its ``goal_projection`` rows
+are replaced with a single bulk INSERT. Every goal is projected against the
+same market snapshot (portfolio return and inflation) taken once per run.
+
+Projection model, per goal, matching ``calculate_future_value``: the user's
+monthly surplus (salary - rent) and current balance are split evenly across
+their goals; contributions grow by ``salary_growth`` each year and the
+portfolio compounds at ``expected_return``. ``required_monthly`` is the
+contribution that would exactly reach the inflation-adjusted target, or
+None for goals due this year or earlier.
+"""
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+
+
+def contribution_factor(n, expected_return, salary_growth):
+    """Value after ``n`` years of one unit a year saved, growing with salary and compounding."""
+    r = expected_return
+    q = (1 + salary_growth) / (1 + r)
+    # sum_{k=1..n} (1+g)^k (1+r)^(n-k+1): yearly contributions, each compounded to year n.
+    if np.isclose(q, 1.0):
+        series = n
+    else:
+        series = q * (1 - q ** n) / (1 - q)
+    return (1 + r) ** (n + 1) * series
+
+
+def project(user_ids, amounts, years, salaries, rents, balances,
+            expected_return, inflation_rate, salary_growth):
+    """Vectorized projection of one chunk; arrays are aligned per goal."""
+    _, inverse, counts = np.unique(user_ids, return_inverse=True, return_counts=True)
+    share = 1.0 / counts[inverse]
+    monthly = np.maximum(salaries - rents, 0.0) * share
+    balance = balances * share
+
+    n = np.maximum(years, 0).astype(float)
+    factor = contribution_factor(n, expected_return, salary_growth)
+
+    target = amounts * (1 + inflation_rate) ** n
+    from_balance = balance * (1 + expected_return) ** n
+    projected = from_balance + 12 * monthly * factor
+    shortfall = np.maximum(target - from_balance, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        required = np.where(factor > 0, shortfall / (12 * factor), np.where(shortfall > 0, np.nan, 0.0))
+    return projected >= target, projected, target, required
+
+
+def _read_chunk(db, User, Goal, after, chunk_size):
+    user_ids = db.session.execute(
+        select(User.user_id).where(User.user_id > after).order_by(User.user_id).limit(chunk_size)
+    ).scalars().all()
+    if not user_ids:
+        return None, None
+    rows = db.session.execute(
+        select(Goal.goal_id, Goal.user_id, Goal.amount, Goal.year_of_completion,
+               User.salary, User.rent, User.account_balance)
+        .join(User, User.user_id == Goal.user_id)
+        .where(Goal.user_id.between(user_ids[0], user_ids[-1]))
+    ).all()
+    return user_ids, rows
+
+
+def _columns(rows, this_year):
+    # Numeric columns arrive as Decimal; convert explicitly before numpy sees them.
+    goal_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    user_ids = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+    amounts = np.fromiter((float(r[2] or 0) for r in rows), dtype=float, count=len(rows))
+    years = np.fromiter((r[3] - this_year for r in rows), dtype=np.int64, count=len(rows))
+    salaries = np.fromiter((float(r[4] or 0) for r in rows), dtype=float, count=len(rows))
+    rents = np.fromiter((float(r[5] or 0) for r in rows), dtype=float, count=len(rows))
+    balances = np.fromiter((float(r[6] or 0) for r in rows), dtype=float, count=len(rows))
+    return goal_ids, user_ids, (user_ids, amounts, years, salaries, rents, balances)
+
+
+def _write_chunk(db, GoalProjection, user_ids, goal_ids, goal_users, result, snapshot):
+    feasible, projected, target, required = result
+    db.session.execute(delete(GoalProjection).where(
+        GoalProjection.user_id.between(user_ids[0], user_ids[-1])))
+    if len(goal_ids):
+        db.session.execute(insert(GoalProjection), [{
+            "goal_id": int(goal_id),
+            "user_id": int(user_id),
+            "as_of": snapshot["as_of"],
+            "feasible": bool(ok),
+            "projected_value": float(value),
+            "inflation_adjusted_target": float(goal_target),
+            "required_monthly": None if np.isnan(need) else float(need),
+            "expected_return": snapshot["expected_return"],
+            "inflation_rate": snapshot["inflation_rate"],
+        } for goal_id, user_id, ok, value, goal_target, need
+            in zip(goal_ids, goal_users, feasible, projected, target, required)])
+    db.session.commit()
+
+
+def refresh_projections(db, User, Goal, GoalProjection, snapshot, chunk_size=5000, processes=None, pool=None):
+    """Recompute every user's goal projections against ``snapshot``.
+
+    ``snapshot`` holds ``as_of`` (a date), ``expected_return``,
+    ``inflation_rate`` and ``salary_growth``, all rates as fractions.
+    """
+    start = time.perf_counter()
+    users = goals = 0
+    params = (snapshot["expected_return"], snapshot["inflation_rate"], snapshot["salary_growth"])
+    this_year = snapshot["as_of"].year
+
+    own_pool = pool is None
+    if own_pool:
+        pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        # Keep one chunk on the pool while the next is read and the previous written.
+        pending = None
+        after = 0
+        while True:
+            user_ids, rows = _read_chunk(db, User, Goal, after, chunk_size)
+            if user_ids is not None:
+                goal_ids, goal_users, arrays = _columns(rows, this_year)
+                future = pool.submit(project, *arrays, *params)
+                after = user_ids[-1]
+            if pending is not None:
+                _write_chunk(db, GoalProjection, *pending[:3], pending[3].result(), snapshot)
+                pending = None
+            if user_ids is None:
+                break
+            pending = (user_ids, goal_ids, goal_users, future)
+            users += len(user_ids)
+            goals += len(rows)
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+    # Users or goals deleted since the last run.
+    db.session.execute(delete(GoalProjection).where(GoalProjection.as_of < snapshot["as_of"]))
+    db.session.commit()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "as_of": snapshot["as_of"].isoformat(),
+        "users": users,
+        "goals": goals,
+        "seconds": round(elapsed, 3),
+        "goals_per_second": round(goals / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def market_snapshot(app, as_of=None):
+    """Today's portfolio return and inflation, shared with ``/calculate``."""
+    from market import market_inputs
+
+    market = market_inputs(app.config['GOAL_RISK_FREE_RATE'])
+    return {
+        "as_of": as_of or date.today(),
+        "expected_return": float(np.dot(market["weights"], market["returns"])),
+        "inflation_rate": market["inflation_rate"] / 100,
+        "salary_growth": app.config['GOAL_SALARY_GROWTH'],
+    }
+
+
+def run(app, chunk_size=None, processes=None):
+    """Take the market snapshot and refresh every projection; call inside an app context."""
+    from extensions import db
+    from models import Goal, GoalProjection, User
+
+    return refresh_projections(
+        db, User, Goal, GoalProjection, market_snapshot(app),
+        chunk_size=chunk_size or app.config['GOAL_BATCH_CHUNK_SIZE'],
+        processes=processes or app.config['GOAL_BATCH_PROCESSES'],
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute goal feasibility for every user")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--chunk-size", type=int)
+    args = parser.parse_args()
+
+    from app import app
+
+    with app.app_context():
+        report = run(app, args.chunk_size, args.processes)
+    for key, value in report.items():
+        print(f"{key}: {value}")
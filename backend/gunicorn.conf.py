@@ -0,0 +1,58 @@
+"""Gunicorn settings: `gunicorn -c gunicorn.conf.py app:app`.
+
+Run one gunicorn per workload and size each pool on its own; APP_BLUEPRINTS
+picks the route groups a pool serves and the proxy routes paths accordingly
+(`flask routes` lists each endpoint with its blueprint):
+
+    APP_BLUEPRINTS=curriculum,users,cities,ledger WEB_CONCURRENCY=8 GUNICORN_BIND=:5001 gunicorn -c gunicorn.conf.py app:app
+    APP_BLUEPRINTS=analytics WEB_CONCURRENCY=2 GUNICORN_TIMEOUT=120 GUNICORN_BIND=:5002 gunicorn -c gunicorn.conf.py app:app
+    APP_BLUEPRINTS=ai WEB_CONCURRENCY=2 GUNICORN_THREADS=8 GUNICORN_BIND=:5003 gunicorn -c gunicorn.conf.py app:app
+    APP_BLUEPRINTS=live WEB_CONCURRENCY=1 GUNICORN_THREADS=500 GUNICORN_TIMEOUT=0 GUNICORN_BIND=:5004 gunicorn -c gunicorn.conf.py app:app
+
+Each open /leaderboard/stream holds a thread, so the live pool needs a
+thread per subscriber and no worker timeout. Curriculum progress is
+buffered per host (progress.py): pin each learner to one curriculum host,
+and give workers time to flush it and pending credit rescores on shutdown
+(gunicorn's graceful_timeout).
+"""
+import fcntl
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+
+_scheduler_lock = None
+
+
+def post_worker_init(worker):
+    # Only one worker per host takes the lock and runs the monthly cron job,
+    # and only in a pool that serves the ledger routes.
+    global _scheduler_lock
+    if os.getenv("SCHEDULER_ENABLED", "1") != "1":
+        return
+    from app import app
+    if "ledger" not in app.blueprints:
+        return
+    from blueprints.ledger import start_scheduler
+    lock_path = os.path.join(app.instance_path, "scheduler.lock")
+    os.makedirs(app.instance_path, exist_ok=True)
+    handle = open(lock_path, "w")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return
+    _scheduler_lock = handle
+    start_scheduler(app)
+
+
+def worker_exit(server, worker):
+    # Write out progress events still in the host buffer, and rescore users
+    # whose writes have not been scored yet, before the worker goes.
+    from app import app
+    from extensions import credit_engine, progress_buffer
+    if "curriculum" in app.blueprints:
+        progress_buffer.shutdown()
+    credit_engine.shutdown()
@@ -0,0 +1,327 @@
+"""Background job queue for slow LLM and analytics work.
+
+Jobs are stored in a small SQLite file so every gunicorn worker on the host
+shares one queue without an external broker. Each process runs a few worker
+threads per queue; a queue's concurrency limit is enforced across processes
+by counting running rows at claim time.
+
+A job that outlives ``job_timeout`` is marked failed; ``done`` and
+``failed`` are final, so a late result from its thread is discarded.
+Finished jobs older than ``retention`` are pruned by the workers.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job (
+    id TEXT PRIMARY KEY,
+    queue TEXT NOT NULL,
+    task TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    owner INTEGER,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_job_queue_status ON job (queue, status, submitted_at);
+CREATE INDEX IF NOT EXISTS ix_job_finished_at ON job (finished_at);
+"""
+
+
+class JobContext:
+    """Handed to a running task so it can report progress."""
+
+    def __init__(self, queue, job_id):
+        self._queue = queue
+        self.job_id = job_id
+
+    def set_progress(self, progress, message=None):
+        self._queue._execute(
+            "UPDATE job SET progress = ?, message = ? WHERE id = ? AND status = ?",
+            (float(progress), message, self.job_id, RUNNING),
+        )
+
+
+class JobQueue:
+    """File-backed job queue with a bounded thread pool per named queue."""
+
+    def __init__(self, path=None, queues=None, poll_interval=0.5,
+                 job_timeout=600, retention=86400, prune_interval=300):
+        self.path = path
+        self.limits = dict(queues or {"default": 2})
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self._pruned_at = 0.0
+        self.app = None
+        self._tasks = {}
+        self._threads = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._schema_ready = False
+
+    def init_app(self, app):
+        self.app = app
+        if self.path is None:
+            self.path = app.config.get(
+                "JOB_DB_PATH", os.path.join(app.instance_path, "jobs.db"))
+        for name, limit in app.config.get("JOB_QUEUES", {}).items():
+            self.limits[name] = int(limit)
+        app.extensions["job_queue"] = self
+
+    # --- storage -------------------------------------------------------
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._schema_ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(job)")}
+            if "owner" not in columns:
+                conn.execute("ALTER TABLE job ADD COLUMN owner INTEGER")
+            self._schema_ready = True
+        return conn
+
+    def _exists(self):
+        return self._schema_ready or os.path.exists(self.path)
+
+    def _execute(self, sql, params=()):
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    # --- task registration and submission -------------------------------
+
+    def task(self, queue="default", name=None):
+        """Register ``func(ctx, **payload)`` as a task that runs on ``queue``."""
+        def decorator(func):
+            self.limits.setdefault(queue, 1)
+            self._tasks[name or func.__name__] = (queue, func)
+            return func
+        return decorator
+
+    def submit(self, task_name, owner=None, **payload):
+        """Queue a job; ``owner`` (a user_id) is the only user allowed to read it back."""
+        if task_name not in self._tasks:
+            raise KeyError(f"Unknown task: {task_name}")
+        queue, _ = self._tasks[task_name]
+        job_id = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO job (id, queue, task, payload, owner, status, submitted_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, queue, task_name, json.dumps(payload), owner, QUEUED, time.time()),
+        )
+        self.start()
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id):
+        if not self._exists():
+            return None
+        rows = self._execute("SELECT * FROM job WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        row = rows[0]
+        job = {
+            "job_id": row["id"],
+            "queue": row["queue"],
+            "task": row["task"],
+            "owner": row["owner"],
+            "status": row["status"],
+            "progress": row["progress"],
+            "message": row["message"],
+            "submitted_at": row["submitted_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+        if row["status"] == DONE:
+            job["result"] = json.loads(row["result"])
+        elif row["status"] == FAILED:
+            job["error"] = row["error"]
+        elif row["status"] == QUEUED:
+            job["position"] = self._execute(
+                "SELECT COUNT(*) FROM job WHERE queue = ? AND status = ? AND submitted_at < ?",
+                (row["queue"], QUEUED, row["submitted_at"]),
+            )[0][0]
+        return job
+
+    # --- workers ---------------------------------------------------------
+
+    def start(self):
+        """Start worker threads for this process; safe to call repeatedly.
+
+        Only queues with a task registered in this process get workers, so a
+        pool that does not serve a blueprint never claims its jobs.
+        """
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            served = {queue for queue, _ in self._tasks.values()}
+            for queue, limit in self.limits.items():
+                if queue not in served:
+                    continue
+                for i in range(limit):
+                    thread = threading.Thread(
+                        target=self._worker, args=(queue,),
+                        name=f"job-{queue}-{i}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._stop.clear()
+
+    def _claim(self, queue):
+        conn = self._connect()
+        try:
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            # A job stuck in "running" past the timeout belongs to a dead worker.
+            conn.execute(
+                "UPDATE job SET status = ?, error = ?, finished_at = ? "
+                "WHERE queue = ? AND status = ? AND started_at < ?",
+                (FAILED, "Job timed out", now, queue, RUNNING, now - self.job_timeout),
+            )
+            running = conn.execute(
+                "SELECT COUNT(*) FROM job WHERE queue = ? AND status = ?",
+                (queue, RUNNING),
+            ).fetchone()[0]
+            row = None
+            if running < self.limits[queue]:
+                tasks = [name for name, (q, _) in self._tasks.items() if q == queue]
+                row = conn.execute(
+                    "SELECT id, task, payload FROM job WHERE queue = ? AND status = ? "
+                    f"AND task IN ({', '.join('?' * len(tasks))}) "
+                    "ORDER BY submitted_at LIMIT 1",
+                    (queue, QUEUED, *tasks),
+                ).fetchone()
+                if row:
+                    conn.execute(
+                        "UPDATE job SET status = ?, started_at = ? WHERE id = ?",
+                        (RUNNING, now, row["id"]),
+                    )
+            conn.execute("COMMIT")
+            return row
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _prune(self):
+        now = time.time()
+        if now - self._pruned_at < self.prune_interval:
+            return
+        self._pruned_at = now
+        self._execute(
+            "DELETE FROM job WHERE finished_at IS NOT NULL AND finished_at < ?",
+            (now - self.retention,),
+        )
+
+    def _worker(self, queue):
+        while not self._stop.is_set():
+            try:
+                self._prune()
+                row = self._claim(queue)
+            except sqlite3.Error:
+                logger.exception("Failed to claim job on queue %s", queue)
+                row = None
+            if row is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            self._run(row)
+
+    def _run(self, row):
+        job_id = row["id"]
+        _, func = self._tasks[row["task"]]
+        ctx = JobContext(self, job_id)
+        try:
+            with self.app.app_context():
+                result = func(ctx, **json.loads(row["payload"]))
+            finished = self._finish(job_id, "status = ?, progress = 1, result = ?",
+                                    (DONE, self.app.json.dumps(result)))
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, row["task"])
+            finished = self._finish(job_id, "status = ?, error = ?", (FAILED, str(e)))
+        if not finished:
+            logger.warning("Job %s (%s) finished after it had timed out; result discarded",
+                           job_id, row["task"])
+
+    def _finish(self, job_id, assignments, params):
+        # Only a running job can finish; one already timed out stays failed.
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                f"UPDATE job SET {assignments}, finished_at = ? WHERE id = ? AND status = ?",
+                (*params, time.time(), job_id, RUNNING),
+            )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    # --- metrics ---------------------------------------------------------
+
+    def metrics(self, window=3600):
+        """Queue depth and wait/run latency over the last ``window`` seconds; read-only."""
+        now = time.time()
+        stats = {queue: {"limit": limit, QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+                 for queue, limit in self.limits.items()}
+        if not self._exists():
+            # Pools that never queue a job should not create jobs.db just to report on it.
+            for values in stats.values():
+                values["oldest_queued_seconds"] = 0
+            return stats
+        for row in self._execute(
+                "SELECT queue, status, COUNT(*) AS n FROM job "
+                "WHERE finished_at IS NULL OR finished_at >= ? GROUP BY queue, status",
+                (now - window,)):
+            stats.setdefault(row["queue"], {})[row["status"]] = row["n"]
+        for row in self._execute(
+                "SELECT queue, "
+                "AVG(started_at - submitted_at) AS avg_wait, MAX(started_at - submitted_at) AS max_wait, "
+                "AVG(finished_at - started_at) AS avg_run, MAX(finished_at - started_at) AS max_run "
+                "FROM job WHERE finished_at >= ? GROUP BY queue",
+                (now - window,)):
+            stats.setdefault(row["queue"], {}).update({
+                "avg_wait_seconds": row["avg_wait"],
+                "max_wait_seconds": row["max_wait"],
+                "avg_run_seconds": row["avg_run"],
+                "max_run_seconds": row["max_run"],
+            })
+        for queue, values in stats.items():
+            oldest = self._execute(
+                "SELECT MIN(submitted_at) FROM job WHERE queue = ? AND status = ?",
+                (queue, QUEUED),
+            )[0][0]
+            values["oldest_queued_seconds"] = now - oldest if oldest else 0
+        return stats
@@ -0,0 +1,61 @@
+"""App-wide JSON provider.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise. Either way ``Decimal`` columns, datetimes and NumPy scalars and
+arrays serialize without per-route ``float(...)`` conversions.
+"""
+import datetime
+import decimal
+import json
+import uuid
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    # NumPy types, checked by duck typing so numpy is never imported here.
+    if hasattr(obj, "tolist") and hasattr(obj, "dtype"):
+        return obj.tolist()
+    if hasattr(obj, "item") and hasattr(obj, "dtype"):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(JSONProvider):
+    sort_keys = False
+    mimetype = "application/json"
+
+    if orjson is not None:
+        def _encode(self, obj):
+            option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            return orjson.dumps(obj, default=_default, option=option)
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+    else:
+        def _encode(self, obj):
+            return json.dumps(obj, default=_default, sort_keys=self.sort_keys,
+                              separators=(",", ":")).encode()
+
+        def loads(self, s, **kwargs):
+            return json.loads(s, **kwargs)
+
+    def dumps(self, obj, **kwargs):
+        return self._encode(obj).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._encode(obj), mimetype=self.mimetype)
@@ -0,0 +1,200 @@
+"""Leaderboard push: per-subscriber views and compact diffs over SSE.
+
+A subscriber asks for the top ``top`` users and, optionally, the ``window``
+users either side of its own position. XP writes and registrations only
+mark the board dirty (``mark_changed``): they set an in-process flag and
+touch ``<instance>/leaderboard.changed`` so every worker on the host sees
+them. A broadcaster thread per worker wakes every ``LEADERBOARD_PUSH_INTERVAL``
+seconds. If the board is dirty it reads the ordered board once, slices
+every subscriber's top rows and window from it, and pushes each subscriber
+only the rows that changed. However many XP updates land in an interval,
+subscribers get at most one message.
+
+Positions are ordinal: users are ordered by ``rank_order`` (most XP first,
+ties broken by ``user_id``) and ``ranked_ahead`` counts the users before
+one. ``/leaderboard`` and ``/dashboard`` use the same two helpers, so a
+user's position is the same everywhere. Rows are
+``[position, username, experience_points]``.
+Messages are ``{"top": [...], "me": position, "window": [...]}``; in
+a diff, ``top``/``window`` list only changed rows and ``*_size`` is present
+when a list's length changed.
+"""
+import os
+import queue
+import threading
+import time
+
+from sqlalchemy import and_, or_, select
+
+
+def rank_order(User):
+    """ORDER BY for leaderboard position: most XP first, ties by ``user_id``."""
+    return User.experience_points.desc(), User.user_id
+
+
+def ranked_ahead(User, user_id, experience_points):
+    """WHERE clause for the users placed before ``user_id``; its position is their count + 1."""
+    xp = experience_points or 0
+    return or_(User.experience_points > xp, and_(User.experience_points == xp, User.user_id < user_id))
+
+
+class Subscription:
+    def __init__(self, top, user_id=None, window=0):
+        self.top = top
+        self.user_id = user_id
+        self.window = window
+        self.queue = queue.Queue(maxsize=100)
+        self.view = None
+
+
+def _diff(old, new):
+    if old is None:
+        return new
+    message = {}
+    for key in ("top", "window"):
+        if key not in new:
+            continue
+        before = {row[0]: row for row in old.get(key, [])}
+        changed = [row for row in new[key] if before.get(row[0]) != row]
+        if changed:
+            message[key] = changed
+        if len(new[key]) != len(old.get(key, [])):
+            message[f"{key}_size"] = len(new[key])
+    if new.get("me") != old.get("me"):
+        message["me"] = new.get("me")
+    return message
+
+
+class LeaderboardHub:
+    def __init__(self):
+        self.app = None
+        self.db = None
+        self.model = None
+        self.interval = 1.0
+        self.marker = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._thread = None
+        self._marker_mtime = None
+        self._board = None
+
+    def init_app(self, app, db, model):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.interval = float(app.config.get("LEADERBOARD_PUSH_INTERVAL", self.interval))
+        self.marker = app.config.get("LEADERBOARD_MARKER", os.path.join(app.instance_path, "leaderboard.changed"))
+        app.extensions["leaderboard"] = self
+
+    # --- writers ---------------------------------------------------------
+
+    def mark_changed(self):
+        """Call after committing an XP change or a new user; cheap enough for every write."""
+        self._dirty.set()
+        try:
+            os.makedirs(os.path.dirname(self.marker), exist_ok=True)
+            with open(self.marker, "a"):
+                os.utime(self.marker)
+        except OSError:
+            pass
+
+    # --- subscribers -----------------------------------------------------
+
+    def subscribe(self, top, user_id=None, window=0):
+        """Register a stream; call inside the request so the snapshot uses its session."""
+        subscription = Subscription(top, user_id, window)
+        board = self._board
+        # Reuse the broadcaster's last read unless a change is waiting for its next tick.
+        if board is None or self._dirty.is_set() or self._read_marker() != self._marker_mtime:
+            board = self._read_board()
+        subscription.view = self._views([subscription], board)[subscription]
+        subscription.queue.put(("snapshot", subscription.view))
+        with self._lock:
+            self._subscribers.add(subscription)
+        self._ensure_started()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    # --- broadcaster -----------------------------------------------------
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._marker_mtime = self._read_marker()
+                self._thread = threading.Thread(target=self._run, name="leaderboard-push", daemon=True)
+                self._thread.start()
+
+    def _read_marker(self):
+        try:
+            return os.stat(self.marker).st_mtime_ns
+        except OSError:
+            return None
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            mtime = self._read_marker()
+            if not self._dirty.is_set() and mtime == self._marker_mtime:
+                continue
+            self._dirty.clear()
+            self._marker_mtime = mtime
+            with self._lock:
+                subscribers = list(self._subscribers)
+            if not subscribers:
+                continue
+            try:
+                self.broadcast(subscribers)
+            except Exception:
+                self.app.logger.exception("Leaderboard broadcast failed")
+
+    def broadcast(self, subscribers):
+        with self.app.app_context():
+            self._board = board = self._read_board()
+        views = self._views(subscribers, board)
+        for subscription, view in views.items():
+            message = _diff(subscription.view, view)
+            subscription.view = view
+            if not message:
+                continue
+            try:
+                subscription.queue.put_nowait(("diff", message))
+            except queue.Full:
+                # Drop a stalled client; it reconnects and starts from a fresh snapshot.
+                self.unsubscribe(subscription)
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(("close", None))
+
+    def _read_board(self):
+        """Every user in position order, plus each user's index in it; one query."""
+        User = self.model
+        rows = [(row.user_id, row.username, row.experience_points or 0) for row in self.db.session.execute(
+            select(User.user_id, User.username, User.experience_points).order_by(*rank_order(User)))]
+        return rows, {row[0]: i for i, row in enumerate(rows)}
+
+    def _views(self, subscribers, board):
+        rows, index = board
+        views = {}
+        for subscription in subscribers:
+            view = {"top": [[i + 1, name, xp] for i, (_, name, xp) in enumerate(rows[:subscription.top])]}
+            if subscription.user_id is not None:
+                at = index.get(subscription.user_id)
+                if at is None:
+                    view["me"], view["window"] = None, []
+                else:
+                    low = max(at - subscription.window, 0)
+                    view["me"] = at + 1
+                    view["window"] = [[low + i + 1, name, xp] for i, (_, name, xp)
+                                      in enumerate(rows[low:at + subscription.window + 1])]
+            views[subscription] = view
+        return views
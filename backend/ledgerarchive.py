@@ -0,0 +1,188 @@
+"""Compaction and archival of old ``account_log`` rows.
+
+    python ledgerarchive.py compact --days 365
+    python ledgerarchive.py read --user-id 42 --month 2025-03
+
+``compact`` moves rows older than the retention horizon out of the hot
+table in batches of ``batch_size``. Each batch is appended to gzip JSON Lines
+files (``<LEDGER_ARCHIVE_DIR>/account_log/<YYYY-MM>.jsonl.gz``, one per
+month of ``last_updated``) and fsynced. It is then folded into per-user
+monthly ``account_log_monthly`` rows and deleted, with the fold and the
+delete in one short transaction. Each user's newest row always stays in
+``account_log`` because the balance jobs read it, so the hot table holds at
+most the horizon plus one row per user.
+
+A crash between the archive write and the commit re-archives that batch on
+the next run; ``read`` drops the duplicate ids.
+"""
+import argparse
+import gzip
+import json
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import delete, exists, select
+from sqlalchemy.orm import aliased
+
+
+def _month(moment):
+    return date(moment.year, moment.month, 1)
+
+
+def _archive(directory, rows):
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(_month(row.last_updated).strftime("%Y-%m"), []).append(row)
+    os.makedirs(directory, exist_ok=True)
+    for month, items in by_month.items():
+        path = os.path.join(directory, f"{month}.jsonl.gz")
+        with open(path, "ab") as raw:
+            # Appending a gzip member per batch keeps the file readable with gzip.open.
+            with gzip.GzipFile(fileobj=raw, mode="ab") as f:
+                for row in items:
+                    f.write(json.dumps({
+                        "id": row.id, "user_id": row.user_id, "balance": row.balance,
+                        "last_updated": row.last_updated.isoformat(),
+                    }).encode() + b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+
+
+def _fold(db, AccountLogMonthly, rows):
+    groups = {}
+    for row in sorted(rows, key=lambda r: r.last_updated):
+        groups.setdefault((row.user_id, _month(row.last_updated)), []).append(row)
+    existing = {(m.user_id, m.month): m for m in AccountLogMonthly.query.filter(
+        AccountLogMonthly.user_id.in_({user_id for user_id, _ in groups}),
+        AccountLogMonthly.month.in_({month for _, month in groups})).all()}
+    for (user_id, month), items in groups.items():
+        balances = [r.balance for r in items if r.balance is not None]
+        snapshot = existing.get((user_id, month))
+        if snapshot is None:
+            snapshot = AccountLogMonthly(
+                user_id=user_id, month=month, entries=0,
+                first_entry=items[0].last_updated, last_entry=items[-1].last_updated,
+                opening_balance=items[0].balance, closing_balance=items[-1].balance,
+                min_balance=min(balances, default=None), max_balance=max(balances, default=None),
+                balance_sum=0.0, balance_sumsq=0.0, negative_entries=0,
+            )
+            db.session.add(snapshot)
+        else:
+            if items[0].last_updated < snapshot.first_entry:
+                snapshot.first_entry, snapshot.opening_balance = items[0].last_updated, items[0].balance
+            if items[-1].last_updated >= snapshot.last_entry:
+                snapshot.last_entry, snapshot.closing_balance = items[-1].last_updated, items[-1].balance
+            extremes = balances + [b for b in (snapshot.min_balance, snapshot.max_balance) if b is not None]
+            snapshot.min_balance = min(extremes, default=None)
+            snapshot.max_balance = max(extremes, default=None)
+        snapshot.entries += len(items)
+        # Months folded before these sums existed stay NULL rather than undercount.
+        if snapshot.balance_sum is not None:
+            snapshot.balance_sum += sum(balances)
+            snapshot.balance_sumsq += sum(b * b for b in balances)
+            snapshot.negative_entries += sum(b < 0 for b in balances)
+
+
+def compact(db, AccountLog, AccountLogMonthly, cutoff, directory, batch_size=1000, pause=0.05):
+    """Archive, fold and delete ``account_log`` rows last updated before ``cutoff``."""
+    start = time.perf_counter()
+    newer = aliased(AccountLog)
+    query = (
+        select(AccountLog)
+        .where(AccountLog.last_updated < cutoff,
+               AccountLog.user_id.is_not(None),
+               exists().where(newer.user_id == AccountLog.user_id, newer.id > AccountLog.id))
+        .order_by(AccountLog.id)
+        .limit(batch_size)
+    )
+    archived = batches = 0
+    while True:
+        rows = db.session.execute(query).scalars().all()
+        if not rows:
+            break
+        _archive(directory, rows)
+        _fold(db, AccountLogMonthly, rows)
+        db.session.execute(delete(AccountLog).where(AccountLog.id.in_([r.id for r in rows])))
+        db.session.commit()
+        archived += len(rows)
+        batches += 1
+        # Let request traffic take the table between batches.
+        time.sleep(pause)
+    db.session.remove()
+    return {
+        "cutoff": cutoff.isoformat(),
+        "archived": archived,
+        "batches": batches,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def read(directory, user_id=None, start=None, end=None):
+    """Archived rows for ``user_id`` (all users if None) with ``start <= last_updated < end``."""
+    if not os.path.isdir(directory):
+        return []
+    first = start.strftime("%Y-%m") if start else None
+    last = end.strftime("%Y-%m") if end else None
+    rows, seen = [], set()
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".jsonl.gz"):
+            continue
+        month = filename[:7]
+        if (first and month < first) or (last and month > last):
+            continue
+        with gzip.open(os.path.join(directory, filename), "rt") as f:
+            for line in f:
+                row = json.loads(line)
+                if row["id"] in seen or (user_id is not None and row["user_id"] != user_id):
+                    continue
+                moment = datetime.fromisoformat(row["last_updated"])
+                if (start and moment < start) or (end and moment >= end):
+                    continue
+                seen.add(row["id"])
+                rows.append(row)
+    rows.sort(key=lambda r: r["last_updated"])
+    return rows
+
+
+def archive_dir(app):
+    return os.path.join(app.config['LEDGER_ARCHIVE_DIR'] or os.path.join(app.instance_path, "ledger_archive"),
+                        "account_log")
+
+
+def run(app, days=None):
+    """Compact rows older than ``LEDGER_RETENTION_DAYS``; call inside an app context."""
+    from extensions import db
+    from models import AccountLog, AccountLogMonthly
+
+    # last_updated is stored naive in UTC.
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+        days=days or app.config['LEDGER_RETENTION_DAYS'])
+    return compact(db, AccountLog, AccountLogMonthly, cutoff, archive_dir(app),
+                   batch_size=app.config['LEDGER_COMPACT_BATCH'])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact or read archived account_log rows")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compact_cmd = commands.add_parser("compact")
+    compact_cmd.add_argument("--days", type=int)
+    read_cmd = commands.add_parser("read")
+    read_cmd.add_argument("--user-id", type=int)
+    read_cmd.add_argument("--month", help="YYYY-MM")
+    args = parser.parse_args()
+
+    from app import app
+
+    if args.command == "compact":
+        with app.app_context():
+            report = run(app, args.days)
+        for key, value in report.items():
+            print(f"{key}: {value}")
+    else:
+        start = end = None
+        if args.month:
+            start = datetime.strptime(args.month, "%Y-%m")
+            end = datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+        for row in read(archive_dir(app), args.user_id, start, end):
+            print(json.dumps(row))
@@ -0,0 +1,127 @@
+"""Market snapshot: optimal portfolio weights, annual returns and inflation.
+
+Shared by ``/calculate`` and the nightly projections in feasibility.py.
+pandas, SciPy, yfinance and pandas_datareader are imported inside the
+functions that need them.
+"""
+from datetime import datetime
+
+from flask import current_app
+
+from extensions import flights
+from metrics import timed_call
+
+
+def fetch_inflation_rate_cpi():
+    try:
+        from pandas_datareader import data as pdr
+        start_date = datetime(2010, 1, 1)
+        end_date = datetime.today()
+        with timed_call("fred"):
+            inflation_data = pdr.DataReader("FPCPITOTLZGIND", "fred", start_date, end_date)
+        latest_inflation = inflation_data.iloc[-1, 0]
+        return latest_inflation
+    except Exception:
+        return 5.0 
+
+
+def optimize_portfolio(data,riskFreeRate):
+    import numpy as np
+    from scipy.optimize import minimize
+    trading_days = 252  
+    
+    annual_returns = ((1 + data.pct_change(fill_method=None).mean()) ** trading_days) - 1
+    returns_cov = data.pct_change(fill_method=None).cov() * trading_days 
+    
+    
+    current_app.logger.debug("Annualized returns:\n%s", annual_returns)
+    current_app.logger.debug("Covariance matrix:\n%s", returns_cov)
+
+    risk_free_rate = riskFreeRate
+
+    def objective(weights):
+        portfolio_return = np.dot(weights, annual_returns) 
+        portfolio_risk = np.sqrt(np.dot(weights.T, np.dot(returns_cov, weights)))  
+
+        
+        sharpe_ratio = (portfolio_return - risk_free_rate) / portfolio_risk
+        
+        
+        penalty = np.sum(weights**2)  
+        
+        return -sharpe_ratio + penalty 
+
+    
+    constraints = [{'type': 'eq', 'fun': lambda weights: np.sum(weights) - 1}]
+    
+   
+    bounds = [(0, 1) for _ in range(len(annual_returns))]
+    
+   
+    initial_weights = np.ones(len(annual_returns)) / len(annual_returns)
+
+    
+    result = minimize(objective, initial_weights, method='SLSQP', bounds=bounds, constraints=constraints)
+
+    current_app.logger.debug("Optimization result: %s", result)
+
+   
+    return result.x if result.success else initial_weights
+
+
+TICKERS = ["^NSEI", "^BSESN", "GLD", "0P0001BB7Q.BO"]
+
+
+def market_inputs(riskFreeRate, ctx=None):
+    """Optimal weights, annualised returns and inflation for ``riskFreeRate``.
+
+    These only depend on the rate and the day, so concurrent calculations
+    with the same rate share one yfinance download and optimisation.
+    """
+    end_date = datetime.today().strftime("%Y-%m-%d")
+    return flights.do(f"calculate:{riskFreeRate}:{end_date}",
+                      lambda: _market_inputs(riskFreeRate, end_date, ctx), shared=True)
+
+
+def _market_inputs(riskFreeRate, end_date, ctx=None):
+    import yfinance as yf
+    start_date = "2010-01-01"
+
+    with timed_call("yfinance"):
+        stock_data = yf.download(TICKERS, start=start_date, end=end_date)['Close']
+    if ctx:
+        ctx.set_progress(0.4, "Optimizing portfolio")
+    
+    weights = optimize_portfolio(stock_data,riskFreeRate)
+    trading_days = 252  
+    if stock_data.empty:
+     current_app.logger.warning("No stock data available")  # Handle gracefully
+
+    returns = ((1 + stock_data.pct_change(fill_method=None)).prod() ** (trading_days / len(stock_data))) -1
+    returns = returns[::-1]
+
+    inflation_rate = fetch_inflation_rate_cpi()
+    return {
+        "weights": [float(w) for w in weights],
+        "returns": [float(r) for r in returns],
+        "inflation_rate": float(inflation_rate),
+    }
+
+
+def price_history(start_date="2010-01-01", end_date=None):
+    """Daily closes for ``TICKERS`` as plain lists (NaN before a ticker lists), one download per day."""
+    end_date = end_date or datetime.today().strftime("%Y-%m-%d")
+    return flights.do(f"prices:{start_date}:{end_date}",
+                      lambda: _price_history(start_date, end_date), shared=True)
+
+
+def _price_history(start_date, end_date):
+    import yfinance as yf
+    with timed_call("yfinance"):
+        close = yf.download(TICKERS, start=start_date, end=end_date)['Close']
+    close = close.reindex(columns=TICKERS).sort_index()
+    return {
+        "dates": [day.strftime("%Y-%m-%d") for day in close.index],
+        "tickers": TICKERS,
+        "close": close.to_numpy().tolist(),
+    }
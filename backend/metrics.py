@@ -0,0 +1,226 @@
+"""Request, SQL and outbound-call metrics in Prometheus text format.
+
+Each process keeps histograms in memory and a daemon thread writes them to
+``<METRICS_DIR>/<pid>.json`` every few seconds. ``/metrics`` merges the files
+of every live worker, so one scrape sees the whole gunicorn pool. Recording
+an observation is a dict lookup, a bisect and a lock, cheap enough to leave
+on in production.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100, 500)
+
+HELP = {
+    "http_request_duration_seconds": ("Request latency by route", LATENCY_BUCKETS),
+    "db_statements_per_request": ("SQL statements executed per request", COUNT_BUCKETS),
+    "db_time_per_request_seconds": ("Time spent in SQL per request", LATENCY_BUCKETS),
+    "external_call_duration_seconds": ("Outbound call latency by service", LATENCY_BUCKETS),
+    "singleflight_wait_seconds": ("Time in single-flight calls by key group and role", LATENCY_BUCKETS),
+}
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def observe(self, name, labels, value):
+        buckets = HELP[name][1]
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect.bisect_left(buckets, value)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                entry = self._data[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {"name": name, "labels": dict(labels), "buckets": list(entry[0]),
+                 "sum": entry[1], "count": entry[2]}
+                for (name, labels), entry in self._data.items()
+            ]
+
+
+registry = Registry()
+
+# Callables ``(service, outcome, seconds)`` told about every timed outbound call.
+call_observers = []
+
+
+@contextmanager
+def timed_call(service):
+    """Time an outbound call: ``with timed_call("yfinance"): ...``."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe("external_call_duration_seconds",
+                         {"service": service, "outcome": outcome}, elapsed)
+        for observer in call_observers:
+            observer(service, outcome, elapsed)
+
+
+class Metrics:
+    def __init__(self):
+        self.directory = None
+        self.flush_interval = 5.0
+        self._flusher = None
+        self._flusher_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.directory = app.config.get("METRICS_DIR", os.path.join(app.instance_path, "metrics"))
+        self.flush_interval = app.config.get("METRICS_FLUSH_INTERVAL", self.flush_interval)
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        app.extensions["metrics"] = self
+
+    # --- request hooks -------------------------------------------------------
+
+    def _before_request(self):
+        g._metrics = [time.perf_counter(), 0, 0.0]
+        self._ensure_flusher()
+
+    def _teardown_request(self, exc=None):
+        state = g.pop("_metrics", None)
+        if state is None:
+            return
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        status = g.get("_metrics_status", 500 if exc else 200)
+        labels = {"method": request.method, "route": route}
+        registry.observe("http_request_duration_seconds", dict(labels, status=str(status)),
+                         time.perf_counter() - state[0])
+        registry.observe("db_statements_per_request", labels, state[1])
+        registry.observe("db_time_per_request_seconds", labels, state[2])
+
+    def _after_request(self, response):
+        g._metrics_status = response.status_code
+        return response
+
+    # --- cross-process aggregation -------------------------------------------
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._flusher_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def flush(self):
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(registry.snapshot(), f)
+        os.replace(tmp, path)
+
+    def collect(self, stale_after=600):
+        """Merge every worker's snapshot into one list of series."""
+        self.flush()
+        merged = {}
+        now = time.time()
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                if now - os.path.getmtime(path) > stale_after:
+                    os.remove(path)
+                    continue
+                with open(path) as f:
+                    series = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for item in series:
+                key = (item["name"], tuple(sorted(item["labels"].items())))
+                entry = merged.get(key)
+                if entry is None:
+                    merged[key] = item
+                else:
+                    entry["buckets"] = [a + b for a, b in zip(entry["buckets"], item["buckets"])]
+                    entry["sum"] += item["sum"]
+                    entry["count"] += item["count"]
+        return merged
+
+    def render(self, gauges=()):
+        """Prometheus text exposition; ``gauges`` is an iterable of (name, help, labels, value)."""
+        lines = []
+        merged = self.collect()
+        for name, (help_text, buckets) in HELP.items():
+            series = [(labels, item) for (n, labels), item in sorted(merged.items()) if n == name]
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, item in series:
+                cumulative = 0
+                for bound, count in zip(list(buckets) + ["+Inf"], item["buckets"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {item['sum']}")
+                lines.append(f"{name}_count{_labels(labels)} {item['count']}")
+        families = {}
+        for name, help_text, labels, value in gauges:
+            families.setdefault((name, help_text), []).append((labels, value))
+        for (name, help_text), samples in families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(tuple(sorted(labels.items())))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_metrics_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_metrics_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if has_request_context():
+        state = g.get("_metrics")
+        if state is not None:
+            state[1] += 1
+            state[2] += elapsed
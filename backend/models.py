@@ -0,0 +1,197 @@
+import enum
+from datetime import datetime, timezone
+
+from extensions import db
+
+
+class User(db.Model):
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    username = db.Column(db.String(50), unique=True, nullable=False)
+    password = db.Column(db.String(255), nullable=False)
+    email = db.Column(db.String(100), unique=True, nullable=False)
+    experience_points = db.Column(db.Integer, default=0, index=True)
+    credit_score = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+    location = db.Column(db.String(100), nullable=False)
+    salary = db.Column(db.Numeric(10, 2), default=0)
+    account_balance = db.Column(db.Numeric(10, 2), default=0)
+    rent = db.Column(db.Numeric(10, 2), default=0)
+
+    goals = db.relationship('Goal', back_populates='user')
+    current_progress = db.relationship('UserCurrentProgress', back_populates='user', uselist=False)
+    account_logs = db.relationship('AccountLog', back_populates='user', lazy='dynamic')
+
+
+class RevokedToken(db.Model):
+    __table_args__ = (db.Index('ix_revoked_token_kind_expires_at', 'kind', 'expires_at'),)
+
+    jti = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(10), nullable=False, server_default='access')
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class AccountLog(db.Model):
+    __table_args__ = (db.Index('ix_account_log_user_id_last_updated', 'user_id', 'last_updated'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'))
+    balance = db.Column(db.Float)
+    last_updated = db.Column(db.DateTime)
+
+    user = db.relationship('User', back_populates='account_logs')
+
+
+class AccountLogMonthly(db.Model):
+    """One user's compacted ``account_log`` rows for one month; see ledgerarchive.py."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)
+    entries = db.Column(db.Integer, nullable=False)
+    opening_balance = db.Column(db.Float)
+    closing_balance = db.Column(db.Float)
+    min_balance = db.Column(db.Float)
+    max_balance = db.Column(db.Float)
+    first_entry = db.Column(db.DateTime, nullable=False)
+    last_entry = db.Column(db.DateTime, nullable=False)
+    # Running sums for credit.py's bulk recompute; NULL for months folded before they existed.
+    balance_sum = db.Column(db.Float)
+    balance_sumsq = db.Column(db.Float)
+    negative_entries = db.Column(db.Integer)
+
+
+class CreditStats(db.Model):
+    """Running per-user aggregates behind ``User.credit_score``; see credit.py."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'), primary_key=True)
+    entries = db.Column(db.Integer, nullable=False, default=0)
+    balance_sum = db.Column(db.Float, nullable=False, default=0.0)
+    balance_sumsq = db.Column(db.Float, nullable=False, default=0.0)
+    negative_entries = db.Column(db.Integer, nullable=False, default=0)
+    earnings = db.Column(db.Float, nullable=False, default=0.0)
+    deductions = db.Column(db.Float, nullable=False, default=0.0)
+    goal_count = db.Column(db.Integer, nullable=False, default=0)
+    goal_total = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class LearningModule(db.Model):
+    module_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    title = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    xp_award = db.Column(db.Integer, nullable=False)
+
+class UserProgress(db.Model):
+    progress_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'), nullable=False)
+    module_id = db.Column(db.Integer, db.ForeignKey('learning_module.module_id'), nullable=False)
+    completed = db.Column(db.Boolean, default=False)
+    completed_at = db.Column(db.DateTime)
+
+
+class Goal(db.Model):
+    goal_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'), nullable=False, index=True)
+    goal_name = db.Column(db.String(100), nullable=False)
+    year_of_completion = db.Column(db.Integer, nullable=False)
+    amount = db.Column(db.Numeric(10, 2), nullable=False)
+
+    user = db.relationship('User', back_populates='goals')
+    projection = db.relationship('GoalProjection', uselist=False, viewonly=True)
+
+
+class GoalProjection(db.Model):
+    """Nightly feasibility result for one goal; written by feasibility.py."""
+    goal_id = db.Column(db.Integer, db.ForeignKey('goal.goal_id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'), nullable=False, index=True)
+    as_of = db.Column(db.Date, nullable=False, index=True)
+    feasible = db.Column(db.Boolean, nullable=False)
+    projected_value = db.Column(db.Float, nullable=False)
+    inflation_adjusted_target = db.Column(db.Float, nullable=False)
+    required_monthly = db.Column(db.Float)
+    expected_return = db.Column(db.Float, nullable=False)
+    inflation_rate = db.Column(db.Float, nullable=False)
+
+    def to_dict(self):
+        return {
+            "as_of": self.as_of.isoformat(),
+            "feasible": self.feasible,
+            "projected_value": self.projected_value,
+            "inflation_adjusted_target": self.inflation_adjusted_target,
+            "required_monthly": self.required_monthly,
+            "expected_return": self.expected_return,
+            "inflation_rate": self.inflation_rate,
+        }
+
+
+class CityCost(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    city_name = db.Column(db.String(100), unique=True, nullable=False)
+    rent_min = db.Column(db.Numeric(10, 2), nullable=False)
+    rent_max = db.Column(db.Numeric(10, 2), nullable=False)
+    salary_min = db.Column(db.Numeric(10, 2), nullable=False)
+    salary_max = db.Column(db.Numeric(10, 2), nullable=False)
+    last_updated = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def to_dict(self):
+        return {
+            "city_name": self.city_name,
+            "rent_min": self.rent_min,
+            "rent_max": self.rent_max,
+            "salary_min": self.salary_min,
+            "salary_max": self.salary_max,
+            "last_updated": self.last_updated.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+
+class Chapter(db.Model):
+    chapter_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    title = db.Column(db.String(100), nullable=False)
+
+class Lesson(db.Model):
+    # Covers both "lessons in chapter" and "next lesson after X in chapter".
+    __table_args__ = (db.Index('ix_lesson_chapter_id_lesson_id', 'chapter_id', 'lesson_id'),)
+
+    lesson_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.chapter_id'), nullable=False)
+    title = db.Column(db.String(100), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.quiz_id'), nullable=True)  # Link lessons to quizzes
+
+class Quiz(db.Model):
+    quiz_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.chapter_id'), nullable=False, index=True)
+    questions = db.Column(db.JSON, nullable=False)
+
+class UserCurrentProgress(db.Model):
+    progress_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'), unique=True, nullable=False)
+    current_chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.chapter_id'), nullable=False)
+    current_lesson_id = db.Column(db.Integer, db.ForeignKey('lesson.lesson_id'), nullable=False)
+
+    user = db.relationship('User', back_populates='current_progress')
+
+
+class ProgressEvent(db.Model):
+    """Append-only history of progress changes, written by progress.py's flusher."""
+    __table_args__ = (db.Index('ix_progress_event_user_id_created_at', 'user_id', 'created_at'),)
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    event_id = db.Column(db.String(32), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.chapter_id'), nullable=False)
+    lesson_id = db.Column(db.Integer, db.ForeignKey('lesson.lesson_id'), nullable=False)
+    detail = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+
+class TransactionType(enum.Enum):
+    EARNING = "Earning"
+    DEDUCTION = "Deduction"
+
+class SalaryTransaction(db.Model):
+    __table_args__ = (db.Index('ix_salary_transaction_user_id_timestamp', 'user_id', 'timestamp'),)
+
+    transaction_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'), nullable=False)
+    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    type = db.Column(db.Enum(TransactionType), nullable=False)  # Correct usage
+    description = db.Column(db.String(255))
+    timestamp = db.Column(db.DateTime, default=datetime.now(timezone.utc))
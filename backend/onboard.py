@@ -0,0 +1,140 @@
+"""Bulk user onboarding.
+
+    python onboard.py students.csv --processes 8 --chunk-size 1000
+    python onboard.py students.jsonl
+
+Records need username, password, email and location. Duplicates are
+rejected with one set-based query per chunk, passwords are hashed on a
+process pool, and each chunk is inserted with a single INSERT ... RETURNING.
+"""
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+
+REQUIRED_FIELDS = ("username", "password", "email", "location")
+
+
+def _hash(password):
+    return generate_password_hash(password, method="pbkdf2:sha256")
+
+
+def parse_records(text, fmt=None):
+    """Parse CSV or JSON Lines text into a list of dicts."""
+    if fmt is None:
+        fmt = "jsonl" if text.lstrip().startswith("{") else "csv"
+    if fmt == "jsonl":
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _existing(db, User, rows):
+    usernames = [r["username"] for r in rows]
+    emails = [r["email"] for r in rows]
+    taken = db.session.query(User.username, User.email).filter(
+        or_(User.username.in_(usernames), User.email.in_(emails))).all()
+    return {u for u, _ in taken}, {e for _, e in taken}
+
+
+def bulk_register(db, User, records, chunk_size=1000, processes=None, pool=None):
+    """Validate, hash and insert ``records``; returns created ids and per-row rejections."""
+    start = time.perf_counter()
+    created, rejected = [], []
+    seen_usernames, seen_emails = set(), set()
+    valid = []
+    for line, record in enumerate(records, start=1):
+        if not isinstance(record, dict):
+            rejected.append({"row": line, "reason": "Not an object"})
+            continue
+        row = {k: str(record.get(k) or "").strip() for k in REQUIRED_FIELDS}
+        row["password"] = str(record.get("password") or "")
+        missing = [k for k in REQUIRED_FIELDS if not row[k]]
+        if missing:
+            rejected.append({"row": line, "reason": f"Missing {', '.join(missing)}"})
+        elif row["username"] in seen_usernames or row["email"] in seen_emails:
+            rejected.append({"row": line, "username": row["username"], "reason": "Duplicate in upload"})
+        else:
+            seen_usernames.add(row["username"])
+            seen_emails.add(row["email"])
+            valid.append((line, row))
+
+    own_pool = pool is None
+    if own_pool:
+        pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        for chunk in _chunks(valid, chunk_size):
+            taken_usernames, taken_emails = _existing(db, User, [r for _, r in chunk])
+            fresh = []
+            for line, row in chunk:
+                if row["username"] in taken_usernames or row["email"] in taken_emails:
+                    rejected.append({"row": line, "username": row["username"], "reason": "Username or email already exists"})
+                else:
+                    fresh.append((line, row))
+            if not fresh:
+                continue
+            hashes = pool.map(_hash, [r["password"] for _, r in fresh], chunksize=max(1, len(fresh) // 64))
+            values = [dict(row, password=pwhash) for (_, row), pwhash in zip(fresh, hashes)]
+            try:
+                result = db.session.execute(
+                    insert(User).returning(User.user_id, User.username), values)
+                created.extend({"user_id": uid, "username": name} for uid, name in result)
+                db.session.commit()
+            except IntegrityError:
+                # Lost a race with a concurrent /register; fall back to row-by-row for this chunk.
+                db.session.rollback()
+                for (line, _), value in zip(fresh, values):
+                    try:
+                        user_id = db.session.execute(
+                            insert(User).returning(User.user_id), [value]).scalar_one()
+                        db.session.commit()
+                        created.append({"user_id": user_id, "username": value["username"]})
+                    except IntegrityError:
+                        db.session.rollback()
+                        rejected.append({"row": line, "username": value["username"], "reason": "Username or email already exists"})
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "created": created,
+        "rejected": rejected,
+        "seconds": round(elapsed, 3),
+        "users_per_second": round(len(created) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-register users from CSV or JSON Lines")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    from app import app
+    from extensions import db
+    from models import User
+
+    with open(args.path) as f:
+        records = parse_records(f.read(), args.format)
+    with app.app_context():
+        report = bulk_register(db, User, records, args.chunk_size, args.processes)
+    print(f"created: {len(report['created'])}")
+    print(f"rejected: {len(report['rejected'])}")
+    for item in report["rejected"][:20]:
+        print(f"  row {item['row']}: {item['reason']}")
+    print(f"seconds: {report['seconds']}")
+    print(f"users_per_second: {report['users_per_second']}")
@@ -1,55 +1,272 @@
-from app import app, db, CityCost
-# from app.models import CityCost  # Update this import based on your structure
-import requests
+"""Bulk city cost ingestion.
+
+    python populate.py                         # the default cities
+    python populate.py --file cities.txt --concurrency 16 --rate 20
+    python populate.py --fake --count 5000     # against bench/fake_prices.py
+
+Cities are fetched concurrently over one pooled session, throttled by a
+token-bucket rate limiter, retried with exponential backoff, and guarded by
+a circuit breaker so a failing upstream is not hammered. While the circuit
+is open, workers wait out the cooldown and then try again; a city is only
+given up as ``circuit_open`` after ``--circuit-wait`` seconds of waiting.
+Results are upserted into ``city_cost`` in chunks.
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 
-RAPID_API_KEY = "48a15926f9msh4d5dee488a67d77p1d2717jsn2e3367a9a578"
-RAPID_API_HOST = "cost-of-living-and-prices.p.rapidapi.com"
+import requests
 
-def fetch_and_add_city(city_name):
-    url = f"https://{RAPID_API_HOST}/prices"
-    params = {"city_name": city_name, "country_name": "India"}
-    headers = {
-        "x-rapidapi-key": RAPID_API_KEY,
-        "x-rapidapi-host": RAPID_API_HOST,
-    }
+from app import app
+from extensions import db
+from models import CityCost
+from citydata import make_session, fetch_city_prices
 
-    try:
-        response = requests.get(url, headers=headers, params=params)
-        resdata = response.json()
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
 
-        rent_min = next((item["min"] for item in resdata["prices"] if item["item_name"] == "One bedroom apartment outside of city centre"), None)
-        rent_max = next((item["max"] for item in resdata["prices"] if item["item_name"] == "Three bedroom apartment outside of city centre"), None)
-        salary_min = next((item["min"] for item in resdata["prices"] if item["item_name"] == "Average Monthly Net Salary, After Tax"), None)
-        salary_max = next((item["max"] for item in resdata["prices"] if item["item_name"] == "Average Monthly Net Salary, After Tax"), None)
 
-        if None in (rent_min, rent_max, salary_min, salary_max):
-            print(f"Missing data for {city_name}, skipping...")
-            return
+class RateLimiter:
+    """Token bucket allowing ``rate`` requests per second with bursts up to ``burst``."""
 
-        existing = CityCost.query.filter_by(city_name=city_name).first()
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
 
-        if existing:
-            print(f"{city_name} already exists, skipping...")
+    def acquire(self):
+        if not self.rate:
             return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures and lets one probe through after ``cooldown``."""
+
+    def __init__(self, threshold=10, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+
+    def before_call(self, max_wait=None):
+        """Block while the circuit is open; returns True if the caller had to wait.
+
+        Raises CircuitOpenError once ``max_wait`` seconds have passed without
+        the circuit letting the call through.
+        """
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        waited = False
+        with self.lock:
+            while self.opened_at is not None:
+                now = time.monotonic()
+                remaining = self.opened_at + self.cooldown - now
+                if remaining <= 0 and not self.probing:
+                    self.probing = True
+                    break
+                # Cooling down: wait it out. Probe in flight: wait for its result.
+                timeout = remaining if remaining > 0 else None
+                if deadline is not None:
+                    if now >= deadline:
+                        raise CircuitOpenError("Upstream circuit is open")
+                    timeout = deadline - now if timeout is None else min(timeout, deadline - now)
+                waited = True
+                self.changed.wait(timeout)
+        return waited
 
-        city = CityCost(
-            city_name=city_name,
-            rent_min=rent_min,
-            rent_max=rent_max,
-            salary_min=salary_min,
-            salary_max=salary_max,
-            last_updated=datetime.now(timezone.utc)
-        )
-        db.session.add(city)
+    def record(self, success):
+        with self.lock:
+            self.probing = False
+            if success:
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if self.failures >= self.threshold:
+                    self.opened_at = time.monotonic()
+            self.changed.notify_all()
+
+
+class Ingestor:
+    def __init__(self, session, url=None, concurrency=8, rate=10.0, retries=3,
+                 backoff=0.5, chunk_size=500, breaker=None, circuit_wait=300.0):
+        self.session = session
+        self.url = url
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.chunk_size = chunk_size
+        self.breaker = breaker or CircuitBreaker()
+        self.circuit_wait = circuit_wait
+        self.stats = {"requested": 0, "fetched": 0, "incomplete": 0, "failed": 0,
+                      "circuit_open": 0, "circuit_waits": 0, "retries": 0, "upserted": 0}
+        self.stats_lock = threading.Lock()
+
+    def _count(self, key, n=1):
+        with self.stats_lock:
+            self.stats[key] += n
+
+    def fetch(self, city_name):
+        """Fetch one city with retries; returns the price dict or None."""
+        for attempt in range(self.retries + 1):
+            # Time spent waiting for the circuit does not use up an attempt.
+            if self.breaker.before_call(self.circuit_wait):
+                self._count("circuit_waits")
+            self.limiter.acquire()
+            try:
+                values = fetch_city_prices(self.session, city_name, url=self.url)
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status is not None and status < 500 and status not in RETRYABLE_STATUS:
+                    # A 4xx (e.g. an unknown city) comes from a healthy upstream.
+                    self.breaker.record(True)
+                    raise
+                self.breaker.record(False)
+                if status not in RETRYABLE_STATUS:
+                    raise
+            except (requests.ConnectionError, requests.Timeout):
+                self.breaker.record(False)
+            except Exception:
+                # The upstream answered (e.g. with a body we cannot parse); also releases a probe.
+                self.breaker.record(True)
+                raise
+            else:
+                self.breaker.record(True)
+                return values
+            if attempt < self.retries:
+                self._count("retries")
+                time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+        raise RuntimeError(f"Giving up on {city_name} after {self.retries + 1} attempts")
+
+    def _fetch_one(self, city_name):
+        try:
+            values = self.fetch(city_name)
+        except CircuitOpenError:
+            self._count("circuit_open")
+            return None
+        except Exception as e:
+            print(f"Error fetching {city_name}: {e}")
+            self._count("failed")
+            return None
+        if values is None:
+            print(f"Missing data for {city_name}, skipping...")
+            self._count("incomplete")
+            return None
+        self._count("fetched")
+        return dict(values, city_name=city_name)
+
+    def upsert(self, rows):
+        """Insert or update a chunk of rows in one statement."""
+        if not rows:
+            return
+        now = datetime.now(timezone.utc)
+        for row in rows:
+            row["last_updated"] = now
+        dialect = db.engine.dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(CityCost.__table__).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["city_name"],
+                set_={col: stmt.excluded[col] for col in
+                      ("rent_min", "rent_max", "salary_min", "salary_max", "last_updated")},
+            )
+            db.session.execute(stmt)
+        else:
+            existing = {c.city_name: c for c in CityCost.query.filter(
+                CityCost.city_name.in_([r["city_name"] for r in rows])).all()}
+            for row in rows:
+                city = existing.get(row["city_name"])
+                if city is None:
+                    db.session.add(CityCost(**row))
+                else:
+                    for key, value in row.items():
+                        setattr(city, key, value)
         db.session.commit()
-        print(f"Added city cost for {city_name}")
+        self._count("upserted", len(rows))
+
+    def run(self, city_names):
+        names = list(dict.fromkeys(n.strip() for n in city_names if n and n.strip()))
+        self.stats["requested"] = len(names)
+        start = time.perf_counter()
+        pending = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = [pool.submit(self._fetch_one, name) for name in names]
+            for future in as_completed(futures):
+                row = future.result()
+                if row:
+                    pending.append(row)
+                if len(pending) >= self.chunk_size:
+                    self.upsert(pending)
+                    pending = []
+        self.upsert(pending)
+        elapsed = time.perf_counter() - start
+        self.stats["seconds"] = round(elapsed, 3)
+        self.stats["cities_per_second"] = round(len(names) / elapsed, 1) if elapsed else 0.0
+        return self.stats
+
+
+def read_cities(path):
+    with open(path) as f:
+        return [line.split(",")[0].strip() for line in f if line.strip() and not line.startswith("#")]
 
-    except Exception as e:
-        print(f"Error fetching or saving {city_name}: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch and upsert city cost data")
+    parser.add_argument("cities", nargs="*", help="City names (default: Delhi, Bengaluru, Kochi)")
+    parser.add_argument("--file", help="Text/CSV file with one city name per line")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=10.0, help="Max requests per second (0 = unlimited)")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--circuit-wait", type=float, default=300.0,
+                        help="Seconds a city may wait on an open circuit before it is given up")
+    parser.add_argument("--url", help="Override the RapidAPI /prices URL")
+    parser.add_argument("--fake", action="store_true", help="Start a local fake price server and use it")
+    parser.add_argument("--count", type=int, default=0, help="With --fake, generate this many city names")
+    args = parser.parse_args()
+
+    cities = args.cities or ["Delhi", "Bengaluru", "Kochi"]
+    if args.file:
+        cities = read_cities(args.file)
+    url = args.url
+    api_key = None
+    if args.fake:
+        from bench.fake_prices import serve
+        server = serve()
+        url = f"http://127.0.0.1:{server.server_port}/prices"
+        api_key = "fake"
+        if args.count:
+            cities = [f"City {i}" for i in range(args.count)]
+
     with app.app_context():
-        cities = ["Delhi", "Bengaluru", "Kochi"]
-        for city in cities:
-            fetch_and_add_city(city)
+        ingestor = Ingestor(make_session(args.concurrency, api_key), url=url, concurrency=args.concurrency,
+                            rate=args.rate, retries=args.retries, chunk_size=args.chunk_size,
+                            circuit_wait=args.circuit_wait)
+        stats = ingestor.run(cities)
+    for key, value in stats.items():
+        print(f"{key}: {value}")
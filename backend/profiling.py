@@ -0,0 +1,224 @@
+"""Opt-in per-request profiling.
+
+A request is profiled when it carries ``X-Profile-Token`` matching
+``PROFILE_TOKEN``, or when it is picked by ``PROFILE_SAMPLE_RATE``. The
+default ``sample`` mode runs a wall-clock stack sampler on a side thread and
+stores collapsed stacks (``flamegraph.pl`` / speedscope input). Sending
+``X-Profile-Mode: cprofile`` runs cProfile instead and stores a ``.prof``
+file. Either way the profile records every SQL statement and outbound call
+the request made.
+
+With no token and a zero sample rate no hooks or SQL listeners are
+installed, so a disabled profiler costs nothing per request.
+"""
+import collections
+import cProfile
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import metrics
+
+SAMPLE = "sample"
+CPROFILE = "cprofile"
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack every ``interval`` seconds."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                name = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                stack.append(name.replace(";", ":"))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Profiler:
+    def __init__(self):
+        self.token = None
+        self.sample_rate = 0.0
+        self.interval = 0.005
+        self.keep = 200
+        self.directory = None
+
+    @property
+    def enabled(self):
+        return bool(self.token) or self.sample_rate > 0
+
+    def init_app(self, app):
+        self.token = app.config.get("PROFILE_TOKEN") or None
+        self.sample_rate = float(app.config.get("PROFILE_SAMPLE_RATE", 0.0))
+        self.interval = float(app.config.get("PROFILE_INTERVAL", self.interval))
+        self.keep = int(app.config.get("PROFILE_KEEP", self.keep))
+        self.directory = app.config.get("PROFILE_DIR", os.path.join(app.instance_path, "profiles"))
+        app.extensions["profiler"] = self
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        metrics.call_observers.append(_observe_call)
+
+    def authorized(self, req):
+        supplied = req.headers.get("X-Profile-Token", "")
+        return bool(self.token) and hmac.compare_digest(supplied, self.token)
+
+    # --- request hooks -------------------------------------------------------
+
+    def _before_request(self):
+        if self.authorized(request):
+            trigger = "header"
+        elif self.sample_rate and random.random() < self.sample_rate:
+            trigger = "sampled"
+        else:
+            return
+        mode = CPROFILE if request.headers.get("X-Profile-Mode", "").lower() == CPROFILE else SAMPLE
+        state = {
+            "id": f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}",
+            "trigger": trigger, "mode": mode, "sql": [], "calls": [],
+            "started": time.perf_counter(), "started_at": time.time(),
+        }
+        if mode == CPROFILE:
+            state["profiler"] = cProfile.Profile()
+            state["profiler"].enable()
+        else:
+            state["sampler"] = StackSampler(threading.get_ident(), self.interval)
+            state["sampler"].start()
+        g._profile = state
+
+    def _after_request(self, response):
+        state = g.get("_profile")
+        if state is not None:
+            state["status"] = response.status_code
+            response.headers["X-Profile-Id"] = state["id"]
+        return response
+
+    def _teardown_request(self, exc=None):
+        state = g.pop("_profile", None)
+        if state is None:
+            return
+        duration = time.perf_counter() - state["started"]
+        if "profiler" in state:
+            state["profiler"].disable()
+            state["profiler"].dump_stats(self._path(state["id"], ".prof"))
+        else:
+            state["sampler"].stop()
+            with open(self._path(state["id"], ".folded"), "w") as f:
+                f.write(state["sampler"].collapsed())
+        summary = {
+            "id": state["id"],
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "status": state.get("status", 500 if exc else None),
+            "trigger": state["trigger"],
+            "mode": state["mode"],
+            "started_at": state["started_at"],
+            "duration_ms": round(duration * 1000, 3),
+            "sql_count": len(state["sql"]),
+            "sql_ms": round(sum(s["ms"] for s in state["sql"]), 3),
+            "external_ms": round(sum(c["ms"] for c in state["calls"]), 3),
+        }
+        with open(self._path(state["id"], ".json"), "w") as f:
+            json.dump(dict(summary, sql=state["sql"], calls=state["calls"]), f)
+        self._prune()
+
+    # --- storage ---------------------------------------------------------------
+
+    def _path(self, profile_id, suffix):
+        return os.path.join(self.directory, profile_id + suffix)
+
+    def _prune(self):
+        ids = sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json"))
+        for profile_id in ids[:-self.keep]:
+            for suffix in (".json", ".folded", ".prof"):
+                try:
+                    os.remove(self._path(profile_id, suffix))
+                except FileNotFoundError:
+                    pass
+
+    def list(self, limit=50):
+        """Summaries of the most recent profiles, newest first."""
+        if not self.enabled:
+            return []
+        ids = sorted((name[:-5] for name in os.listdir(self.directory) if name.endswith(".json")),
+                     reverse=True)[:limit]
+        profiles = []
+        for profile_id in ids:
+            profile = self.get(profile_id)
+            if profile is not None:
+                profile.pop("sql")
+                profile.pop("calls")
+                profiles.append(profile)
+        return profiles
+
+    def get(self, profile_id):
+        path = self.file(profile_id, ".json")
+        if path is None:
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def file(self, profile_id, suffix):
+        """Path of a stored artifact, or None if the id is unknown or malformed."""
+        if not self.enabled or not profile_id.replace("-", "").isalnum():
+            return None
+        path = self._path(profile_id, suffix)
+        return path if os.path.exists(path) else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "_profile" in g:
+        conn.info.setdefault("_profile_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not (has_request_context() and "_profile" in g):
+        return
+    starts = conn.info.get("_profile_start")
+    if starts:
+        g._profile["sql"].append({
+            "statement": " ".join(statement.split())[:1000],
+            "ms": round((time.perf_counter() - starts.pop()) * 1000, 3),
+        })
+
+
+def _observe_call(service, outcome, elapsed):
+    if has_request_context() and "_profile" in g:
+        g._profile["calls"].append({"service": service, "outcome": outcome,
+                                    "ms": round(elapsed * 1000, 3)})
@@ -0,0 +1,278 @@
+"""Write-behind buffer for learner progress.
+
+Progress routes call ``record()``, which appends one event to a SQLite file
+shared by every worker on the host (``PROGRESS_BUFFER_PATH``, WAL mode) and
+returns. A flusher thread wakes every ``PROGRESS_FLUSH_INTERVAL`` seconds,
+takes up to ``PROGRESS_FLUSH_BATCH`` events and makes one database commit.
+That commit upserts each user's latest position into
+``user_current_progress`` (last write wins) and appends every event to the
+``progress_event`` history table. The buffered events are deleted only
+after that commit. A crash in between re-flushes them, and the unique
+``event_id`` keeps the history free of duplicates.
+
+``current()`` checks the buffer before the database, so a user's next
+request on this host sees their own unflushed writes; routes that already
+loaded the stored row overlay ``buffered()`` on it instead. Route learner traffic
+for one user to one host (or set PROGRESS_FLUSH_INTERVAL to 0 to write
+through) when several hosts serve curriculum routes.
+
+Events are on disk once ``record()`` returns, so they survive a worker
+restart. Gunicorn's ``worker_exit`` hook and an ``atexit`` handler flush
+what is left on shutdown.
+
+If the database rejects a batch as invalid (an integrity or data error,
+e.g. an event for a deleted lesson), the batch is replayed one event at a
+time and each rejected event moves to the ``progress_dead_letter`` table of
+the buffer file with its error, so one bad event cannot stall the buffer.
+Any other error leaves the events buffered for the next flush.
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress_event (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    chapter_id INTEGER NOT NULL,
+    lesson_id INTEGER NOT NULL,
+    detail TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_progress_event_user_id ON progress_event (user_id, id);
+CREATE TABLE IF NOT EXISTS progress_dead_letter (
+    id INTEGER PRIMARY KEY,
+    event_id TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    chapter_id INTEGER NOT NULL,
+    lesson_id INTEGER NOT NULL,
+    detail TEXT,
+    created_at REAL NOT NULL,
+    error TEXT NOT NULL,
+    failed_at REAL NOT NULL
+);
+"""
+
+# The database refused the event itself; retrying it unchanged cannot succeed.
+_REJECTED = (IntegrityError, DataError)
+
+
+class ProgressBuffer:
+    def __init__(self):
+        self.app = None
+        self.db = None
+        self.progress_model = None
+        self.event_model = None
+        self.path = None
+        self.interval = 1.0
+        self.batch_size = 5000
+        self.synchronous = "NORMAL"
+        self._schema_ready = False
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def init_app(self, app, db, progress_model, event_model):
+        self.app = app
+        self.db = db
+        self.progress_model = progress_model
+        self.event_model = event_model
+        self.path = app.config.get("PROGRESS_BUFFER_PATH") or os.path.join(app.instance_path, "progress.db")
+        self.interval = float(app.config.get("PROGRESS_FLUSH_INTERVAL", self.interval))
+        self.batch_size = int(app.config.get("PROGRESS_FLUSH_BATCH", self.batch_size))
+        self.synchronous = app.config.get("PROGRESS_BUFFER_SYNC", self.synchronous)
+        app.extensions["progress_buffer"] = self
+        # Events left by a worker that died before flushing would otherwise wait for this
+        # worker's first record(). In write-through mode that record() flushes them itself.
+        if self.interval > 0 and os.path.exists(self.path) and self.pending():
+            self._ensure_started()
+
+    # --- storage -------------------------------------------------------
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        if not self._schema_ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    # --- request path --------------------------------------------------
+
+    def record(self, user_id, kind, chapter_id, lesson_id, **detail):
+        """Append a progress event; the user's position becomes (chapter_id, lesson_id)."""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO progress_event (event_id, user_id, kind, chapter_id, lesson_id, detail, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (uuid.uuid4().hex, user_id, kind, chapter_id, lesson_id,
+                 json.dumps(detail) if detail else None, time.time()),
+            )
+        finally:
+            conn.close()
+        if self.interval <= 0:
+            self.flush()
+        else:
+            self._ensure_started()
+
+    def buffered(self, user_id):
+        """The user's latest unflushed ``(chapter_id, lesson_id)``, or None."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT chapter_id, lesson_id FROM progress_event WHERE user_id = ? ORDER BY id DESC LIMIT 1",
+                (user_id,),
+            ).fetchone()
+        finally:
+            conn.close()
+        return (row[0], row[1]) if row else None
+
+    def current(self, user_id):
+        """``(chapter_id, lesson_id)`` for the user, buffered or stored; None if they have none."""
+        position = self.buffered(user_id)
+        if position:
+            return position
+        progress = self.progress_model.query.filter_by(user_id=user_id).first()
+        if progress is None:
+            return None
+        return progress.current_chapter_id, progress.current_lesson_id
+
+    def pending(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM progress_event").fetchone()[0]
+        finally:
+            conn.close()
+
+    def dead_letters(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM progress_dead_letter").fetchone()[0]
+        finally:
+            conn.close()
+
+    # --- flushing ------------------------------------------------------
+
+    def flush(self):
+        """Write buffered events to the database; returns how many were flushed.
+
+        Call inside an app context. Only one process per host flushes at a
+        time; others return 0 straight away.
+        """
+        with open(f"{self.path}.lock", "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return 0
+            flushed = 0
+            while True:
+                count = self._flush_batch()
+                flushed += count
+                if count < self.batch_size:
+                    return flushed
+
+    def _flush_batch(self):
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id, event_id, user_id, kind, chapter_id, lesson_id, detail, created_at "
+                "FROM progress_event ORDER BY id LIMIT ?", (self.batch_size,),
+            ).fetchall()
+            if not rows:
+                return 0
+            try:
+                self._apply(rows)
+            except _REJECTED:
+                self.db.session.rollback()
+                self._apply_each(conn, rows)
+            conn.execute("DELETE FROM progress_event WHERE id <= ?", (rows[-1][0],))
+            return len(rows)
+        finally:
+            conn.close()
+
+    def _apply_each(self, conn, rows):
+        # Slow path after a rejected batch: isolate the bad events, keep the rest in order.
+        for row in rows:
+            try:
+                self._apply([row])
+            except _REJECTED as e:
+                self.db.session.rollback()
+                logger.error("Progress event %s rejected, moved to dead letters: %s", row[1], e.orig)
+                conn.execute(
+                    "INSERT OR REPLACE INTO progress_dead_letter "
+                    "(id, event_id, user_id, kind, chapter_id, lesson_id, detail, created_at, error, failed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (*row, str(e.orig), time.time()),
+                )
+            except Exception:
+                self.db.session.rollback()
+                # Events before this one are committed; drop them so they are not replayed.
+                conn.execute("DELETE FROM progress_event WHERE id < ?", (row[0],))
+                raise
+
+    def _apply(self, rows):
+        Progress, Event, session = self.progress_model, self.event_model, self.db.session
+        latest = {}
+        for row in rows:
+            latest[row[2]] = (row[4], row[5])
+        existing = {p.user_id: p for p in Progress.query.filter(Progress.user_id.in_(latest)).all()}
+        for user_id, (chapter_id, lesson_id) in latest.items():
+            progress = existing.get(user_id)
+            if progress is None:
+                session.add(Progress(user_id=user_id, current_chapter_id=chapter_id, current_lesson_id=lesson_id))
+            else:
+                progress.current_chapter_id, progress.current_lesson_id = chapter_id, lesson_id
+
+        event_ids = [row[1] for row in rows]
+        seen = set(session.execute(
+            self.db.select(Event.event_id).where(Event.event_id.in_(event_ids))).scalars())
+        fresh = [{
+            "event_id": row[1], "user_id": row[2], "kind": row[3], "chapter_id": row[4],
+            "lesson_id": row[5], "detail": json.loads(row[6]) if row[6] else None,
+            "created_at": datetime.fromtimestamp(row[7], timezone.utc),
+        } for row in rows if row[1] not in seen]
+        if fresh:
+            session.execute(self.db.insert(Event), fresh)
+        session.commit()
+
+    # --- background thread ---------------------------------------------
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="progress-flush", daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.flush()
+            except Exception:
+                logger.exception("Progress flush failed")
+
+    def shutdown(self):
+        """Stop the flusher and write out whatever is still buffered."""
+        self._stop.set()
+        with self.app.app_context():
+            self.flush()
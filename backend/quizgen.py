@@ -0,0 +1,221 @@
+"""Map-reduce quiz generation.
+
+Chapter text is split into bounded chunks, candidate questions are generated
+concurrently for as many chunks (spread across the chapter) as the quiz
+needs, and the candidates are validated, deduplicated and merged into the
+final quiz. Latency tracks the slowest chunk rather than the size of the
+whole chapter. A chunk whose call fails or returns no valid questions is
+retried; if the quiz still comes up short, ``QuizError`` is raised rather
+than returning a partial quiz.
+"""
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import timed_call
+
+logger = logging.getLogger(__name__)
+
+ANSWER_LETTERS = ("A", "B", "C", "D")
+
+CHUNK_PROMPT = """
+You are an AI financial literacy tutor. Based on the following lesson content, generate {count} multiple-choice questions. Each question should have 4 answer options (A, B, C, D) and indicate the correct answer.
+
+Lesson Content:
+{text}
+
+Return the output as JSON in the following format:
+[
+    {{"question": "Question text?", "options": ["Option A", "Option B", "Option C", "Option D"], "answer": "A"}},
+    ...
+]
+"""
+
+
+class QuizError(Exception):
+    """The LLM did not produce enough valid questions for the quiz."""
+
+
+class GeminiLLM:
+    """Calls a Gemini model and returns the raw response text."""
+
+    def __init__(self, model_name="gemini-1.5-pro", api_key=None, timeout=None):
+        self.model_name = model_name
+        self.api_key = api_key
+        self.timeout = timeout
+        self._model = None
+
+    def __call__(self, prompt):
+        if self._model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            self._model = genai.GenerativeModel(self.model_name)
+        options = {"timeout": self.timeout} if self.timeout else None
+        with timed_call("gemini"):
+            return self._model.generate_content(prompt, request_options=options).text
+
+
+class FakeLLM:
+    """Offline stand-in that builds fill-in-the-blank questions from the prompt text."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def __call__(self, prompt):
+        if self.delay:
+            import time
+            time.sleep(self.delay)
+        count = int(re.search(r"generate (\d+) multiple-choice", prompt).group(1))
+        text = prompt.split("Lesson Content:", 1)[1].split("Return the output as JSON", 1)[0]
+        words = sorted({w for w in re.findall(r"[A-Za-z]{5,}", text)}, key=str.lower)
+        sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if len(s.split()) >= 4]
+        questions = []
+        for i, sentence in enumerate(sentences[:count]):
+            target = max(re.findall(r"[A-Za-z]{5,}", sentence) or ["money"], key=len)
+            distractors = [w for w in words if w.lower() != target.lower()][i:i + 3]
+            distractors += ["savings", "interest", "budget"][:3 - len(distractors)]
+            options = [target] + distractors
+            shift = i % 4
+            options = options[shift:] + options[:shift]
+            questions.append({
+                "question": f"Fill in the blank: {sentence.replace(target, '_____', 1)}",
+                "options": options,
+                "answer": ANSWER_LETTERS[options.index(target)],
+            })
+        return json.dumps(questions)
+
+
+def chunk_texts(texts, max_chars):
+    """Pack paragraphs from ``texts`` into chunks of at most ``max_chars`` characters."""
+    chunks, current, size = [], [], 0
+    for text in texts:
+        for paragraph in (p.strip() for p in text.split("\n\n")):
+            if not paragraph:
+                continue
+            while len(paragraph) > max_chars:
+                cut = paragraph.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                pieces, paragraph = paragraph[:cut], paragraph[cut:].strip()
+                if current:
+                    chunks.append("\n\n".join(current))
+                    current, size = [], 0
+                chunks.append(pieces)
+            if current and size + len(paragraph) + 2 > max_chars:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(paragraph)
+            size += len(paragraph) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def parse_questions(raw):
+    """Extract and validate the question list from an LLM response."""
+    match = re.search(r"\[.*\]", raw or "", re.DOTALL)
+    if not match:
+        return []
+    try:
+        items = json.loads(match.group(0))
+    except ValueError:
+        return []
+    questions = []
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        question = item.get("question")
+        options = item.get("options")
+        answer = str(item.get("answer", "")).strip().upper()[:1]
+        if (isinstance(question, str) and question.strip()
+                and isinstance(options, list) and len(options) == 4
+                and all(isinstance(o, str) and o.strip() for o in options)
+                and answer in ANSWER_LETTERS):
+            questions.append({
+                "question": question.strip(),
+                "options": [o.strip() for o in options],
+                "answer": answer,
+            })
+    return questions
+
+
+def _tokens(question):
+    return frozenset(re.findall(r"[a-z0-9]+", question.lower()))
+
+
+def _is_duplicate(tokens, seen, threshold):
+    for other in seen:
+        union = len(tokens | other)
+        if union and len(tokens & other) / union >= threshold:
+            return True
+    return False
+
+
+def merge_questions(per_chunk, count, similarity=0.8):
+    """Round-robin across chunks, dropping near-duplicate questions."""
+    merged, seen = [], []
+    depth = max((len(q) for q in per_chunk), default=0)
+    for i in range(depth):
+        for questions in per_chunk:
+            if i >= len(questions):
+                continue
+            tokens = _tokens(questions[i]["question"])
+            if _is_duplicate(tokens, seen, similarity):
+                continue
+            seen.append(tokens)
+            merged.append(questions[i])
+            if len(merged) == count:
+                return merged
+    return merged
+
+
+def plan_calls(chunks, count):
+    """Questions to ask per call and number of calls for ``count`` questions from ``chunks`` chunks."""
+    # Ask for twice what is needed so dedup and validation still leave enough.
+    target = 2 * count
+    per_call = max(2, -(-target // chunks))
+    return per_call, min(chunks, -(-target // per_call))
+
+
+def llm_rounds(texts, max_chunk_chars=6000, concurrency=4, count=5, retries=2):
+    """Most sequential rounds of LLM calls ``generate_quiz`` makes for ``texts``."""
+    chunks = len(chunk_texts(texts, max_chunk_chars))
+    if not chunks:
+        return 0
+    _, calls = plan_calls(chunks, count)
+    return -(-calls // max(1, concurrency)) * (retries + 1)
+
+
+def generate_quiz(texts, llm, count=5, max_chunk_chars=6000, concurrency=4, retries=2):
+    """Generate ``count`` validated questions from lesson ``texts`` using ``llm``.
+
+    Raises ``QuizError`` if fewer than ``count`` remain after retries.
+    """
+    chunks = chunk_texts(texts, max_chunk_chars)
+    if not chunks:
+        return []
+    per_call, calls = plan_calls(len(chunks), count)
+    chunks = [chunks[i * len(chunks) // calls] for i in range(calls)]
+
+    def generate(chunk):
+        prompt = CHUNK_PROMPT.format(count=per_call, text=chunk)
+        for attempt in range(1, retries + 2):
+            try:
+                questions = parse_questions(llm(prompt))
+            except Exception:
+                logger.exception("Question generation failed for a chunk (attempt %d)", attempt)
+                continue
+            if questions:
+                return questions
+            logger.warning("No valid questions for a chunk (attempt %d)", attempt)
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as pool:
+        per_chunk = list(pool.map(generate, chunks))
+
+    questions = merge_questions(per_chunk, count)
+    if len(questions) < count:
+        raise QuizError(f"Only {len(questions)} of {count} questions could be generated")
+    for i, question in enumerate(questions, start=1):
+        question["id"] = str(i)
+    return questions
@@ -0,0 +1,174 @@
+"""Single-flight coalescing for expensive idempotent computations.
+
+``flights.do(key, fn)`` runs ``fn`` once per key at a time: callers that
+arrive while a call for the same key is running wait for it and get its
+result (or its exception) instead of starting their own. Nothing is kept
+after the call returns, so this only merges bursts; it is not a cache.
+
+With ``shared=True`` the call is also coalesced across the worker processes
+of one host: the leader holds an ``fcntl`` lock on
+``<SINGLEFLIGHT_DIR>/<digest>.lock`` and writes its result as JSON next to
+it, and a worker that waited on that lock reads the result instead of
+calling upstream again. Results of shared calls must therefore be
+JSON-serialisable with the app's JSON provider. A worker waits for the lock
+at most ``lock_timeout`` seconds (per call, or ``SINGLEFLIGHT_LOCK_TIMEOUT``)
+before computing on its own, so it must exceed the slowest leader. A callable
+``lock_timeout`` is evaluated only by the in-process leader, after it has
+claimed the key.
+
+Every caller is recorded in the ``singleflight_wait_seconds`` histogram,
+labelled by key group (the part of the key before the first ``:``) and role:
+``leader`` ran ``fn``, ``follower`` waited in-process, ``shared`` took
+another worker's result.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self.app = None
+        self.directory = None
+        self.cross_process = True
+        self.lock_timeout = 120.0
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def init_app(self, app):
+        self.app = app
+        self.directory = app.config.get("SINGLEFLIGHT_DIR", os.path.join(app.instance_path, "singleflight"))
+        self.cross_process = app.config.get("SINGLEFLIGHT_CROSS_PROCESS", self.cross_process)
+        self.lock_timeout = float(app.config.get("SINGLEFLIGHT_LOCK_TIMEOUT", self.lock_timeout))
+        os.makedirs(self.directory, exist_ok=True)
+        self.prune()
+        app.extensions["singleflight"] = self
+
+    def do(self, key, fn, shared=False, lock_timeout=None):
+        """Return ``fn()``, sharing one call among concurrent callers of ``key``."""
+        start = time.perf_counter()
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            _observe(key, "follower", start)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        role = "leader"
+        try:
+            if shared and self.cross_process:
+                if callable(lock_timeout):
+                    lock_timeout = lock_timeout()
+                role, call.result = self._run_shared(key, fn, lock_timeout or self.lock_timeout)
+            else:
+                call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            _observe(key, role, start)
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return sorted(self._calls)
+
+    # --- cross-process -------------------------------------------------------
+
+    def _run_shared(self, key, fn, lock_timeout):
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        lock_path = os.path.join(self.directory, f"{digest}.lock")
+        result_path = os.path.join(self.directory, f"{digest}.json")
+        started = time.time()
+        with open(lock_path, "a") as handle:
+            locked = self._acquire(handle, lock_timeout)
+            try:
+                # A result written after we started waiting came from the
+                # flight we queued behind; anything older is a previous burst.
+                try:
+                    if os.path.getmtime(result_path) >= started:
+                        with open(result_path) as f:
+                            return "shared", json.load(f)
+                except (OSError, ValueError):
+                    pass
+                result = fn()
+                self._write(result_path, result)
+                return "leader", result
+            finally:
+                if locked:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _acquire(self, handle, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except OSError:
+                if time.monotonic() >= deadline:
+                    # The holder is stuck; compute on our own rather than fail.
+                    logger.warning("Single-flight lock %s timed out", handle.name)
+                    return False
+                time.sleep(0.05)
+
+    def _write(self, path, result):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                f.write(self.app.json.dumps(result))
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Could not share single-flight result: %s", e)
+
+    def prune(self, max_age=3600):
+        """Delete lock and result files not touched in ``max_age`` seconds.
+
+        A lock file is only removed while holding it, so a flight still
+        running in another process keeps its lock.
+        """
+        now = time.time()
+        for filename in os.listdir(self.directory):
+            path = os.path.join(self.directory, filename)
+            try:
+                if now - os.path.getmtime(path) <= max_age:
+                    continue
+                if not filename.endswith(".lock"):
+                    os.remove(path)
+                    continue
+                with open(path, "a") as handle:
+                    try:
+                        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        continue
+                    os.remove(path)
+            except OSError:
+                continue
+
+
+def _observe(key, role, start):
+    registry.observe("singleflight_wait_seconds", {"group": key.split(":", 1)[0], "role": role},
+                     time.perf_counter() - start)
@@ -0,0 +1,286 @@
+"""Database snapshots for staging and benchmark environments.
+
+    python snapshot.py dump staging.snap.gz
+    python snapshot.py restore staging.snap.gz
+    python snapshot.py reset                  # empty tables, what deletedata.py used to do
+
+A snapshot is gzip-compressed JSON Lines: one header object (format
+version, alembic revision, creation time), then for every table in
+foreign-key order a ``{"table": ..., "columns": [...]}`` line followed by
+one JSON array per row. Datetimes and dates are ISO strings, ``Numeric``
+values decimal strings and enums member names, so a restore is lossless.
+
+``restore`` first checks every table and column in the snapshot against
+the models, so a mismatched file is rejected before anything is dropped.
+It then recreates the schema from the models, drops secondary indexes,
+bulk-loads each table (``COPY`` on PostgreSQL, batched
+``executemany`` elsewhere), rebuilds the indexes and moves PostgreSQL id
+sequences past the loaded rows, all in one transaction so a failed load
+leaves the old database in place, then stamps the migration head. Snapshots
+taken at an older revision restore as long as every column they carry
+still exists.
+"""
+import argparse
+import decimal
+import gzip
+import io
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+
+from sqlalchemy import insert, select, text, types
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+FORMAT = "spendsmart-snapshot"
+VERSION = 1
+
+
+def _dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _loads(line):
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def _iso(value):
+    return value.isoformat()
+
+
+def _encoder(column):
+    if isinstance(column.type, (types.DateTime, types.Date)):
+        return _iso
+    if isinstance(column.type, types.Enum) and column.type.enum_class is not None:
+        return lambda value: value.name
+    if isinstance(column.type, types.Numeric) and column.type.asdecimal:
+        return str
+    return None
+
+
+def _decoder(column):
+    if isinstance(column.type, types.DateTime):
+        return datetime.fromisoformat
+    if isinstance(column.type, types.Date):
+        return date.fromisoformat
+    if isinstance(column.type, types.Enum) and column.type.enum_class is not None:
+        return column.type.enum_class.__getitem__
+    if isinstance(column.type, types.Numeric) and column.type.asdecimal:
+        return decimal.Decimal
+    return None
+
+
+def _convert(row, converters):
+    return [value if value is None or convert is None else convert(value)
+            for value, convert in zip(row, converters)]
+
+
+def _revision(connection):
+    try:
+        return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except Exception:
+        return None
+
+
+def dump(db, path, batch_size=10000, compresslevel=4):
+    """Write every model table to ``path``; returns row counts per table."""
+    start = time.perf_counter()
+    counts = {}
+    with db.engine.connect() as connection, gzip.open(path, "wb", compresslevel=compresslevel) as f:
+        f.write(_dumps({
+            "format": FORMAT, "version": VERSION, "revision": _revision(connection),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }) + b"\n")
+        for table in db.metadata.sorted_tables:
+            columns = list(table.columns)
+            encoders = [_encoder(c) for c in columns]
+            f.write(_dumps({"table": table.name, "columns": [c.name for c in columns]}) + b"\n")
+            result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(
+                select(table).order_by(*table.primary_key.columns))
+            counts[table.name] = 0
+            for rows in result.partitions():
+                f.write(b"".join(_dumps(_convert(row, encoders)) + b"\n" for row in rows))
+                counts[table.name] += len(rows)
+    return {"tables": counts, "rows": sum(counts.values()), "seconds": round(time.perf_counter() - start, 3)}
+
+
+# --- restore ---------------------------------------------------------------
+
+def _copy_value(value, is_json):
+    if value is None:
+        return "\\N"
+    if is_json:
+        value = json.dumps(value)
+    elif value is True or value is False:
+        value = "t" if value else "f"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def _copy(connection, table, names, rows):
+    # Values are already in their snapshot (text) form, which COPY parses natively.
+    is_json = [isinstance(table.c[n].type, types.JSON) for n in names]
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(value, j) for value, j in zip(row, is_json)))
+        buffer.write("\n")
+    buffer.seek(0)
+    quote = connection.dialect.identifier_preparer.quote
+    sql = f"COPY {quote(table.name)} ({', '.join(quote(n) for n in names)}) FROM STDIN"
+    with connection.connection.driver_connection.cursor() as cursor:
+        cursor.copy_expert(sql, buffer)
+
+
+def _insert(connection, table, names, rows, decoders):
+    connection.execute(insert(table), [dict(zip(names, _convert(row, decoders))) for row in rows])
+
+
+def _reset_sequences(connection, tables):
+    quote = connection.dialect.identifier_preparer.quote
+    for table in tables:
+        pk = list(table.primary_key.columns)
+        if len(pk) != 1 or not isinstance(pk[0].type, types.Integer):
+            continue
+        # pg_get_serial_sequence is NULL for tables without one, and setval(NULL, ...) is a no-op.
+        connection.execute(
+            text(f"SELECT setval(pg_get_serial_sequence(:table, :column), "
+                 f"COALESCE(MAX({quote(pk[0].name)}), 0) + 1, false) FROM {quote(table.name)}"),
+            {"table": quote(table.name), "column": pk[0].name})
+
+
+def _read_header(f, path):
+    header = _loads(f.readline())
+    if header.get("format") != FORMAT or header.get("version") != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} {FORMAT} file")
+    return header
+
+
+def _check(path, tables):
+    """Raise ``ValueError`` unless every table and column in ``path`` still exists."""
+    with gzip.open(path, "rb") as f:
+        _read_header(f, path)
+        for line in f:
+            if not line.startswith(b"{"):
+                continue
+            item = _loads(line)
+            table = tables.get(item["table"])
+            if table is None:
+                raise ValueError(f"Snapshot table {item['table']!r} no longer exists")
+            missing = [n for n in item["columns"] if n not in table.c]
+            if missing:
+                raise ValueError(f"Snapshot columns {table.name}.{missing} no longer exist")
+
+
+@contextmanager
+def _transaction(engine):
+    if engine.dialect.name != "sqlite":
+        with engine.begin() as connection:
+            yield connection
+        return
+    # pysqlite commits DDL on its own unless the transaction is opened explicitly.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql("BEGIN")
+        try:
+            yield connection
+        except BaseException:
+            connection.exec_driver_sql("ROLLBACK")
+            raise
+        connection.exec_driver_sql("COMMIT")
+
+
+def restore(db, path, batch_size=10000):
+    """Replace the database contents with the snapshot at ``path``; returns row counts."""
+    start = time.perf_counter()
+    tables = {t.name: t for t in db.metadata.sorted_tables}
+    counts = {}
+    _check(path, tables)
+    with gzip.open(path, "rb") as f, _transaction(db.engine) as connection:
+        header = _read_header(f, path)
+        db.metadata.drop_all(connection)
+        db.metadata.create_all(connection)
+        copy = connection.dialect.name == "postgresql"
+        indexes = [index for table in tables.values() for index in table.indexes]
+        for index in indexes:
+            index.drop(connection)
+
+        table = names = decoders = None
+        batch = []
+
+        def flush():
+            if batch:
+                if copy:
+                    _copy(connection, table, names, batch)
+                else:
+                    _insert(connection, table, names, batch, decoders)
+                counts[table.name] += len(batch)
+                batch.clear()
+
+        for line in f:
+            item = _loads(line)
+            if isinstance(item, dict):
+                flush()
+                table = tables[item["table"]]
+                names = item["columns"]
+                decoders = [_decoder(table.c[n]) for n in names]
+                counts[table.name] = 0
+                continue
+            batch.append(item)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+
+        for index in indexes:
+            index.create(connection)
+        if copy:
+            _reset_sequences(connection, tables.values())
+    return {
+        "revision": header.get("revision"),
+        "tables": counts,
+        "rows": sum(counts.values()),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def reset(db):
+    db.drop_all()
+    db.create_all()
+
+
+def _stamp(app):
+    from flask_migrate import stamp
+    stamp(directory=os.path.join(app.root_path, "migrations"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dump, restore or reset the database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    dump_cmd = commands.add_parser("dump")
+    dump_cmd.add_argument("path")
+    restore_cmd = commands.add_parser("restore")
+    restore_cmd.add_argument("path")
+    restore_cmd.add_argument("--batch-size", type=int, default=10000)
+    commands.add_parser("reset")
+    args = parser.parse_args()
+
+    from app import app
+    from extensions import db
+
+    with app.app_context():
+        if args.command == "dump":
+            report = dump(db, args.path)
+        elif args.command == "restore":
+            report = restore(db, args.path, args.batch_size)
+            _stamp(app)
+        else:
+            reset(db)
+            _stamp(app)
+            report = {"message": "All tables dropped and recreated successfully."}
+    for key, value in report.items():
+        print(f"{key}: {value}")
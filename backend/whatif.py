@@ -0,0 +1,152 @@
+"""Salary x rent x horizon what-if grids over the ``city_cost`` ranges.
+
+Each city's ``salary_min..salary_max`` and ``rent_min..rent_max`` span an
+evenly spaced grid. For every (city, salary, rent, year) cell one
+broadcasted numpy expression gives the savings. It uses the same model as
+the nightly goal projections (``feasibility.contribution_factor``): the
+monthly surplus (salary - rent, floored at 0) is saved every year, grows
+with salary and compounds at the expected return on top of the starting
+balance.
+
+A goal is feasible in a cell if its share of the savings (split evenly
+across goals, as in feasibility.py) reaches the inflation-adjusted amount
+by the goal's year.
+
+Grids are computed and cached per city, keyed on the city's
+``last_updated`` (so a city refresh invalidates them) and every input. The
+cache holds the numpy arrays, not encoded JSON, and is bounded by their
+total size in bytes. ``/cities/what-if`` pages through cities so one
+response never covers more than ``WHATIF_MAX_CELLS`` savings cells.
+"""
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from feasibility import contribution_factor
+
+
+class GridCache:
+    """Thread-safe LRU of computed grids, bounded by the bytes their arrays hold."""
+
+    def __init__(self):
+        self.nbytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute, max_bytes):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key][0]
+        value = compute()
+        size = sum(a.nbytes for a in value.values())
+        with self._lock:
+            if key not in self._items and size <= max_bytes:
+                self._items[key] = (value, size)
+                self.nbytes += size
+            while self.nbytes > max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.nbytes -= evicted
+        return value
+
+
+_cache = GridCache()
+
+
+def page_size(salary_steps, rent_steps, years, max_cells):
+    """How many cities fit in one response of at most ``max_cells`` savings cells (0 if none)."""
+    return max_cells // (salary_steps * rent_steps * years)
+
+
+def pages(cities, per_page):
+    return max(math.ceil(len(cities) / per_page), 1)
+
+
+def _ranges(cities):
+    # Numeric columns arrive as Decimal; convert explicitly before numpy sees them.
+    return np.array([[float(c["salary_min"]), float(c["salary_max"]),
+                      float(c["rent_min"]), float(c["rent_max"])] for c in cities])
+
+
+def grid(cities, salary_steps, rent_steps, years, balance, goals,
+         expected_return, inflation_rate, salary_growth):
+    """Savings and goal feasibility over every city's salary/rent ranges.
+
+    ``cities`` are ``CityCost.to_dict()`` rows; ``goals`` is a list of
+    ``(amount, years_from_now)``. Returns numpy arrays indexed
+    ``[city, salary, rent]`` (plus ``year`` for savings).
+    """
+    ranges = _ranges(cities)
+    steps = np.linspace(0.0, 1.0, salary_steps)
+    salaries = ranges[:, :1] + (ranges[:, 1:2] - ranges[:, :1]) * steps                      # (C, S)
+    steps = np.linspace(0.0, 1.0, rent_steps)
+    rents = ranges[:, 2:3] + (ranges[:, 3:4] - ranges[:, 2:3]) * steps                       # (C, R)
+
+    n = np.arange(1, years + 1, dtype=float)                                                 # (H,)
+    yearly = 12 * np.maximum(salaries[:, :, None] - rents[:, None, :], 0.0)                 # (C, S, R)
+    factor = contribution_factor(n, expected_return, salary_growth)
+    savings = balance * (1 + expected_return) ** n + yearly[..., None] * factor              # (C, S, R, H)
+
+    feasible = np.zeros((0,) + yearly.shape, dtype=bool)
+    if goals:
+        amounts = np.array([float(a) for a, _ in goals])
+        horizons = np.array([max(int(y), 0) for _, y in goals])
+        share = 1.0 / len(goals)
+        goal_n = horizons.astype(float)
+        at_goal = (balance * (1 + expected_return) ** goal_n
+                   + yearly[..., None] * contribution_factor(goal_n, expected_return, salary_growth))
+        targets = amounts * (1 + inflation_rate) ** goal_n
+        feasible = np.ascontiguousarray(np.moveaxis(at_goal * share >= targets, -1, 0))  # (G, C, S, R)
+
+    return {
+        "salaries": salaries,
+        "rents": rents,
+        "savings": np.rint(savings).astype(np.int64),
+        "feasible": feasible,
+    }
+
+
+def cached_grid(city, salary_steps, rent_steps, years, balance, goals,
+                expected_return, inflation_rate, salary_growth, max_bytes):
+    """``grid([city], ...)``, memoized on the inputs and the city's ``last_updated``."""
+    key = (
+        city["city_name"], city.get("last_updated"),
+        salary_steps, rent_steps, years, float(balance),
+        tuple((float(a), int(y)) for a, y in goals),
+        expected_return, inflation_rate, salary_growth,
+    )
+    return _cache.get_or_compute(key, lambda: grid(
+        [city], salary_steps, rent_steps, years, balance, goals,
+        expected_return, inflation_rate, salary_growth), max_bytes)
+
+
+def report(cities, salary_steps, rent_steps, years, balance, goals, goal_ids,
+           expected_return, inflation_rate, salary_growth, cache_bytes=0):
+    """The ``/cities/what-if`` payload; ``goal_ids`` label ``goals`` (None for ad hoc ones).
+
+    Per-city grids come from the cache (up to ``cache_bytes``) and are
+    joined along the city axis.
+    """
+    grids = [cached_grid(city, salary_steps, rent_steps, years, balance, goals,
+                         expected_return, inflation_rate, salary_growth, cache_bytes) for city in cities]
+    result = {name: np.concatenate([g[name] for g in grids], axis=1 if name == "feasible" else 0)
+              for name in ("salaries", "rents", "savings", "feasible")}
+    return {
+        "cities": [c["city_name"] for c in cities],
+        "years": years,
+        "expected_return": expected_return,
+        "inflation_rate": inflation_rate,
+        "salary_growth": salary_growth,
+        "salaries": result["salaries"],
+        "rents": result["rents"],
+        "savings": result["savings"],
+        "goals": [{
+            "goal_id": goal_id,
+            "amount": amount,
+            "years": goal_years,
+            "feasible": feasible,
+            "feasible_share": feasible.mean(axis=(1, 2)),
+        } for goal_id, (amount, goal_years), feasible in zip(goal_ids, goals, result["feasible"])],
+    }